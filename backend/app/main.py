@@ -1,15 +1,27 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Any, Dict
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pathlib import Path
+import asyncio
+import json
 import uvicorn
-from .services.edi_parser import parse_edi_to_xml
-from .services.spec_parser import parse_pdf_spec_to_xml, parse_document_spec_to_xml
+from .services.edi_parser import DEFAULT_CHUNK_SIZE, iter_store_xml, parse_edi_document, render_store_xml, StreamingEDIParser
+from .services.envelope import EnvelopeError
+from .services.invoice_totals import TotalsError
+from .services.field_store import FieldStore
+from .services.spec_parser import parse_pdf_spec_to_xml, parse_document_spec
 from .services.compare import compare_fields, compare_fields_detailed, get_mandatory_fields, get_optional_fields, get_segment_summary
 from .services.ai_summary import ComplianceAnalyzer, generate_executive_summary
+from .services.batch import expand_batch_files, validate_edi_file
+from .services.spec_cache import CachedSpec, spec_cache, spec_id_for
+from .services.session_store import edi_sessions
+from .services.executor import parser_executor, ExecutorSaturated
+from .services.spec_index import DEFAULT_SPEC_INDEX, ENVELOPE_SEGMENTS, SpecIndex, STATUS_MANDATORY
+from .services.spec_registry import spec_registry
+from .services.json_response import JSON_BACKEND, FastJSONResponse
 
 
 app = FastAPI(title="EDI 810 Validator API")
@@ -40,6 +52,7 @@ class FieldInfo(BaseModel):
     color: str
     present_in_edi: bool
     length_error: str
+    type_error: str = ""
 
 class SegmentInfo(BaseModel):
     segment_tag: str
@@ -49,6 +62,26 @@ class SegmentInfo(BaseModel):
     max_usage: str
     present_in_edi: str
     status: str
+    occurrences: int | None = None
+    usage_error: str = ""
+
+class TransactionCompareInfo(BaseModel):
+    index: int
+    control_number: str
+    group_control_number: str
+    interchange_control_number: str
+    start_segment: int
+    end_segment: int | None = None
+    is_valid: bool
+    compliance_score: float
+    compliance_status: str
+    missing_mandatory: list[str]
+    length_errors: list[str]
+    type_errors: list[str] = []
+    structure_errors: list[str] = []
+    envelope_errors: list[str] = []
+    totals_errors: list[str] = []
+    critical_issues: int
 
 class CompareResult(BaseModel):
     is_810: bool
@@ -64,6 +97,10 @@ class CompareResult(BaseModel):
     analysis: Dict[str, Any] | None = None
     key_fields: Dict[str, Dict[str, str]] | None = None
     edi_present_status: list[Dict[str, str]] | None = None
+    transaction_results: list[TransactionCompareInfo] | None = None
+    structure_errors: list[str] = []
+    envelope_errors: list[str] = []
+    totals_errors: list[str] = []
 
 
 
@@ -77,18 +114,189 @@ def api_health():
     return {"status": "ok"}
 
 
+async def run_offloaded(fn, *args):
+    """Run a CPU-bound call on the parser executor, mapping saturation to 503."""
+    try:
+        return await parser_executor.run(fn, *args)
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+async def load_spec(file_bytes: bytes, filename: str) -> tuple[str, CachedSpec, bool]:
+    """Return (spec_id, spec, cache_hit), parsing off the event loop on a miss."""
+    spec_id = spec_id_for(file_bytes)
+    spec = spec_cache.get(spec_id)
+    if spec is not None:
+        return spec_id, spec, True
+    doc_type, requirements, fields, status_map, definitions, stats = await run_offloaded(parse_document_spec,
+                                                                                         file_bytes, filename)
+    spec = CachedSpec(doc_type, requirements, fields, status_map, filename, stats.to_dict(), definitions)
+    spec_cache.put(spec_id, spec)
+    return spec_id, spec, False
+
+
+def profile_requirements(index: SpecIndex) -> tuple[Dict[str, bool], Dict[str, str]]:
+    """Requirements and status map of a partner profile used on its own as the specification."""
+    requirements = {tag: rule.status_bit == STATUS_MANDATORY for tag, rule in index.fields.items()}
+    status_map = {tag: rule.status for tag, rule in index.fields.items()}
+    return requirements, status_map
+
+
+@app.get("/api/metrics")
+def metrics():
+    return {
+        "executor": parser_executor.metrics(),
+        "spec_cache": spec_cache.stats(),
+        "sessions": edi_sessions.stats(),
+        "profiles": spec_registry.stats(),
+        "json_backend": JSON_BACKEND
+    }
+
+
+@app.get("/api/profiles")
+def list_profiles():
+    """Partner profiles available to /api/compare and /api/validate/batch."""
+    return {
+        "profiles": [profile.describe() for profile in spec_registry.profiles()],
+        "registry": spec_registry.stats()
+    }
+
+
+@app.get("/api/spec/cache")
+def spec_cache_stats():
+    return spec_cache.stats()
+
+
+@app.get("/api/sessions")
+def session_stats():
+    return edi_sessions.stats()
+
+
+# Optional parts of the parse responses, selected with ?include=...
+EDI_SECTIONS = ("xml", "fields", "values", "transactions", "store")
+SPEC_SECTIONS = ("xml", "fields", "requirements", "status", "definitions")
+
+
+def parse_include(include: str | None, sections: tuple) -> set:
+    """Parse a comma-separated ``include`` option; everything is included when it is absent."""
+    if include is None:
+        return set(sections)
+    requested = {part.strip().lower() for part in include.split(",") if part.strip()}
+    unknown = requested - set(sections)
+    if unknown:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown include option(s): {', '.join(sorted(unknown))}; "
+                                   f"choose from {', '.join(sections)}")
+    return requested
+
+
 @app.post("/api/parse/edi")
-async def parse_edi(file: UploadFile = File(...)):
+async def parse_edi(file: UploadFile = File(...), include: str | None = None, stream_xml: bool = False):
+    """Parse an EDI 810 upload.
+
+    The parse itself never builds XML; it is rendered from the parsed field
+    store only when asked for. ``include`` picks the response parts
+    (``xml``, ``fields``, ``values``, ``transactions``, ``store``; all of
+    them when omitted), e.g. ``?include=fields,values``. With
+    ``stream_xml=true`` the XML is streamed back as the response body and
+    the session handle is sent in the X-EDI-Id header. The XML of an
+    earlier upload is available from /api/parse/edi/{edi_id}/xml.
+    """
+    sections = parse_include(include, EDI_SECTIONS)
     try:
-        content = (await file.read()).decode(errors="ignore")
-        xml, fields, is_810, field_values = parse_edi_to_xml(content)
+        if parser_executor.uses_processes:
+            # Worker processes need picklable input
+            source = await file.read()
+        else:
+            # Tokenize straight from the spooled upload instead of materializing it
+            await file.seek(0)
+            source = file.file
+        parsed = await run_offloaded(parse_edi_document, source, DEFAULT_CHUNK_SIZE, False)
+        _xml, fields, is_810, field_values = parsed.finish()
+        if not is_810:
+            raise HTTPException(status_code=400, detail="Please upload an EDI 810 sample invoice.")
+        # Keep the parse server-side so /api/compare only needs the handle
+        edi_id = edi_sessions.put({
+            "fields": sorted(fields),
+            "field_values": field_values,
+            "transactions": parsed.transactions,
+            "field_store": parsed.store,
+            "envelope_errors": parsed.envelope_errors,
+            "totals_errors": parsed.totals_errors
+        }, parsed.store.approximate_size())
+        if stream_xml:
+            return StreamingResponse(
+                iter_store_xml(parsed.store),
+                media_type="application/xml",
+                headers={"X-EDI-Id": edi_id, "X-EDI-Fields": str(len(fields))}
+            )
+        result = {
+            "edi_id": edi_id,
+            "is_810": is_810,
+            "envelope_errors": [e.to_dict() for e in parsed.envelope_errors],
+            "totals_errors": [e.to_dict() for e in parsed.totals_errors],
+            "invoice_totals": [i.to_dict() for i in parsed.totals.invoices]
+        }
+        if "xml" in sections:
+            result["xml"] = await run_offloaded(render_store_xml, parsed.store)
+        if "fields" in sections:
+            result["fields"] = sorted(fields)
+        if "values" in sections:
+            result["field_values"] = field_values
+        if "transactions" in sections:
+            result["transactions"] = [t.to_dict() for t in parsed.transactions]
+        if "store" in sections:
+            result["field_store"] = parsed.store.to_dict()
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing EDI file: {str(e)}")
+
+
+@app.get("/api/parse/edi/{edi_id}/xml")
+def edi_xml(edi_id: str):
+    """Render the XML of a parsed upload on demand, streamed from its field store."""
+    session = edi_sessions.get(edi_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired edi_id; please upload the EDI file again")
+    return StreamingResponse(iter_store_xml(session["field_store"]), media_type="application/xml")
+
+
+@app.post("/api/parse/edi/stream")
+async def parse_edi_stream(request: Request):
+    """Parse a raw EDI request body while it is still being received.
+
+    The body is sent as-is (e.g. ``Content-Type: application/octet-stream``)
+    rather than multipart, so each network chunk goes straight into the
+    incremental decoder and tokenizer. No XML or field store is built and
+    transaction sets are summarized as they close: the response lists the
+    first EDI_STREAM_DETAIL_LIMIT transaction sets, invoice totals and
+    errors of each kind, and the ``*_count`` keys give the full tallies.
+    """
+    try:
+        stream_parser = StreamingEDIParser()
+        async for chunk in request.stream():
+            if not stream_parser.feed(chunk):
+                break  # Rejected (e.g. not an 810); stop consuming the body
+        parsed = stream_parser.close()
+        _xml, fields, is_810, field_values = parsed.finish()
         if not is_810:
             raise HTTPException(status_code=400, detail="Please upload an EDI 810 sample invoice.")
         return {
-            "xml": xml, 
-            "fields": sorted(list(fields)), 
+            "fields": sorted(list(fields)),
             "is_810": is_810,
-            "field_values": field_values
+            "field_values": field_values,
+            "transactions": [t.to_dict() for t in stream_parser.transactions],
+            "transaction_count": stream_parser.transaction_count,
+            "segment_count": parsed.segment_count,
+            "envelope_errors": [e.to_dict() for e in parsed.envelope_errors],
+            "envelope_error_count": parsed.envelope.error_count,
+            "totals_errors": [e.to_dict() for e in parsed.totals_errors],
+            "totals_error_count": parsed.totals.error_count,
+            "invoice_totals": [i.to_dict() for i in parsed.totals.invoices],
+            "invoice_count": parsed.totals.invoice_count,
+            "bytes_received": stream_parser.bytes_received
         }
     except HTTPException:
         raise
@@ -97,65 +305,242 @@ async def parse_edi(file: UploadFile = File(...)):
 
 
 @app.post("/api/parse/spec")
-async def parse_spec(file: UploadFile = File(...)):
+async def parse_spec(file: UploadFile | None = File(None), spec_id: str | None = Form(None), include: str | None = None):
+    """Parse (or look up) a spec; ``include`` picks the response parts like /api/parse/edi."""
+    sections = parse_include(include, SPEC_SECTIONS)
     try:
-        file_bytes = await file.read()
-        if not file_bytes:
-            raise HTTPException(status_code=400, detail="Empty file")
+        if file is None:
+            # Re-use a previously parsed document without uploading it again
+            if not spec_id:
+                raise HTTPException(status_code=400, detail="Provide a specification file or a spec_id")
+            spec = spec_cache.get(spec_id)
+            if spec is None:
+                raise HTTPException(status_code=404, detail="Unknown or expired spec_id; please upload the document again")
+            cache_hit = True
+            file_type = None
+        else:
+            file_bytes = await file.read()
+            if not file_bytes:
+                raise HTTPException(status_code=400, detail="Empty file")
+            
+            # Use the new dynamic document parser; identical documents are only parsed once
+            spec_id, spec, cache_hit = await load_spec(file_bytes, file.filename or "")
+            file_type = file.content_type
         
-        # Use the new dynamic document parser
-        xml, requirements, all_fields, status_map = parse_document_spec_to_xml(file_bytes, file.filename or "")
-        
-        return {
-            "xml": xml, 
-            "requirements": requirements, 
-            "fields": sorted(list(all_fields)),
-            "status_map": status_map,
-            "filename": file.filename,
-            "file_type": file.content_type
+        result = {
+            "spec_id": spec_id,
+            "cached": cache_hit,
+            "filename": file.filename if file is not None else spec.filename,
+            "file_type": file_type,
+            "scan": spec.scan
         }
+        if "xml" in sections:
+            result["xml"] = spec.xml
+        if "requirements" in sections:
+            result["requirements"] = spec.requirements
+        if "fields" in sections:
+            result["fields"] = sorted(spec.fields)
+        if "status" in sections:
+            result["status_map"] = spec.status_map
+        if "definitions" in sections:
+            result["definitions"] = spec.definitions
+        return result
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing specification file: {str(e)}")
 
 
+class TransactionPayload(BaseModel):
+    index: int
+    interchange_index: int = 0
+    group_index: int = 0
+    start_segment: int = 0
+    end_segment: int | None = None
+    interchange_control_number: str = ""
+    group_control_number: str = ""
+    control_number: str = ""
+    fields: list[str]
+    field_values: dict[str, str] = {}
+    segment_counts: dict[str, int] = {}
+
+
 class CompareRequest(BaseModel):
-    edi_xml: str
-    spec_xml: str
-    edi_fields: list[str]
-    spec_requirements: dict[str, bool]
+    # Either the handles returned by the parse endpoints...
+    edi_id: str | None = None
+    spec_id: str | None = None
+    # ...or the parsed payloads themselves
+    edi_xml: str | None = None
+    spec_xml: str | None = None
+    edi_fields: list[str] | None = None
+    spec_requirements: dict[str, bool] | None = None
     edi_field_values: dict[str, str] = {}
     spec_status_map: dict[str, str] | None = None
+    edi_transactions: list[TransactionPayload] | None = None
+    edi_field_store: Dict[str, Any] | None = None
+    edi_envelope_errors: list[Dict[str, Any]] | None = None
+    edi_totals_errors: list[Dict[str, Any]] | None = None
+    # Partner profile to validate against; the built-in EDI 810 rules when omitted
+    profile_id: str | None = None
+
+
+
+def compare_transactions(
+    transactions: list,
+    requirements: Dict[str, bool],
+    edi_fields: list[str],
+    edi_field_values: Dict[str, str],
+    field_store: FieldStore | None = None,
+    index: SpecIndex = DEFAULT_SPEC_INDEX,
+    envelope_errors: list[EnvelopeError] | None = None,
+    totals_errors: list[TotalsError] | None = None,
+) -> tuple[list[TransactionCompareInfo], Dict[str, Any]]:
+    """Validate each ST/SE transaction set independently and aggregate the outcome.
+
+    ``transactions`` holds TransactionPayload models or the parser's own
+    TransactionSet objects; both expose the same attributes.
+    """
+    envelope_fields = [f for f in edi_fields if f[:-2] in ENVELOPE_SEGMENTS]
+    envelope_values = {f: edi_field_values[f] for f in envelope_fields if f in edi_field_values}
+    analyzer = ComplianceAnalyzer()
+    results: list[TransactionCompareInfo] = []
+    # Every set's view of the store, built in one pass rather than one scan of the store per set
+    set_stores = field_store.subsets([(t.start_segment, t.end_segment) for t in transactions], ENVELOPE_SEGMENTS) \
+        if field_store is not None else [None] * len(transactions)
+
+    for transaction, set_store in zip(transactions, set_stores):
+        fields = envelope_fields + transaction.fields
+        values = dict(envelope_values)
+        values.update(transaction.field_values)
+        set_requirements = dict(requirements)
+        for f in fields:
+            set_requirements.setdefault(f, False)
+
+        # SE count and control number errors belong to the set they close
+        set_envelope_errors = [
+            e for e in envelope_errors or ()
+            if e.segment_id == "SE" and e.control_number == transaction.control_number
+            and transaction.start_segment <= e.position
+            and (transaction.end_segment is None or e.position <= transaction.end_segment)
+        ]
+        set_totals_errors = [e for e in totals_errors or () if transaction.start_segment <= e.position
+                             and (transaction.end_segment is None or e.position <= transaction.end_segment)]
+
+        detailed = compare_fields_detailed(fields, set_requirements, values, set_store, index)
+        analysis = analyzer.generate_comprehensive_summary(
+            comparison_result=detailed,
+            edi_fields=fields,
+            spec_requirements=set_requirements,
+            edi_field_values=values,
+            field_store=set_store,
+            envelope_errors=set_envelope_errors,
+            totals_errors=set_totals_errors
+        )
+        score = analysis["overall_compliance"]
+        # Built from trusted values; model_construct skips re-validating them
+        results.append(TransactionCompareInfo.model_construct(
+            index=transaction.index,
+            control_number=transaction.control_number,
+            group_control_number=transaction.group_control_number,
+            interchange_control_number=transaction.interchange_control_number,
+            start_segment=transaction.start_segment,
+            end_segment=transaction.end_segment,
+            is_valid=not (detailed.mandatory_missing or detailed.length_errors or detailed.type_errors
+                          or detailed.structure_errors or set_envelope_errors or set_totals_errors),
+            compliance_score=score["score"],
+            compliance_status=score["status"],
+            missing_mandatory=sorted(detailed.mandatory_missing),
+            length_errors=[str(err) for err in detailed.length_errors],
+            type_errors=[str(err) for err in detailed.type_errors],
+            structure_errors=[str(err) for err in detailed.structure_errors],
+            envelope_errors=[str(err) for err in set_envelope_errors],
+            totals_errors=[str(err) for err in set_totals_errors],
+            critical_issues=len(analysis["critical_issues"])
+        ))
+
+    valid = sum(1 for r in results if r.is_valid)
+    aggregate = {
+        "total": len(results),
+        "valid": valid,
+        "invalid": len(results) - valid,
+        "lowest_score": min((r.compliance_score for r in results), default=None),
+        "invalid_control_numbers": [r.control_number for r in results if not r.is_valid]
+    }
+    return results, aggregate
 
 
 @app.post("/api/compare", response_model=CompareResult)
 async def compare(req: CompareRequest):
     try:
+        # Resolve server-side handles, falling back to payloads posted by older clients
+        if req.edi_id:
+            edi_session = edi_sessions.get(req.edi_id)
+            if edi_session is None:
+                raise HTTPException(status_code=404, detail="Unknown or expired edi_id; please upload the EDI file again")
+            edi_fields = edi_session["fields"]
+            edi_field_values = edi_session["field_values"]
+            edi_transactions = edi_session["transactions"]
+            field_store = edi_session["field_store"]
+            envelope_errors = edi_session["envelope_errors"]
+            totals_errors = edi_session["totals_errors"]
+        elif req.edi_fields is not None:
+            edi_fields = req.edi_fields
+            edi_field_values = req.edi_field_values or {}
+            edi_transactions = req.edi_transactions
+            field_store = FieldStore.from_dict(req.edi_field_store) if req.edi_field_store else None
+            envelope_errors = [EnvelopeError(**e) for e in req.edi_envelope_errors or ()]
+            totals_errors = [TotalsError(**e) for e in req.edi_totals_errors or ()]
+        else:
+            raise HTTPException(status_code=400, detail="Provide edi_id or edi_fields")
+
+        profile = spec_registry.get(req.profile_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail=f"Unknown profile_id: {req.profile_id}")
+        index = profile.index
+
+        if req.spec_id:
+            spec = spec_cache.get(req.spec_id)
+            if spec is None:
+                raise HTTPException(status_code=404, detail="Unknown or expired spec_id; please upload the specification again")
+            spec_requirements, spec_status_map = spec.requirements, spec.status_map
+            if not req.profile_id and spec.definitions:
+                # Lengths and types from the document's own element tables
+                index = spec.profile().index
+        elif req.spec_requirements is not None:
+            spec_requirements, spec_status_map = req.spec_requirements, req.spec_status_map
+        elif req.profile_id:
+            # The partner profile alone is the specification
+            spec_requirements, spec_status_map = profile_requirements(index)
+        else:
+            raise HTTPException(status_code=400, detail="Provide spec_id, spec_requirements or profile_id")
+
         # Merge spec requirements with all fields present in EDI so they are shown in summary
-        merged_requirements: Dict[str, bool] = dict(req.spec_requirements or {})
-        for f in req.edi_fields:
+        merged_requirements: Dict[str, bool] = dict(spec_requirements or {})
+        for f in edi_fields:
             if f not in merged_requirements:
                 merged_requirements[f] = False  # treat as optional if not defined in spec
 
         # Perform detailed comparison with field length validation
-        detailed_result = compare_fields_detailed(
-            req.edi_fields, 
+        detailed_result = await run_offloaded(
+            compare_fields_detailed,
+            edi_fields, 
             merged_requirements, 
-            req.edi_field_values
+            edi_field_values,
+            field_store,
+            index
         )
         
         # Legacy comparison for backward compatibility
-        missing, additional = compare_fields(req.edi_fields, merged_requirements)
+        missing, additional = compare_fields(edi_fields, merged_requirements)
         
         # Check if it's a valid 810 (ST01 should be present and contain 810)
-        is_810 = "ST01" in req.edi_fields
+        is_810 = "ST01" in edi_fields
         
         mandatory_fields = sorted([k for k, v in merged_requirements.items() if v])
         optional_fields = sorted([k for k, v in merged_requirements.items() if not v])
         
         # Convert detailed result to FieldInfo objects and decorate usage with status (M/O/X)
-        status_map = req.spec_status_map or {}
+        status_map = spec_status_map or {}
         def decorate_usage(field_code: str, base_usage: str, present: bool) -> str:
             letter = (status_map.get(field_code) or '').upper()
             if letter == 'M':
@@ -168,27 +553,43 @@ async def compare(req: CompareRequest):
                 prefix = ''
             return f"{prefix} — {base_usage}" if prefix else base_usage
 
+        # Rows already have the FieldInfo shape; they are serialized as-is
         detailed_fields_list = []
-        for field_data in detailed_result.get_all_fields_with_status():
-            code = field_data.get("field_name")
-            new_data = dict(field_data)
-            new_data["usage"] = decorate_usage(code, field_data.get("usage", ""), bool(field_data.get("present_in_edi")))
-            detailed_fields_list.append(FieldInfo(**new_data))
+        for field_data in detailed_result.iter_fields_with_status():
+            field_data["usage"] = decorate_usage(field_data["field_name"], field_data["usage"], field_data["present_in_edi"])
+            detailed_fields_list.append(field_data)
         
         # Generate segment summary
-        segment_data = get_segment_summary(req.edi_fields, merged_requirements)
-        segment_summary = [SegmentInfo(**seg_data) for seg_data in segment_data]
+        segment_counts = usage_counts = None
+        if field_store is not None:
+            segment_counts, usage_counts = field_store.segment_counts, field_store.usage_counts
+        transaction_counts = [t.segment_counts for t in edi_transactions or () if t.segment_counts]
+        segment_data = get_segment_summary(edi_fields, merged_requirements, index, segment_counts, transaction_counts,
+                                           usage_counts)
+        segment_summary = segment_data
         
         # AI compliance analysis and executive summary
         analyzer = ComplianceAnalyzer()
         analysis = analyzer.generate_comprehensive_summary(
             comparison_result=detailed_result,
-            edi_fields=req.edi_fields,
+            edi_fields=edi_fields,
             spec_requirements=merged_requirements,
-            edi_field_values=req.edi_field_values or {}
+            edi_field_values=edi_field_values,
+            field_store=field_store,
+            envelope_errors=envelope_errors,
+            totals_errors=totals_errors
         )
         exec_summary = generate_executive_summary(analysis)
 
+        # Validate every transaction set on its own when the interchange carries several
+        transaction_results = None
+        if edi_transactions:
+            transaction_results, transaction_summary = await run_offloaded(
+                compare_transactions, edi_transactions, merged_requirements, edi_fields, edi_field_values, field_store,
+                index, envelope_errors, totals_errors
+            )
+            analysis["transactions"] = transaction_summary
+
         # Extract key fields grouped by segment for summary panel
         def extract_key_fields(values: Dict[str, str]) -> Dict[str, Dict[str, str]]:
             keys_by_segment: Dict[str, list[str]] = {
@@ -222,11 +623,11 @@ async def compare(req: CompareRequest):
                     grouped[seg] = seg_map
             return grouped
 
-        key_fields = extract_key_fields(req.edi_field_values or {})
+        key_fields = extract_key_fields(edi_field_values)
 
         # Build list of EDI-present fields and their spec status (M/O/X)
         edi_present_status: list[Dict[str, str]] = []
-        for code in sorted(set(req.edi_fields)):
+        for code in sorted(set(edi_fields)):
             letter = (status_map.get(code) or ("M" if merged_requirements.get(code) else "O")).upper()
             if letter == 'M':
                 label = 'Must Use'
@@ -240,25 +641,118 @@ async def compare(req: CompareRequest):
                 "status_label": label
             })
 
-        return CompareResult(
-            is_810=is_810,
-            message="Comparison complete",
-            missing_mandatory=missing,
-            additional_fields=additional,
-            present_fields=sorted(req.edi_fields),
-            mandatory_fields=mandatory_fields,
-            optional_fields=optional_fields,
-            detailed_fields=detailed_fields_list,
-            segment_summary=segment_summary,
-            executive_summary=exec_summary,
-            analysis=analysis,
-            key_fields=key_fields,
-            edi_present_status=edi_present_status
-        )
+        # Same shape as CompareResult (which documents the response), encoded without re-validation
+        return FastJSONResponse({
+            "is_810": is_810,
+            "message": "Comparison complete",
+            "missing_mandatory": missing,
+            "additional_fields": additional,
+            "present_fields": sorted(edi_fields),
+            "mandatory_fields": mandatory_fields,
+            "optional_fields": optional_fields,
+            "detailed_fields": detailed_fields_list,
+            "segment_summary": segment_summary,
+            "executive_summary": exec_summary,
+            "analysis": analysis,
+            "key_fields": key_fields,
+            "edi_present_status": edi_present_status,
+            "transaction_results": transaction_results,
+            "structure_errors": [str(err) for err in detailed_result.structure_errors],
+            "envelope_errors": [str(err) for err in envelope_errors],
+            "totals_errors": [str(err) for err in totals_errors]
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during comparison: {str(e)}")
 
 
+async def _stream_batch_results(documents, requirements: Dict[str, bool], status_map: Dict[str, str],
+                                profile_id: str | None = None):
+    """Fan documents out over the parser executor and yield one NDJSON line per file as it finishes."""
+    # Keep only a bounded window in flight so results stream instead of piling up
+    window = 2 * parser_executor.workers
+    pending: Dict[asyncio.Future, tuple[int, str]] = {}
+    documents = iter(enumerate(documents))
+    totals = {"files": 0, "valid_810": 0, "errors": 0}
+
+    def submit_next() -> bool:
+        item = next(documents, None)
+        if item is None:
+            return False
+        index, (filename, data, error) = item
+        if error is not None:
+            # Unreadable archive: report it in order like any other file, without a worker
+            future = asyncio.get_running_loop().create_future()
+            future.set_result({"filename": filename, "is_810": False, "error": error})
+        else:
+            future = asyncio.ensure_future(
+                parser_executor.run(validate_edi_file, filename, data, requirements, status_map, profile_id)
+            )
+        pending[future] = (index, filename)
+        return True
+
+    while len(pending) < window and submit_next():
+        pass
+    while pending:
+        done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            index, filename = pending.pop(future)
+            try:
+                result = future.result()
+            except ExecutorSaturated as e:
+                result = {"filename": filename, "is_810": False, "error": str(e)}
+            except Exception as e:
+                # e.g. BrokenProcessPool: one line for this file, the rest of the batch goes on
+                result = {"filename": filename, "is_810": False, "error": f"Error processing EDI file: {str(e)}"}
+            totals["files"] += 1
+            if result.get("is_810"):
+                totals["valid_810"] += 1
+            if result.get("error"):
+                totals["errors"] += 1
+            yield json.dumps({"index": index, **result}) + "\n"
+            submit_next()
+    yield json.dumps({"summary": totals}) + "\n"
+
+
+@app.post("/api/validate/batch")
+async def validate_batch(spec: UploadFile | None = File(None), files: list[UploadFile] = File(...),
+                         profile_id: str | None = Form(None)):
+    """Validate many EDI files (or zip archives of them) against one spec.
+
+    The spec is parsed once; without one, ``profile_id`` alone is the
+    specification. EDI files are validated in a process pool and results
+    stream back as NDJSON, one line per file in completion order, followed
+    by a summary line.
+    """
+    try:
+        profile = spec_registry.get(profile_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail=f"Unknown profile_id: {profile_id}")
+        if spec is not None:
+            spec_bytes = await spec.read()
+            if not spec_bytes:
+                raise HTTPException(status_code=400, detail="Empty specification file")
+            _spec_id, parsed_spec, _hit = await load_spec(spec_bytes, spec.filename or "")
+            requirements, status_map = parsed_spec.requirements, parsed_spec.status_map
+        elif profile_id:
+            requirements, status_map = profile_requirements(profile.index)
+        else:
+            raise HTTPException(status_code=400, detail="Provide a specification file or a profile_id")
+
+        # Uploads stay open until the response is sent, so each is read only when its turn comes
+        documents = expand_batch_files((f.filename or f"file_{i}", f.file) for i, f in enumerate(files))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error preparing batch: {str(e)}")
+
+    return StreamingResponse(
+        _stream_batch_results(documents, requirements, status_map, profile_id),
+        media_type="application/x-ndjson"
+    )
+
+
 @app.get("/")
 def root_index():
     return FileResponse(str(FRONTEND_DIR / "index.html"))
@@ -1,6 +1,10 @@
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 from .compare import FieldComparisonResult, FieldLengthError
 from .spec_parser import EDI_810_FIELDS
+from .element_types import TYPE_CHECKERS
+from .envelope import EnvelopeError
+from .field_store import FieldStore
+from .invoice_totals import TotalsError
 import re
 
 
@@ -56,6 +60,9 @@ class ComplianceAnalyzer:
             "IEA02": "Interchange Control Number"
         }
         
+        # Date fields checked by the business rules, with their expected format
+        self.date_fields = ["BIG01", "GS04", "ISA09"]
+        
         self.business_rules = {
             "invoice_integrity": ["ST01", "ST02", "BIG01", "BIG02", "TDS01", "SE01", "SE02"],
             "party_identification": ["N101", "N102", "N301", "N401", "N402", "N403"],
@@ -70,12 +77,16 @@ class ComplianceAnalyzer:
                                      comparison_result: FieldComparisonResult,
                                      edi_fields: List[str],
                                      spec_requirements: Dict[str, bool],
-                                     edi_field_values: Dict[str, str] = None) -> Dict[str, Any]:
+                                     edi_field_values: Dict[str, str] = None,
+                                     field_store: Optional[FieldStore] = None,
+                                     envelope_errors: Optional[List[EnvelopeError]] = None,
+                                     totals_errors: Optional[List[TotalsError]] = None) -> Dict[str, Any]:
         """Generate a comprehensive AI-powered summary of document comparison."""
         
         summary = {
             "overall_compliance": self._calculate_compliance_score(comparison_result, spec_requirements),
-            "critical_issues": self._identify_critical_issues(comparison_result, edi_field_values),
+            "critical_issues": self._identify_critical_issues(comparison_result, edi_field_values, field_store,
+                                                              envelope_errors, totals_errors),
             "business_impact": self._assess_business_impact(comparison_result),
             "recommendations": self._generate_recommendations(comparison_result, edi_field_values),
             "field_analysis": self._analyze_field_patterns(edi_fields, edi_field_values),
@@ -109,10 +120,23 @@ class ComplianceAnalyzer:
             "length_errors": len(result.length_errors)
         }
     
-    def _identify_critical_issues(self, result: FieldComparisonResult, field_values: Dict[str, str] = None) -> List[Dict[str, str]]:
+    def _identify_critical_issues(self, result: FieldComparisonResult, field_values: Dict[str, str] = None,
+                                  field_store: Optional[FieldStore] = None,
+                                  envelope_errors: Optional[List[EnvelopeError]] = None,
+                                  totals_errors: Optional[List[TotalsError]] = None) -> List[Dict[str, str]]:
         """Identify critical compliance issues that need immediate attention."""
         issues = []
         
+        # Envelope counts and control numbers; translators reject the whole envelope on these
+        for error in envelope_errors or ():
+            issues.append({
+                "type": f"ENVELOPE_{error.code}",
+                "field": error.segment_id,
+                "description": f"Envelope error: {error}",
+                "severity": "CRITICAL",
+                "impact": "Envelope will be rejected by the trading partner's translator"
+            })
+        
         # Check for missing critical fields
         for field in result.mandatory_missing:
             if field in self.critical_fields:
@@ -167,35 +191,87 @@ class ComplianceAnalyzer:
                     "impact": "May affect document validation"
                 })
         
+        # Type errors in key fields; dates are reported by the business rules below
+        for error in result.type_errors:
+            if error.expected_type == "DT" and error.field_id in self.date_fields:
+                continue
+            if error.field_id in self.critical_fields:
+                severity, impact = "CRITICAL", "Will likely cause processing errors"
+            elif error.field_id in self.important_fields:
+                severity, impact = "HIGH", "May cause processing issues"
+            elif error.field_id in self.control_fields:
+                severity, impact = "MEDIUM", "May affect document validation"
+            else:
+                continue
+            issues.append({
+                "type": "INVALID_DATA_TYPE",
+                "field": error.field_id,
+                "description": f"Data type error: {error}",
+                "severity": severity,
+                "impact": impact
+            })
+        
+        # Invoice arithmetic: totals that do not add up are disputed or short-paid
+        for error in totals_errors or ():
+            issues.append({
+                "type": error.code,
+                "field": error.segment_id,
+                "description": f"Invoice arithmetic error: {error}",
+                "severity": "CRITICAL" if error.segment_id in ("TDS", "CTT") else "HIGH",
+                "impact": "Invoice totals will not reconcile with the trading partner's records"
+            })
+        
+        # Segments that break the transaction-set structure
+        for error in result.structure_errors:
+            issues.append({
+                "type": error.code,
+                "field": error.segment_id,
+                "description": f"Structure error: {error}",
+                "severity": "HIGH",
+                "impact": "Trading partner translators may reject the transaction set"
+            })
+        
         # Check for business rule violations
         if field_values:
-            issues.extend(self._check_business_rules(field_values))
+            issues.extend(self._check_business_rules(field_values, field_store))
         
         return issues
     
-    def _check_business_rules(self, field_values: Dict[str, str]) -> List[Dict[str, str]]:
-        """Check for business rule violations."""
+    def _check_business_rules(self, field_values: Dict[str, str], field_store: Optional[FieldStore] = None) -> List[Dict[str, str]]:
+        """Check for business rule violations.
+
+        With a field store every occurrence is checked (one per transaction
+        set, interchange or line), otherwise only the last value of each field.
+        """
         issues = []
+
+        def occurrences(field: str):
+            if field_store is not None:
+                return field_store.values(field)
+            return [(None, field_values[field])] if field in field_values else []
+
+        def where(field: str, occurrence) -> str:
+            return field if occurrence is None else f"{field} (occurrence {occurrence + 1})"
         
         # Check if ST01 is 810
-        if "ST01" in field_values and field_values["ST01"] != "810":
-            issues.append({
-                "type": "INVALID_TRANSACTION_TYPE",
-                "field": "ST01",
-                "description": f"Invalid transaction type: {field_values['ST01']}. Must be 810 for invoices.",
-                "severity": "CRITICAL",
-                "impact": "Document will be rejected"
-            })
+        for occurrence, value in occurrences("ST01"):
+            if value != "810":
+                issues.append({
+                    "type": "INVALID_TRANSACTION_TYPE",
+                    "field": "ST01",
+                    "description": f"Invalid transaction type in {where('ST01', occurrence)}: {value}. Must be 810 for invoices.",
+                    "severity": "CRITICAL",
+                    "impact": "Document will be rejected"
+                })
         
         # Check date formats
-        date_fields = ["BIG01", "GS04", "ISA09"]
-        for field in date_fields:
-            if field in field_values:
-                if not self._validate_date_format(field_values[field], field):
+        for field in self.date_fields:
+            for occurrence, value in occurrences(field):
+                if not self._validate_date_format(value, field):
                     issues.append({
                         "type": "INVALID_DATE_FORMAT",
                         "field": field,
-                        "description": f"Invalid date format in {field}: {field_values[field]}",
+                        "description": f"Invalid date format in {where(field, occurrence)}: {value}",
                         "severity": "MEDIUM",
                         "impact": "May cause processing delays"
                     })
@@ -205,9 +281,9 @@ class ComplianceAnalyzer:
     def _validate_date_format(self, date_value: str, field_type: str) -> bool:
         """Validate date formats based on field type."""
         if field_type in ["BIG01", "GS04"]:  # CCYYMMDD format
-            return bool(re.match(r'^\d{8}$', date_value))
+            return len(date_value) == 8 and TYPE_CHECKERS["DT"](date_value)
         elif field_type == "ISA09":  # YYMMDD format
-            return bool(re.match(r'^\d{6}$', date_value))
+            return len(date_value) == 6 and TYPE_CHECKERS["DT"](date_value)
         return True
     
     def _assess_business_impact(self, result: FieldComparisonResult) -> Dict[str, Any]:
@@ -276,6 +352,26 @@ class ComplianceAnalyzer:
                 "action": "Review field specifications and adjust data to meet length requirements"
             })
         
+        # Recommendations for data type errors
+        if result.type_errors:
+            recommendations.append({
+                "priority": "MEDIUM",
+                "category": "DATA_VALIDATION",
+                "title": "Fix Field Data Types",
+                "description": f"Correct data type violations in {len(result.type_errors)} fields",
+                "action": "Check numeric, date, time and code values against the element types in the specification"
+            })
+        
+        # Recommendations for structure errors
+        if result.structure_errors:
+            recommendations.append({
+                "priority": "HIGH",
+                "category": "STRUCTURE",
+                "title": "Fix Segment Order and Loops",
+                "description": f"Correct {len(result.structure_errors)} segment order or loop nesting errors",
+                "action": "Emit segments in 810 order and start each N1, IT1, SLN, SAC or ISS loop with its header segment"
+            })
+        
         # Recommendations for optimization
         if len(result.optional_present) < 5:
             recommendations.append({
@@ -352,7 +448,8 @@ class ComplianceAnalyzer:
                 "present": len(result.optional_present),
                 "missing": len(result.optional_missing)
             },
-            "validation_errors": len(result.length_errors),
+            "validation_errors": len(result.length_errors) + len(result.type_errors),
+            "structure_errors": len(result.structure_errors),
             "additional_fields": len(result.additional_fields)
         }
     
@@ -362,7 +459,7 @@ class ComplianceAnalyzer:
             "fully_compliant": result.mandatory_present,
             "non_compliant": result.mandatory_missing,
             "enhanced_data": result.optional_present,
-            "validation_issues": [error.field_id for error in result.length_errors],
+            "validation_issues": [error.field_id for error in result.length_errors + result.type_errors],
             "additional_data": result.additional_fields
         }
 
@@ -0,0 +1,126 @@
+from typing import IO, Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+import io
+import os
+import zipfile
+import zlib
+
+from .edi_parser import parse_edi_document
+from .compare import compare_fields_detailed
+from .ai_summary import ComplianceAnalyzer
+from .spec_registry import spec_registry
+
+
+# Raised for archives (or members) that are not valid zip data, encrypted or use an unsupported method
+_ARCHIVE_ERRORS = (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError)
+# Uncompressed size limits for one zip member and for all members of one archive
+MAX_MEMBER_BYTES = int(os.environ.get("EDI_BATCH_MAX_MEMBER_BYTES", str(64 * 1024 * 1024)))
+MAX_ARCHIVE_BYTES = int(os.environ.get("EDI_BATCH_MAX_ARCHIVE_BYTES", str(512 * 1024 * 1024)))
+
+# An uploaded file's content, or the (seekable) file itself so it is only read when its turn comes
+BatchSource = Union[bytes, IO[bytes]]
+
+
+def expand_batch_files(files: Iterable[Tuple[str, BatchSource]], max_member_bytes: int = MAX_MEMBER_BYTES,
+                       max_archive_bytes: int = MAX_ARCHIVE_BYTES) -> Iterator[Tuple[str, bytes, Optional[str]]]:
+    """Yield (filename, bytes, error) per EDI document, unpacking zip archives in place.
+
+    Files and archives are read lazily while results stream, and archives
+    straight from their file, so only the document being handed out is in
+    memory. One that cannot be read does not fail the batch: an unreadable
+    archive, or each member that cannot be extracted or is over the size
+    limits, yields an entry with empty bytes and the error message.
+    """
+    for filename, source in files:
+        stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+        is_zip = stream.read(4) == b'PK\x03\x04' or filename.lower().endswith('.zip')
+        stream.seek(0)
+        if is_zip:
+            yield from _expand_archive(filename, stream, max_member_bytes, max_archive_bytes)
+        else:
+            yield filename, source if isinstance(source, bytes) else stream.read(), None
+
+
+def _expand_archive(filename: str, stream: IO[bytes], max_member_bytes: int,
+                    max_archive_bytes: int) -> Iterator[Tuple[str, bytes, Optional[str]]]:
+    try:
+        archive = zipfile.ZipFile(stream)
+    except _ARCHIVE_ERRORS as e:
+        yield filename, b"", f"Cannot read zip archive: {e}"
+        return
+    expanded = 0
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            name = f"{filename}/{info.filename}"
+            # zipfile never returns more than the declared size (and fails the CRC check
+            # if the data disagrees), so checking it bounds what a read can inflate to
+            if info.file_size > max_member_bytes:
+                yield name, b"", (f"Cannot extract from zip archive: {info.file_size} bytes uncompressed, "
+                                  f"over the {max_member_bytes} byte limit per file")
+                continue
+            if expanded + info.file_size > max_archive_bytes:
+                yield name, b"", (f"Cannot extract from zip archive: the archive expands beyond "
+                                  f"the {max_archive_bytes} byte limit")
+                continue
+            try:
+                member = archive.read(info)
+            except _ARCHIVE_ERRORS as e:
+                yield name, b"", f"Cannot extract from zip archive: {e}"
+                continue
+            expanded += len(member)
+            yield name, member, None
+
+
+def validate_edi_file(filename: str, edi_bytes: bytes, requirements: Dict[str, bool],
+                      status_map: Dict[str, str], profile_id: Optional[str] = None) -> Dict[str, Any]:
+    """Parse and validate one EDI file against an already parsed spec.
+
+    Module level and free of shared state so it can run in a worker process.
+    The partner profile is passed by ID and resolved from the registry of
+    whichever process runs the call. Returns a compact, JSON-serializable
+    per-file result.
+    """
+    try:
+        profile = spec_registry.get(profile_id)
+        if profile is None:
+            return {"filename": filename, "is_810": False, "error": f"Unknown profile_id: {profile_id}"}
+        parsed = parse_edi_document(io.BytesIO(edi_bytes), build_xml=False)
+        _xml, fields, is_810, field_values = parsed.finish()
+        if not is_810:
+            return {"filename": filename, "is_810": False, "error": parsed.validation_error()}
+
+        merged_requirements = dict(requirements)
+        for f in fields:
+            merged_requirements.setdefault(f, False)  # treat as optional if not defined in spec
+
+        detailed = compare_fields_detailed(fields, merged_requirements, field_values, parsed.store, profile.index)
+        analysis = ComplianceAnalyzer().generate_comprehensive_summary(
+            comparison_result=detailed,
+            edi_fields=sorted(fields),
+            spec_requirements=merged_requirements,
+            edi_field_values=field_values,
+            field_store=parsed.store,
+            envelope_errors=parsed.envelope_errors,
+            totals_errors=parsed.totals_errors
+        )
+        compliance = analysis["overall_compliance"]
+        return {
+            "filename": filename,
+            "is_810": True,
+            "transactions": len(parsed.transactions),
+            "segments": parsed.segment_count,
+            "compliance_score": compliance["score"],
+            "compliance_status": compliance["status"],
+            "missing_mandatory": sorted(detailed.mandatory_missing),
+            "conditional_present": sorted(f for f in fields if (status_map.get(f) or '').upper() == 'X'),
+            "length_errors": [str(err) for err in detailed.length_errors],
+            "type_errors": [str(err) for err in detailed.type_errors],
+            "structure_errors": [str(err) for err in detailed.structure_errors],
+            "envelope_errors": [str(err) for err in parsed.envelope_errors],
+            "totals_errors": [str(err) for err in parsed.totals_errors],
+            "critical_issues": analysis["critical_issues"],
+            "risk_level": analysis["business_impact"]["risk_level"]
+        }
+    except Exception as e:
+        return {"filename": filename, "is_810": False, "error": f"Error processing EDI file: {str(e)}"}
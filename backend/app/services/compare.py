@@ -1,198 +1,298 @@
-from typing import Dict, Iterable, List, Tuple
-from .spec_parser import EDI_810_FIELDS
+from bisect import bisect_right
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from .element_types import describe_type, invalid_positions
+from .field_store import FieldStore
+from .spec_index import DEFAULT_SPEC_INDEX, ENVELOPE_SEGMENTS, FieldRule, SpecIndex, present_segments
+from .structure import StructureError, segment_sequence, validate_structure
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python path gives the same results
+    np = None
+
+# Below this many values the NumPy round trip costs more than it saves
+_NUMPY_MIN_BATCH = 256
 
 
 class FieldLengthError:
-    def __init__(self, field_id: str, actual_length: int, expected_min: int, expected_max: int, actual_value: str = ""):
+    def __init__(self, field_id: str, actual_length: int, expected_min: int, expected_max: int, actual_value: str = "",
+                 occurrence: Optional[int] = None):
         self.field_id = field_id
         self.actual_length = actual_length
         self.expected_min = expected_min
         self.expected_max = expected_max
         self.actual_value = actual_value
+        self.occurrence = occurrence  # Segment occurrence (0-based) when validated from a FieldStore
         
     def __str__(self):
-        return f"{self.field_id}: Length {self.actual_length}, Expected {self.expected_min}-{self.expected_max}"
+        # Only repeated occurrences are qualified; the first reads as the plain field
+        location = f" (occurrence {self.occurrence + 1})" if self.occurrence else ""
+        return f"{self.field_id}{location}: Length {self.actual_length}, Expected {self.expected_min}-{self.expected_max}"
+
+
+class FieldTypeError:
+    def __init__(self, field_id: str, expected_type: str, actual_value: str = "", occurrence: Optional[int] = None,
+                 codes: Optional[Iterable[str]] = None):
+        self.field_id = field_id
+        self.expected_type = expected_type
+        self.actual_value = actual_value
+        self.occurrence = occurrence
+        self.codes = sorted(codes) if codes else None  # Allowed values when the element has a code list
+
+    def __str__(self):
+        location = f" (occurrence {self.occurrence + 1})" if self.occurrence else ""
+        if self.codes:
+            return f"{self.field_id}{location}: Invalid code '{self.actual_value}', Expected one of {', '.join(self.codes)}"
+        return (f"{self.field_id}{location}: Invalid {describe_type(self.expected_type)} '{self.actual_value}', "
+                f"Expected type {self.expected_type}")
+
+
+def _first_error_per_field(errors: list) -> Dict[str, object]:
+    index: Dict[str, object] = {}
+    for err in errors:
+        index.setdefault(err.field_id, err)
+    return index
 
 
 class FieldComparisonResult:
+    __slots__ = ("mandatory_present", "mandatory_missing", "optional_present", "optional_missing",
+                 "additional_fields", "index", "_length_errors", "_length_error_index", "_type_errors",
+                 "_type_error_index", "structure_errors", "_sorted")
+
     def __init__(self):
         self.mandatory_present: List[str] = []      # Green - Mandatory fields present
         self.mandatory_missing: List[str] = []      # Red - Mandatory fields missing
         self.optional_present: List[str] = []       # Yellow - Optional fields present
         self.optional_missing: List[str] = []       # White - Optional fields missing
         self.additional_fields: List[str] = []      # Fields in EDI but not in spec
-        self.length_errors: List[FieldLengthError] = []  # Field length validation errors
-        
-    def get_all_fields_with_status(self) -> List[Dict[str, str]]:
-        """Return all fields with their status and color coding."""
-        fields = []
-        
+        self.index: SpecIndex = DEFAULT_SPEC_INDEX   # Spec the fields are described from
+        self.length_errors = []                      # Field length validation errors
+        self.type_errors = []                        # Field data type validation errors
+        self.structure_errors: List[StructureError] = []  # Segment order and loop nesting errors
+        self._sorted = False
+
+    @property
+    def length_errors(self) -> List[FieldLengthError]:
+        return self._length_errors
+
+    @length_errors.setter
+    def length_errors(self, errors: List[FieldLengthError]) -> None:
+        self._length_errors = errors
+        # First error per field, so row lookups are O(1) instead of a scan per field
+        self._length_error_index = _first_error_per_field(errors)
+
+    @property
+    def type_errors(self) -> List[FieldTypeError]:
+        return self._type_errors
+
+    @type_errors.setter
+    def type_errors(self, errors: List[FieldTypeError]) -> None:
+        self._type_errors = errors
+        self._type_error_index = _first_error_per_field(errors)
+
+    def length_error_for(self, field: str) -> Optional[FieldLengthError]:
+        return self._length_error_index.get(field)
+
+    def type_error_for(self, field: str) -> Optional[FieldTypeError]:
+        return self._type_error_index.get(field)
+
+    def sort(self) -> None:
+        """Sort the category lists in place; done once, before rows are produced."""
+        self.mandatory_present.sort()
+        self.mandatory_missing.sort()
+        self.optional_present.sort()
+        self.optional_missing.sort()
+        self._sorted = True
+
+    def _row(self, field: str, status: str, default_cardinality: str, present: bool, color: str) -> Dict[str, object]:
+        rule = self.index.get(field)
+        length_error = self._length_error_index.get(field) if present else None
+        type_error = self._type_error_index.get(field) if present else None
+        if rule is None:
+            name, usage, cardinality, type_, length = "Unknown Field", "Unknown usage", default_cardinality, "AN", "1/1"
+        else:
+            name, usage = rule.name, rule.usage
+            cardinality = rule.cardinality or default_cardinality
+            type_, length = rule.type or "AN", rule.length or "1/1"
+        return {
+            "field_name": field,
+            "name": name,
+            "status": status,
+            "usage": usage,
+            "cardinality": cardinality,
+            "type": type_,
+            "length": length,
+            "color": "red" if length_error is not None or type_error is not None else color,  # Red if invalid
+            "present_in_edi": present,
+            "length_error": str(length_error) if length_error is not None else "",
+            "type_error": str(type_error) if type_error is not None else ""
+        }
+
+    def iter_fields_with_status(self) -> Iterator[Dict[str, object]]:
+        """Yield one row per field with its status and color coding.
+
+        Rows are produced lazily and each dict is fresh, so callers may
+        decorate it in place before serializing.
+        """
+        if not self._sorted:
+            self.sort()
+        row = self._row
         # Green: Mandatory fields present in EDI
-        for field in sorted(self.mandatory_present):
-            field_info = EDI_810_FIELDS.get(field, {
-                "name": "Unknown Field", 
-                "usage": "Unknown usage",
-                "cardinality": "1/1",
-                "type": "AN",
-                "length": "1/1"
-            })
-            
-            # Check for length errors
-            length_error = next((err for err in self.length_errors if err.field_id == field), None)
-            has_length_error = length_error is not None
-            
-            fields.append({
-                "field_name": field,
-                "name": field_info["name"],
-                "status": "Mandatory",
-                "usage": field_info["usage"],
-                "cardinality": field_info.get("cardinality", "1/1"),
-                "type": field_info.get("type", "AN"),
-                "length": field_info.get("length", "1/1"),
-                "color": "red" if has_length_error else "green",  # Red if length error, green otherwise
-                "present_in_edi": True,
-                "length_error": str(length_error) if length_error else ""
-            })
-        
+        for field in self.mandatory_present:
+            yield row(field, "Mandatory", "1/1", True, "green")
         # Red: Mandatory fields missing from EDI
-        for field in sorted(self.mandatory_missing):
-            field_info = EDI_810_FIELDS.get(field, {
-                "name": "Unknown Field", 
-                "usage": "Unknown usage",
-                "cardinality": "1/1",
-                "type": "AN",
-                "length": "1/1"
-            })
-            fields.append({
-                "field_name": field,
-                "name": field_info["name"],
-                "status": "Mandatory",
-                "usage": field_info["usage"],
-                "cardinality": field_info.get("cardinality", "1/1"),
-                "type": field_info.get("type", "AN"),
-                "length": field_info.get("length", "1/1"),
-                "color": "red",
-                "present_in_edi": False,
-                "length_error": ""
-            })
-        
+        for field in self.mandatory_missing:
+            yield row(field, "Mandatory", "1/1", False, "red")
         # Yellow: Optional fields present in EDI
-        for field in sorted(self.optional_present):
-            field_info = EDI_810_FIELDS.get(field, {
-                "name": "Unknown Field", 
-                "usage": "Unknown usage",
-                "cardinality": "0/1",
-                "type": "AN",
-                "length": "1/1"
-            })
-            
-            # Check for length errors
-            length_error = next((err for err in self.length_errors if err.field_id == field), None)
-            has_length_error = length_error is not None
-            
-            fields.append({
-                "field_name": field,
-                "name": field_info["name"],
-                "status": "Optional",
-                "usage": field_info["usage"],
-                "cardinality": field_info.get("cardinality", "0/1"),
-                "type": field_info.get("type", "AN"),
-                "length": field_info.get("length", "1/1"),
-                "color": "red" if has_length_error else "yellow",  # Red if length error, yellow otherwise
-                "present_in_edi": True,
-                "length_error": str(length_error) if length_error else ""
-            })
-        
+        for field in self.optional_present:
+            yield row(field, "Optional", "0/1", True, "yellow")
         # White: Optional fields missing from EDI
-        for field in sorted(self.optional_missing):
-            field_info = EDI_810_FIELDS.get(field, {
-                "name": "Unknown Field", 
-                "usage": "Unknown usage",
-                "cardinality": "0/1",
-                "type": "AN",
-                "length": "1/1"
-            })
-            fields.append({
-                "field_name": field,
-                "name": field_info["name"],
-                "status": "Optional",
-                "usage": field_info["usage"],
-                "cardinality": field_info.get("cardinality", "0/1"),
-                "type": field_info.get("type", "AN"),
-                "length": field_info.get("length", "1/1"),
-                "color": "white",
-                "present_in_edi": False,
-                "length_error": ""
-            })
-            
-        return fields
-
-
-def validate_field_lengths(edi_field_values: Dict[str, str]) -> List[FieldLengthError]:
+        for field in self.optional_missing:
+            yield row(field, "Optional", "0/1", False, "white")
+
+    def get_all_fields_with_status(self) -> List[Dict[str, str]]:
+        """Return all fields with their status and color coding."""
+        return list(self.iter_fields_with_status())
+
+
+def _gather_field_values(edi_field_values: Dict[str, str], field_store: Optional[FieldStore],
+                         index: SpecIndex) -> List[Tuple[FieldRule, List[Optional[int]], List[str]]]:
+    """Collect (rule, occurrences, values) per spec field, reading each column once.
+
+    Values come from the FieldStore when given (every occurrence) or from
+    the flat dict (one value per field, occurrence None). Fields not in the
+    spec are skipped.
+    """
+    rules = index.fields
+    gathered = []
+    if field_store is None:
+        for field_id, value in edi_field_values.items():
+            rule = rules.get(field_id)
+            if rule is not None and value:
+                gathered.append((rule, [None], [value]))
+        return gathered
+    for field_id, column in field_store.columns.items():
+        rule = rules.get(field_id)
+        if rule is None:
+            continue
+        values = list(map(str.strip, column))
+        if all(values):
+            occurrences = range(len(values))
+        else:
+            # Shorter segments leave empty cells; they are absent, not zero-length
+            occurrences = [i for i, value in enumerate(values) if value]
+            values = [value for value in values if value]
+        if values:
+            gathered.append((rule, occurrences, values))
+    return gathered
+
+
+def _length_violations(lengths: List[int], min_length: int, max_length: int) -> List[int]:
+    """Positions in ``lengths`` outside [min_length, max_length], vectorized when NumPy is available."""
+    if np is not None and len(lengths) >= _NUMPY_MIN_BATCH:
+        arr = np.fromiter(lengths, dtype=np.int32, count=len(lengths))
+        return np.flatnonzero((arr < min_length) | (arr > max_length)).tolist()
+    return [i for i, n in enumerate(lengths) if n < min_length or n > max_length]
+
+
+def validate_field_values(edi_field_values: Dict[str, str], field_store: Optional[FieldStore] = None,
+                          index: SpecIndex = DEFAULT_SPEC_INDEX) -> Tuple[List[FieldLengthError], List[FieldTypeError]]:
     """
-    Validate field lengths against EDI 810 specifications - optimized.
+    Validate field lengths and data types against the spec in one batched pass.
+    
+    Every occurrence of every spec field is checked. Each column is read
+    once: its values are type-checked with the field's precompiled checker
+    and their lengths are added to the batch for the field's (min, max)
+    rule, which is then checked as one array.
     
     Args:
         edi_field_values: Dictionary mapping field IDs to their actual values
+        field_store: Optional columnar store; when given, every occurrence of
+            repeating segments is validated instead of only the last value
+        index: Precompiled spec providing the length bounds and type checkers
         
     Returns:
-        List of FieldLengthError objects for fields that don't meet length requirements
+        Tuple of (length errors, type errors), each in field then occurrence order
     """
-    length_errors = []
-    
-    # Limit validation to prevent performance issues
-    if len(edi_field_values) > 100:
-        # Only validate mandatory fields for large datasets
-        mandatory_fields = {k: v for k, v in edi_field_values.items() 
-                          if k in EDI_810_FIELDS and EDI_810_FIELDS[k]["status"] == "M"}
-        field_values_to_check = mandatory_fields
-    else:
-        field_values_to_check = edi_field_values
-    
-    for field_id, value in field_values_to_check.items():
-        if field_id not in EDI_810_FIELDS:
-            continue
-            
-        field_spec = EDI_810_FIELDS[field_id]
-        length_spec = field_spec.get("length", "1/1")
-        
-        # Parse length specification (e.g., "1/22" means min 1, max 22)
-        try:
-            min_length, max_length = map(int, length_spec.split('/'))
-            actual_length = len(value) if value else 0
-            
-            if actual_length < min_length or actual_length > max_length:
-                length_errors.append(FieldLengthError(
-                    field_id=field_id,
-                    actual_length=actual_length,
-                    expected_min=min_length,
-                    expected_max=max_length,
-                    actual_value=value[:50] if len(value) > 50 else value  # Truncate long values
+    # (min, max) -> lengths of every value under that rule, plus the columns they came from
+    groups: Dict[Tuple[int, int], Tuple[List[int], List[int], list]] = {}
+    type_errors = []
+    for order, (rule, occurrences, values) in enumerate(_gather_field_values(edi_field_values, field_store, index)):
+        if rule.check is not None:
+            for i in invalid_positions(rule.check, values):
+                value = values[i]
+                type_errors.append(FieldTypeError(
+                    field_id=rule.tag,
+                    expected_type=rule.type,
+                    actual_value=value[:50] if len(value) > 50 else value,
+                    occurrence=occurrences[i],
+                    codes=rule.codes
                 ))
-        except (ValueError, AttributeError):
+        if rule.min_length is None:
             continue
-    
-    return length_errors
+        lengths, offsets, columns = groups.setdefault((rule.min_length, rule.max_length), ([], [], []))
+        offsets.append(len(lengths))
+        columns.append((order, rule, occurrences, values))
+        lengths.extend(map(len, values))
+
+    violations = []
+    for (min_length, max_length), (lengths, offsets, columns) in groups.items():
+        for position in _length_violations(lengths, min_length, max_length):
+            # Map the group position back to its column and occurrence
+            column = bisect_right(offsets, position) - 1
+            order, rule, occurrences, values = columns[column]
+            i = position - offsets[column]
+            violations.append((order, occurrences[i] or 0, rule, occurrences[i], values[i], lengths[position]))
+    # Report in field order, then occurrence order, regardless of grouping
+    violations.sort(key=itemgetter(0, 1))
+
+    length_errors = []
+    for _order, _sort_key, rule, occurrence, value, actual_length in violations:
+        length_errors.append(FieldLengthError(
+            field_id=rule.tag,
+            actual_length=actual_length,
+            expected_min=rule.min_length,
+            expected_max=rule.max_length,
+            actual_value=value[:50] if len(value) > 50 else value,  # Truncate long values
+            occurrence=occurrence
+        ))
+    return length_errors, type_errors
+
 
+def validate_field_lengths(edi_field_values: Dict[str, str], field_store: Optional[FieldStore] = None,
+                           index: SpecIndex = DEFAULT_SPEC_INDEX) -> List[FieldLengthError]:
+    """Validate field lengths only; see validate_field_values."""
+    return validate_field_values(edi_field_values, field_store, index)[0]
 
-def compare_fields_detailed(present_fields: Iterable[str], requirements: Dict[str, bool], edi_field_values: Dict[str, str] = None) -> FieldComparisonResult:
+
+def compare_fields_detailed(present_fields: Iterable[str], requirements: Dict[str, bool], edi_field_values: Dict[str, str] = None,
+                            field_store: Optional[FieldStore] = None, index: SpecIndex = DEFAULT_SPEC_INDEX) -> FieldComparisonResult:
     """
     Perform detailed comparison between EDI fields and specification requirements.
     
     Args:
         present_fields: List of field IDs present in the EDI file
         requirements: Dictionary mapping field IDs to whether they're required
-        edi_field_values: Dictionary mapping field IDs to their actual values (for length validation)
+        edi_field_values: Dictionary mapping field IDs to their actual values (for length and type validation)
+        field_store: Optional columnar store with every occurrence of each field;
+            also enables segment order and loop structure validation
+        index: Precompiled spec used for lengths, types and field descriptions
     
     Returns:
         FieldComparisonResult with categorized fields and color coding
     """
     present = set(present_fields)
     result = FieldComparisonResult()
+    result.index = index
     
-    # Validate field lengths if values are provided
+    # Validate field lengths and types if values are provided
     if edi_field_values:
-        result.length_errors = validate_field_lengths(edi_field_values)
+        result.length_errors, result.type_errors = validate_field_values(edi_field_values, field_store, index)
+    
+    # Segment order and loop nesting need the segment sequence, which only the store keeps
+    if field_store is not None:
+        result.structure_errors = validate_structure(segment_sequence(field_store))
     
     # Categorize fields based on requirements and presence
     for field, is_required in requirements.items():
@@ -210,6 +310,7 @@ def compare_fields_detailed(present_fields: Iterable[str], requirements: Dict[st
     # Find additional fields in EDI that are not in requirements
     allowed_fields = set(requirements.keys())
     result.additional_fields = sorted(list(present - allowed_fields))
+    result.sort()
     
     return result
 
@@ -230,78 +331,72 @@ def compare_fields(present_fields: Iterable[str], requirements: Dict[str, bool])
     return missing_mandatory, additional_fields
 
 
-def get_mandatory_fields() -> List[str]:
+def get_mandatory_fields(index: SpecIndex = DEFAULT_SPEC_INDEX) -> List[str]:
     """Get list of all mandatory EDI 810 fields."""
-    return [field for field, info in EDI_810_FIELDS.items() if info["status"] == "M"]
+    return list(index.mandatory)
 
 
-def get_optional_fields() -> List[str]:
+def get_optional_fields(index: SpecIndex = DEFAULT_SPEC_INDEX) -> List[str]:
     """Get list of all optional EDI 810 fields."""
-    return [field for field, info in EDI_810_FIELDS.items() if info["status"] == "O"]
+    return list(index.optional)
 
 
-def get_segment_summary(present_fields: Iterable[str], requirements: Dict[str, bool]) -> List[Dict[str, str]]:
+def get_segment_summary(present_fields: Iterable[str], requirements: Dict[str, bool],
+                        index: SpecIndex = DEFAULT_SPEC_INDEX, segment_counts: Optional[Mapping[str, int]] = None,
+                        transaction_counts: Optional[Iterable[Mapping[str, int]]] = None,
+                        usage_counts: Optional[Mapping[str, int]] = None) -> List[Dict[str, object]]:
     """
     Generate segment-based summary in the format shown in EDI 855 validator.
     
+    With ``segment_counts`` (occurrences per segment ID, as counted by the
+    parser) each segment's min/max usage is enforced. Min usage applies per
+    transaction set, so ``transaction_counts`` gives the counts of each set;
+    without it the document counts are treated as a single set. Max usage
+    is checked against ``usage_counts`` (FieldStore.usage_counts, the most
+    occurrences within one loop iteration) when given, else against the
+    per-set counts. Envelope segments repeat once per interchange or group,
+    so only their presence is checked.
+    
     Returns:
         List of segment dictionaries with columns: segment_tag, x12_requirement, 
-        company_usage, min_usage, max_usage, present_in_edi, status
+        company_usage, min_usage, max_usage, present_in_edi, status,
+        occurrences and usage_error
     """
-    present = set(present_fields)
-    
-    # Define EDI 810 segments with their usage patterns
-    segments = {
-        "ISA": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
-        "GS": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"}, 
-        "ST": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
-        "BIG": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
-        "REF": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "12"},
-        "N1": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "1", "max_usage": "200"},
-        "N2": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "2"},
-        "N3": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "2"},
-        "N4": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1"},
-        "PER": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "3"},
-        "ITD": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "10"},
-        "DTM": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "10"},
-        "FOB": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1"},
-        "CUR": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1"},
-        "IT1": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "999999"},
-        "PID": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "200"},
-        "SAC": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "25"},
-        "TXI": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "10"},
-        "SLN": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1000"},
-        "TDS": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
-        "ISS": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1"},
-        "CTT": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1"},
-        "SE": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
-        "GE": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
-        "IEA": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"}
-    }
+    if segment_counts is None:
+        # Segment IDs of the present fields, computed once instead of per segment
+        present = present_segments(present_fields)
+        per_set: List[Mapping[str, int]] = []
+    else:
+        present = {seg for seg, count in segment_counts.items() if count}
+        per_set = list(transaction_counts or ()) or [segment_counts]
     
     segment_summary = []
     
-    for segment_tag, segment_info in segments.items():
-        # Check if any fields from this segment are present
-        segment_fields = [field for field in present if field.startswith(segment_tag)]
-        is_present = len(segment_fields) > 0
+    for segment_tag, segment in index.segments.items():
+        is_present = segment_tag in present
+        status = "✓ Present" if is_present else "✗ Missing"
+        usage_error = ""
+        if is_present and per_set and segment_tag not in ENVELOPE_SEGMENTS:
+            counts = [seg_counts.get(segment_tag, 0) for seg_counts in per_set]
+            fewest = min(counts)
+            most = usage_counts.get(segment_tag, 0) if usage_counts is not None else max(counts)
+            if most > segment.max_count:
+                usage_error = f"{segment_tag} used {most} times, Max {segment.max_count}"
+                status = "✗ Exceeds max usage"
+            elif fewest < segment.min_count:
+                usage_error = f"{segment_tag} used {fewest} times, Min {segment.min_count}"
+                status = "✗ Below min usage"
         
-        # Determine status
-        if segment_info["x12_requirement"] == "mandatory":
-            status = "✓ Present" if is_present else "✗ Missing" 
-        else:
-            status = "✓ Present" if is_present else "✗ Missing"
-            
         segment_summary.append({
             "segment_tag": segment_tag,
-            "x12_requirement": segment_info["x12_requirement"],
-            "company_usage": segment_info["company_usage"], 
-            "min_usage": segment_info["min_usage"],
-            "max_usage": segment_info["max_usage"],
+            "x12_requirement": segment.x12_requirement,
+            "company_usage": segment.company_usage, 
+            "min_usage": segment.min_usage,
+            "max_usage": segment.max_usage,
             "present_in_edi": "Yes" if is_present else "No",
-            "status": status
+            "status": status,
+            "occurrences": segment_counts.get(segment_tag, 0) if segment_counts is not None else None,
+            "usage_error": usage_error
         })
     
     return segment_summary
-
-
@@ -0,0 +1,91 @@
+from typing import IO, Iterator, List, Optional, Tuple, Union
+import io
+import zipfile
+from xml.etree.ElementTree import Element, iterparse
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY = _W + "body"
+_PARAGRAPH = _W + "p"
+_RUN = _W + "r"
+_TABLE = _W + "tbl"
+_ROW = _W + "tr"
+_CELL = _W + "tc"
+_TEXT = _W + "t"
+_TAB = _W + "tab"
+
+# A body paragraph's text, or one table row as a tuple of cell texts
+DocxBlock = Union[str, Tuple[str, ...]]
+
+
+def _paragraph_text(paragraph: Element) -> str:
+    # Only run content is text; w:tab also defines tab stops in the paragraph properties
+    parts: List[str] = []
+    for run in paragraph.iter(_RUN):
+        for node in run:
+            if node.tag == _TEXT:
+                parts.append(node.text or "")
+            elif node.tag == _TAB:
+                parts.append("\t")
+    return "".join(parts)
+
+
+def _cell_text(cell: Element) -> str:
+    """A cell's paragraphs joined by spaces (cells wrap long names over several lines)."""
+    return " ".join(text for text in (_paragraph_text(p).strip() for p in cell.iter(_PARAGRAPH)) if text)
+
+
+def _detach(parent: Optional[Element], element: Element) -> None:
+    """Drop a finished element from its parent.
+
+    The parser runs a chunk ahead of the events, so later siblings may
+    already be attached; earlier ones are gone, so the element sits at or
+    near the front and the search is short.
+    """
+    element.clear()
+    if parent is not None:
+        try:
+            parent.remove(element)
+        except ValueError:
+            pass  # Wrapped in another element (e.g. a content control); cleared is enough
+
+
+def iter_docx_xml_blocks(document_xml: IO[bytes]) -> Iterator[DocxBlock]:
+    """Stream ``word/document.xml``, yielding paragraphs and table rows in document order.
+
+    Each paragraph outside a table is yielded as its text; each table row
+    as a tuple of its cell texts, left to right. Rows are dropped from
+    their table, and every finished child of the body from the body, as
+    soon as they have been read, so memory stays flat however long the
+    document is. Rows of a table nested in a cell are yielded on their
+    own, before the row holding them.
+    """
+    body: Optional[Element] = None
+    body_depth = depth = 0
+    tables: List[Element] = []
+    for event, element in iterparse(document_xml, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            depth += 1
+            if tag == _TABLE:
+                tables.append(element)
+            elif tag == _BODY:
+                body, body_depth = element, depth
+            continue
+        depth -= 1
+        if tag == _ROW:
+            yield tuple(_cell_text(cell) for cell in element if cell.tag == _CELL)
+            _detach(tables[-1] if tables else None, element)
+        elif tag == _TABLE:
+            tables.pop()
+        elif tag == _PARAGRAPH and not tables:
+            yield _paragraph_text(element)
+        if depth == body_depth and body is not None:
+            _detach(body, element)
+
+
+def iter_docx_blocks(docx_bytes: bytes) -> Iterator[DocxBlock]:
+    """Paragraphs and table rows of a DOCX document; see iter_docx_xml_blocks."""
+    with zipfile.ZipFile(io.BytesIO(docx_bytes)) as docx_zip:
+        with docx_zip.open("word/document.xml") as document_xml:
+            yield from iter_docx_xml_blocks(document_xml)
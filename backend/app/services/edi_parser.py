@@ -1,4 +1,51 @@
-from typing import Tuple, Set, Dict
+from typing import Callable, Tuple, Set, Dict, List, Iterator, Optional, Union, IO
+import codecs
+import io
+import os
+
+from .envelope import EnvelopeError, EnvelopeTracker
+from .field_store import FieldStore
+from .invoice_totals import TotalsError, TotalsTracker
+from .xml_writer import XmlSegmentWriter
+
+
+# A source can be the full EDI text or bytes, or any file-like object opened
+# in text or binary mode; binary input is decoded incrementally.
+EdiSource = Union[str, bytes, IO]
+
+# ISA is fixed width: element separator at offset 3, segment terminator at 105
+ISA_LENGTH = 106
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Transaction sets, invoice totals and errors of each kind kept in full by StreamingEDIParser
+STREAM_DETAIL_LIMIT = int(os.environ.get("EDI_STREAM_DETAIL_LIMIT", "100"))
+
+SEGMENT_NAMES = {
+    'ISA': 'Interchange_Control_Header',
+    'GS': 'Functional_Group_Header',
+    'ST': 'Transaction_Set_Header',
+    'BIG': 'Invoice_Information',
+    'REF': 'Reference_Identification',
+    'N1': 'Name',
+    'N2': 'Additional_Name_Information',
+    'N3': 'Address_Information',
+    'N4': 'Geographic_Location',
+    'PER': 'Administrative_Contact',
+    'ITD': 'Terms_of_Sale',
+    'DTM': 'Date_Time_Reference',
+    'FOB': 'FOB_Information',
+    'CUR': 'Currency_Code',
+    'IT1': 'Line_Item',
+    'PID': 'Product_Description',
+    'SAC': 'Service_Allowance_Charge',
+    'TXI': 'Tax_Information',
+    'SLN': 'Sub_Line_Item',
+    'TDS': 'Total_Invoice_Amount',
+    'ISS': 'Invoice_Shipment_Summary',
+    'CTT': 'Transaction_Totals',
+    'SE': 'Transaction_Set_Trailer',
+    'GE': 'Functional_Group_Trailer',
+    'IEA': 'Interchange_Control_Trailer'
+}
 
 
 def _detect_separators(edi_text: str) -> Tuple[str, str]:
@@ -12,122 +59,429 @@ def _detect_separators(edi_text: str) -> Tuple[str, str]:
     return element, segment
 
 
-def validate_edi_810(edi_text: str) -> Tuple[bool, str]:
-    """Validate that the EDI file is a valid 810 invoice.
-    
-    Returns:
-        Tuple of (is_valid, error_message)
+class SegmentTokenizer:
+    """Incremental X12 tokenizer.
+
+    Text is pushed with feed() in chunks of any size and complete segments are
+    returned as element lists (segment ID first). Only the trailing partial
+    segment is buffered, so memory is bounded by the largest segment.
+    """
+
+    def __init__(self):
+        self.element_sep: Optional[str] = None
+        self.segment_sep: Optional[str] = None
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[List[str]]:
+        if not text:
+            return []
+        self._buffer += text
+        if self.segment_sep is None and not self._detect(final=False):
+            return []
+        return self._drain(final=False)
+
+    def close(self) -> List[List[str]]:
+        """Flush the final segment, which may lack a terminator."""
+        if self.segment_sep is None:
+            self._detect(final=True)
+        return self._drain(final=True)
+
+    def _detect(self, final: bool) -> bool:
+        # Separators come from the ISA header, so wait until it is complete
+        self._buffer = self._buffer.lstrip()
+        if not final and len(self._buffer) < ISA_LENGTH and 'ISA'.startswith(self._buffer[:3]):
+            return False
+        self.element_sep, self.segment_sep = _detect_separators(self._buffer)
+        return True
+
+    def _drain(self, final: bool) -> List[List[str]]:
+        raw_segments = self._buffer.split(self.segment_sep)
+        self._buffer = "" if final else raw_segments.pop()
+        element_sep = self.element_sep
+        segments = []
+        for raw in raw_segments:
+            # Line breaks after terminators are common and not part of the data
+            seg = raw.strip('\r\n')
+            if seg:
+                segments.append(seg.split(element_sep))
+        return segments
+
+
+def _iter_chunks(source: EdiSource, chunk_size: int) -> Iterator[str]:
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    decoder = None
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+def iter_segments(source: EdiSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[str]]:
+    """Yield the segments of an EDI document as element lists, one chunk at a time."""
+    tokenizer = SegmentTokenizer()
+    for chunk in _iter_chunks(source, chunk_size):
+        yield from tokenizer.feed(chunk)
+    yield from tokenizer.close()
+
+
+class TransactionSet:
+    """Compact result for one ST/SE transaction set within an interchange."""
+
+    __slots__ = (
+        "index", "interchange_index", "group_index", "start_segment", "end_segment",
+        "interchange_control_number", "group_control_number", "control_number",
+        "present_fields", "field_values", "segment_counts",
+    )
+
+    def __init__(self, index: int, interchange_index: int, group_index: int, start_segment: int,
+                 interchange_control_number: str = "", group_control_number: str = "", control_number: str = ""):
+        self.index = index
+        self.interchange_index = interchange_index
+        self.group_index = group_index
+        self.start_segment = start_segment
+        self.end_segment: Optional[int] = None
+        self.interchange_control_number = interchange_control_number
+        self.group_control_number = group_control_number
+        self.control_number = control_number
+        self.present_fields: Set[str] = set()
+        self.field_values: Dict[str, str] = {}
+        self.segment_counts: Dict[str, int] = {}  # Occurrences of each segment from ST to SE
+
+    @property
+    def fields(self) -> List[str]:
+        return sorted(self.present_fields)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "index": self.index,
+            "interchange_index": self.interchange_index,
+            "group_index": self.group_index,
+            "start_segment": self.start_segment,
+            "end_segment": self.end_segment,
+            "interchange_control_number": self.interchange_control_number,
+            "group_control_number": self.group_control_number,
+            "control_number": self.control_number,
+            "fields": self.fields,
+            "field_values": self.field_values,
+            "segment_counts": self.segment_counts,
+        }
+
+
+def _element(parts: List[str], idx: int) -> str:
+    return parts[idx].strip() if len(parts) > idx else ""
+
+
+class EDI810Parser:
+    """Single-pass consumer of tokenized segments.
+
+    Validates the ISA/GS/ST envelope, collects field tags and values and
+    renders XML as each segment arrives. Each ST/SE envelope also gets its
+    own TransactionSet: with ``collect_transactions`` they are kept in
+    ``transactions``, with ``stream_transactions`` they are queued for
+    drain_completed(). With ``build_store`` every occurrence of every
+    element is kept in a columnar FieldStore, not just the last value.
+    Segment occurrences are counted per segment ID, both for the whole
+    input (``segment_counts``) and for each transaction set, and trailer
+    counts and control numbers are checked as the envelopes close
+    (``envelope_errors``). Line amounts, charges and counts are
+    reconciled with TDS01 and CTT01 per transaction set (``totals_errors``).
+    ``max_errors`` and ``max_invoices`` cap how many errors of each kind
+    and invoice totals are kept; the trackers still count all of them.
     """
-    element_sep, segment_sep = _detect_separators(edi_text)
-    raw_segments = [s for s in edi_text.strip().split(segment_sep) if s]
-    
-    # Check for required segments
-    has_isa = False
-    has_gs = False
-    has_st_810 = False
-    
-    for seg in raw_segments:
-        parts = seg.split(element_sep)
-        if not parts:
-            continue
+
+    def __init__(self, build_xml: bool = True, collect_transactions: bool = False, stream_transactions: bool = False,
+                 build_store: bool = False, xml_sink: Optional[Callable[[str], object]] = None,
+                 max_errors: Optional[int] = None, max_invoices: Optional[int] = None):
+        self.build_xml = build_xml
+        self.store: Optional[FieldStore] = FieldStore() if build_store else None
+        self.collect_transactions = collect_transactions
+        self.stream_transactions = stream_transactions
+        self.present_fields: Set[str] = set()
+        self.field_values: Dict[str, str] = {}
+        self.error = ""
+        self.segment_count = 0
+        self.segment_counts: Dict[str, int] = {}  # Occurrences of each segment ID in the whole input
+        self.envelope = EnvelopeTracker(max_errors)
+        self.totals = TotalsTracker(max_errors, max_invoices)
+        self.transactions: List[TransactionSet] = []
+        self.completed: List[TransactionSet] = []
+        self._current: Optional[TransactionSet] = None
+        self._transaction_count = 0
+        self._interchange_index = -1
+        self._group_index = -1
+        self._interchange_control_number = ""
+        self._group_control_number = ""
+        self._has_isa = False
+        self._has_gs = False
+        self._has_st_810 = False
+        # XML goes to ``xml_sink`` when given (e.g. a file's write), else it is kept for finish()
+        self._xml_chunks: List[str] = []
+        self._xml: Optional[XmlSegmentWriter] = None
+        if build_xml:
+            self._xml = XmlSegmentWriter(xml_sink or self._xml_chunks.append, SEGMENT_NAMES)
+
+    def feed_segment(self, parts: List[str]) -> bool:
+        """Consume one segment. Returns False once the document is rejected."""
+        if self.error:
+            return False
         seg_id = parts[0].strip()
-        
+
         if seg_id == 'ISA':
-            has_isa = True
+            self._has_isa = True
+            self._interchange_index += 1
+            self._interchange_control_number = _element(parts, 13)
         elif seg_id == 'GS':
-            has_gs = True
+            self._has_gs = True
+            self._group_index += 1
+            self._group_control_number = _element(parts, 6)
         elif seg_id == 'ST':
-            # Check if it's specifically an 810 transaction
-            if len(parts) > 1 and parts[1].strip() == '810':
-                has_st_810 = True
-            elif len(parts) > 1 and parts[1].strip() != '810':
-                return False, f"Only EDI 810 (Invoice) files are allowed. Found transaction type: {parts[1].strip()}"
-    
-    if not has_isa:
-        return False, "Invalid EDI file: Missing ISA (Interchange Control Header) segment"
-    if not has_gs:
-        return False, "Invalid EDI file: Missing GS (Functional Group Header) segment"
-    if not has_st_810:
-        return False, "Only EDI 810 (Invoice) files are allowed. Please upload a valid EDI 810 file."
-    
-    return True, ""
-
-
-def parse_edi_to_xml(edi_text: str) -> Tuple[str, Set[str], bool, Dict[str, str]]:
-    """Parse a simple X12 EDI text into a minimal XML and collect field tags.
+            if len(parts) > 1:
+                # Check if it's specifically an 810 transaction
+                transaction_type = parts[1].strip()
+                if transaction_type != '810':
+                    self.error = f"Only EDI 810 (Invoice) files are allowed. Found transaction type: {transaction_type}"
+                    return False
+                self._has_st_810 = True
+            if self._current is not None:
+                # ST without a closing SE: the open set ends where the next begins
+                self._close_transaction(None)
+            self._current = TransactionSet(
+                self._transaction_count, self._interchange_index, self._group_index, self.segment_count,
+                self._interchange_control_number, self._group_control_number, _element(parts, 2))
+            self._transaction_count += 1
+
+        current = self._current
+        if self.store is not None:
+            self.store.add_segment(seg_id, parts, self.segment_count)
+        self.envelope.feed(seg_id, parts, self.segment_count)
+        self.totals.feed(seg_id, parts, self.segment_count)
+        self.segment_count += 1
+        counts = self.segment_counts
+        counts[seg_id] = counts.get(seg_id, 0) + 1
+        if current is not None:
+            counts = current.segment_counts
+            counts[seg_id] = counts.get(seg_id, 0) + 1
+        present_fields = self.present_fields
+        field_values = self.field_values
 
-    Returns:
-        xml: Minimal XML string representation
-        present_fields: Set of tags like 'BIG01', 'BIG02', 'REF01', etc.
-        is_810: Strict check whether it's a valid 810 invoice
-        field_values: Dictionary mapping field IDs to their actual values
-    """
-    # First validate that it's a proper EDI 810 file
-    is_valid_810, error_msg = validate_edi_810(edi_text)
-    if not is_valid_810:
-        # Return empty results with error indication
-        return f"<Error>{error_msg}</Error>", set(), False, {}
-    
-    element_sep, segment_sep = _detect_separators(edi_text)
-    raw_segments = [s for s in edi_text.strip().split(segment_sep) if s]
-    present_fields: Set[str] = set()
-    field_values: Dict[str, str] = {}
-
-    xml_parts = ["<EDI_810>"]
-    xml_parts.append("  <TransactionType>810 - Invoice</TransactionType>")
-    
-    for seg in raw_segments:
-        parts = seg.split(element_sep)
-        if not parts:
-            continue
-        seg_id = parts[0].strip()
-        
         # Build field tags seg_id + 2-digit index and store values
         for idx, value in enumerate(parts[1:], start=1):
-            if value.strip():  # Only count non-empty values
+            value = value.strip()
+            if value:  # Only count non-empty values
                 tag = f"{seg_id}{idx:02d}"
                 present_fields.add(tag)
-                field_values[tag] = value.strip()  # Store actual field value for validation
-        
-        # Enhanced XML representation with segment names
-        segment_names = {
-            'ISA': 'Interchange_Control_Header',
-            'GS': 'Functional_Group_Header', 
-            'ST': 'Transaction_Set_Header',
-            'BIG': 'Invoice_Information',
-            'REF': 'Reference_Identification',
-            'N1': 'Name',
-            'N2': 'Additional_Name_Information',
-            'N3': 'Address_Information',
-            'N4': 'Geographic_Location',
-            'PER': 'Administrative_Contact',
-            'ITD': 'Terms_of_Sale',
-            'DTM': 'Date_Time_Reference',
-            'FOB': 'FOB_Information',
-            'CUR': 'Currency_Code',
-            'IT1': 'Line_Item',
-            'PID': 'Product_Description',
-            'SAC': 'Service_Allowance_Charge',
-            'TXI': 'Tax_Information',
-            'SLN': 'Sub_Line_Item',
-            'TDS': 'Total_Invoice_Amount',
-            'ISS': 'Invoice_Shipment_Summary',
-            'CTT': 'Transaction_Totals',
-            'SE': 'Transaction_Set_Trailer',
-            'GE': 'Functional_Group_Trailer',
-            'IEA': 'Interchange_Control_Trailer'
-        }
-        
-        segment_name = segment_names.get(seg_id, seg_id)
-        xml_parts.append(f"  <{segment_name} segment_id=\"{seg_id}\">")
-        
-        for idx, value in enumerate(parts[1:], start=1):
-            safe_val = (value or '').replace('<', '&lt;').replace('>', '&gt;').replace('&', '&amp;')
-            xml_parts.append(f"    <Element_{idx:02d}>{safe_val}</Element_{idx:02d}>")
-        xml_parts.append(f"  </{segment_name}>")
-    
-    xml_parts.append("</EDI_810>")
+                field_values[tag] = value  # Store actual field value for validation
+                if current is not None:
+                    current.present_fields.add(tag)
+                    current.field_values[tag] = value
+
+        if seg_id == 'SE' and current is not None:
+            self._close_transaction(self.segment_count - 1)
 
-    return "\n".join(xml_parts), present_fields, True, field_values
+        if self._xml is not None:
+            self._xml.segment(seg_id, parts)
+        return True
 
+    def _close_transaction(self, end_segment: Optional[int]) -> None:
+        transaction = self._current
+        transaction.end_segment = end_segment
+        self._current = None
+        if self.stream_transactions:
+            self.completed.append(transaction)
+        if self.collect_transactions:
+            self.transactions.append(transaction)
 
+    def drain_completed(self) -> List[TransactionSet]:
+        """Hand over the transaction sets closed since the last call."""
+        completed, self.completed = self.completed, []
+        return completed
+
+    def close(self) -> None:
+        """Close a transaction set left open at the end of the input."""
+        if self._current is not None:
+            self._close_transaction(None)
+        self.envelope.close(self.segment_count)
+        self.totals.close()
+        if self._xml is not None:
+            self._xml.close()
+
+    @property
+    def envelope_errors(self) -> List[EnvelopeError]:
+        return self.envelope.errors
+
+    @property
+    def totals_errors(self) -> List[TotalsError]:
+        return self.totals.errors
+
+    def validation_error(self) -> str:
+        """Return the first envelope error, or an empty string for a valid 810."""
+        if self.error:
+            return self.error
+        if not self._has_isa:
+            return "Invalid EDI file: Missing ISA (Interchange Control Header) segment"
+        if not self._has_gs:
+            return "Invalid EDI file: Missing GS (Functional Group Header) segment"
+        if not self._has_st_810:
+            return "Only EDI 810 (Invoice) files are allowed. Please upload a valid EDI 810 file."
+        return ""
+
+    def finish(self) -> Tuple[str, Set[str], bool, Dict[str, str]]:
+        error_msg = self.validation_error()
+        if error_msg:
+            # Return empty results with error indication
+            return f"<Error>{error_msg}</Error>", set(), False, {}
+        xml = ""
+        if self._xml is not None:
+            self._xml.close()
+            # Empty when the XML was streamed to a sink
+            xml = "".join(self._xml_chunks)
+        return xml, self.present_fields, True, self.field_values
+
+
+def _run_parser(parser: EDI810Parser, source: EdiSource, chunk_size: int) -> EDI810Parser:
+    for parts in iter_segments(source, chunk_size):
+        if not parser.feed_segment(parts):
+            break
+    parser.close()
+    return parser
+
+
+def parse_edi_document(edi_source: EdiSource, chunk_size: int = DEFAULT_CHUNK_SIZE, build_xml: bool = True,
+                       xml_path: Optional[str] = None) -> EDI810Parser:
+    """Run a full parse and return the parser with per-transaction results.
+
+    Use finish() on the result for the parse_edi_to_xml tuple,
+    ``transactions`` for one TransactionSet per ST/SE envelope and
+    ``store`` for every element occurrence. With ``xml_path`` the XML is
+    streamed to that file during the parse instead of being kept in memory
+    (finish() then returns an empty XML string).
+    """
+    if xml_path is None:
+        parser = EDI810Parser(build_xml=build_xml, collect_transactions=True, build_store=True)
+        return _run_parser(parser, edi_source, chunk_size)
+    with open(xml_path, 'w', encoding='utf-8') as xml_file:
+        parser = EDI810Parser(collect_transactions=True, build_store=True, xml_sink=xml_file.write)
+        return _run_parser(parser, edi_source, chunk_size)
+
+
+def iter_store_xml(store: FieldStore, flush_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Render the EDI-as-XML document from a parsed FieldStore, a chunk at a time.
+
+    This is how XML is produced lazily: the parse keeps only the store and
+    the XML is built from it when (and if) a client asks for it. The output
+    is the same as rendering during the parse.
+    """
+    chunks: List[str] = []
+    writer = XmlSegmentWriter(chunks.append, SEGMENT_NAMES, flush_size)
+    for _position, seg_id, parts in store.iter_segments():
+        writer.segment(seg_id, parts)
+        if chunks:
+            yield from chunks
+            chunks.clear()
+    writer.close()
+    yield from chunks
+
+
+def render_store_xml(store: FieldStore) -> str:
+    """Render the whole EDI-as-XML document from a parsed FieldStore."""
+    return "".join(iter_store_xml(store))
+
+
+class StreamingEDIParser:
+    """Push-style front end for data that arrives in pieces (e.g. an HTTP body).
+
+    Bytes are decoded incrementally, so multi-byte characters split across
+    chunks are handled, and each chunk is tokenized and parsed as soon as
+    it arrives. The default parser streams its transaction sets: they are
+    drained after every chunk, counted in ``transaction_count`` and only
+    the first ``detail_limit`` are kept in ``transactions``, as are the
+    first invoice totals and errors of each kind. Memory is then bounded
+    by the detail limit and the number of distinct element tags, not by
+    the size of the interchange.
+    """
+
+    def __init__(self, parser: Optional[EDI810Parser] = None, encoding: str = 'utf-8',
+                 detail_limit: Optional[int] = STREAM_DETAIL_LIMIT):
+        self.parser = parser or EDI810Parser(build_xml=False, stream_transactions=True,
+                                             max_errors=detail_limit, max_invoices=detail_limit)
+        self.detail_limit = detail_limit
+        self.transactions: List[TransactionSet] = []
+        self.transaction_count = 0
+        self.bytes_received = 0
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='ignore')
+        self._tokenizer = SegmentTokenizer()
+
+    def feed(self, data: Union[bytes, str]) -> bool:
+        """Consume one chunk. Returns False once the document is rejected."""
+        if isinstance(data, bytes):
+            self.bytes_received += len(data)
+            data = self._decoder.decode(data)
+        return self._consume(self._tokenizer.feed(data))
+
+    def close(self) -> EDI810Parser:
+        self._consume(self._tokenizer.feed(self._decoder.decode(b'', final=True)))
+        self._consume(self._tokenizer.close())
+        self.parser.close()
+        self._collect()
+        return self.parser
+
+    def _consume(self, segments: List[List[str]]) -> bool:
+        parser = self.parser
+        accepted = True
+        for parts in segments:
+            if not parser.feed_segment(parts):
+                accepted = False
+                break
+        self._collect()
+        return accepted and not parser.error
+
+    def _collect(self) -> None:
+        for transaction in self.parser.drain_completed():
+            self.transaction_count += 1
+            if self.detail_limit is None or len(self.transactions) < self.detail_limit:
+                self.transactions.append(transaction)
+
+
+def validate_edi_810(edi_source: EdiSource) -> Tuple[bool, str]:
+    """Validate that the EDI file is a valid 810 invoice.
+
+    Like ``is_810`` from finish(), this describes the document type only:
+    envelope count and control-number mismatches do not make it invalid,
+    they are reported in the parser's ``envelope_errors``.
+
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    parser = _run_parser(EDI810Parser(build_xml=False), edi_source, DEFAULT_CHUNK_SIZE)
+    error_msg = parser.validation_error()
+    return not error_msg, error_msg
+
+
+def parse_edi_to_xml(edi_source: EdiSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[str, Set[str], bool, Dict[str, str]]:
+    """Parse a simple X12 EDI text into a minimal XML and collect field tags.
+
+    The source is tokenized incrementally, so a file object is never read
+    into memory as a whole; validation, field collection and XML rendering
+    all happen in the same pass.
+
+    Returns:
+        xml: Minimal XML string representation
+        present_fields: Set of tags like 'BIG01', 'BIG02', 'REF01', etc.
+        is_810: Strict check whether it's a valid 810 invoice
+        field_values: Dictionary mapping field IDs to their actual values
+    """
+    return _run_parser(EDI810Parser(), edi_source, chunk_size).finish()
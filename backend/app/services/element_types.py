@@ -0,0 +1,102 @@
+from datetime import date
+from typing import Callable, Dict, Iterable, Optional
+import re
+
+
+# Checkers take a stripped, non-empty value and return True when it is valid for the type
+TypeChecker = Callable[[str], bool]
+
+# Nn: optional minus sign and digits; the decimal point is implied, so none may be sent
+_NUMERIC = re.compile(r'-?\d+')
+# R: optional minus sign, digits with an optional explicit decimal point
+_REAL = re.compile(r'-?(?:\d+\.?\d*|\.\d+)')
+# TM: HHMM, HHMMSS, HHMMSSD or HHMMSSDD in 24-hour clock
+_TIME = re.compile(r'(?:[01]\d|2[0-3])[0-5]\d(?:[0-5]\d\d{0,2})?')
+_DATE = re.compile(r'\d{6}(?:\d{2})?')
+
+# Code lists for ID elements whose valid values are fixed by the standard or this invoice flow
+ID_CODE_LISTS: Dict[str, frozenset] = {
+    "ISA14": frozenset({"0", "1"}),
+    "ISA15": frozenset({"I", "P", "T"}),
+    "GS01": frozenset({"IN"}),
+    "GS07": frozenset({"T", "X"}),
+    "ST01": frozenset({"810"}),
+}
+
+
+def _check_numeric(value: str) -> bool:
+    return _NUMERIC.fullmatch(value) is not None
+
+
+def _check_real(value: str) -> bool:
+    return _REAL.fullmatch(value) is not None
+
+
+def _check_date(value: str) -> bool:
+    """CCYYMMDD, or YYMMDD as used in the ISA header; the date must exist."""
+    if _DATE.fullmatch(value) is None:
+        return False
+    if len(value) == 6:
+        # X12 windows two-digit years the same way as ISA09: 00-49 are 20xx
+        year = int(value[:2])
+        year += 2000 if year < 50 else 1900
+        month, day = int(value[2:4]), int(value[4:6])
+    else:
+        year, month, day = int(value[:4]), int(value[4:6]), int(value[6:8])
+    try:
+        date(year, month, day)
+    except ValueError:
+        return False
+    return True
+
+
+def _check_time(value: str) -> bool:
+    return _TIME.fullmatch(value) is not None
+
+
+def _check_text(value: str) -> bool:
+    # AN/ID allow any printable character; control characters mean a broken mapping
+    return value.isprintable()
+
+
+TYPE_CHECKERS: Dict[str, TypeChecker] = {
+    "AN": _check_text,
+    "ID": _check_text,
+    "R": _check_real,
+    "DT": _check_date,
+    "TM": _check_time,
+}
+TYPE_CHECKERS.update({f"N{digits}": _check_numeric for digits in range(10)})
+TYPE_CHECKERS["N"] = _check_numeric
+
+TYPE_DESCRIPTIONS = {
+    "AN": "string",
+    "ID": "identifier",
+    "R": "decimal number",
+    "DT": "date",
+    "TM": "time",
+}
+
+
+def describe_type(type_code: str) -> str:
+    if type_code in TYPE_DESCRIPTIONS:
+        return TYPE_DESCRIPTIONS[type_code]
+    if type_code.startswith("N"):
+        return "numeric"
+    return type_code
+
+
+def compile_type_checker(type_code: Optional[str], codes: Optional[Iterable[str]] = None) -> Optional[TypeChecker]:
+    """Return the checker for an element type, narrowed to ``codes`` for ID elements.
+
+    Unknown or missing types (and binary ``B``) get no checker.
+    """
+    if codes:
+        allowed = frozenset(codes)
+        return allowed.__contains__
+    return TYPE_CHECKERS.get(type_code or "")
+
+
+def invalid_positions(checker: TypeChecker, values: Iterable[str]) -> list:
+    """Positions of the values rejected by ``checker``, in one pass over the batch."""
+    return [i for i, ok in enumerate(map(checker, values)) if not ok]
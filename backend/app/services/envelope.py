@@ -0,0 +1,143 @@
+from typing import Dict, List, Optional
+
+
+class EnvelopeError:
+    """One control-count or control-number mismatch in the ISA/GS/ST envelopes."""
+
+    __slots__ = ("position", "segment_id", "code", "message", "control_number")
+
+    def __init__(self, position: int, segment_id: str, code: str, message: str, control_number: str = ""):
+        self.position = position  # Segment index in the interchange (0-based)
+        self.segment_id = segment_id
+        self.code = code
+        self.message = message
+        self.control_number = control_number
+
+    def __str__(self):
+        return f"Segment {self.position + 1} ({self.segment_id}): {self.message}"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "position": self.position,
+            "segment_id": self.segment_id,
+            "code": self.code,
+            "message": self.message,
+            "control_number": self.control_number,
+        }
+
+
+def _element(parts: List[str], idx: int) -> str:
+    return parts[idx].strip() if len(parts) > idx else ""
+
+
+def _count(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class EnvelopeTracker:
+    """Checks envelope trailers against their headers as segments stream by.
+
+    Only the open interchange, group and transaction set are remembered
+    (control number, start position and a running tally), so the checks
+    add a few comparisons per envelope segment and nothing per data
+    segment beyond what the parser already counts. With ``max_errors``
+    only that many errors are kept; ``error_count`` still counts them all.
+    """
+
+    def __init__(self, max_errors: Optional[int] = None):
+        self.errors: List[EnvelopeError] = []
+        self.error_count = 0
+        self.max_errors = max_errors
+        self._isa: Optional[tuple] = None  # (position, ISA13)
+        self._gs: Optional[tuple] = None   # (position, GS06)
+        self._st: Optional[tuple] = None   # (position, ST02)
+        self._groups = 0        # GS count in the open interchange
+        self._transactions = 0  # ST count in the open group
+
+    def feed(self, seg_id: str, parts: List[str], position: int) -> None:
+        """Account for one segment; ``position`` is its index in the input."""
+        if seg_id == "ISA":
+            self._close_group(position)
+            if self._isa is not None:
+                self._unclosed("IEA", "interchange", self._isa, position)
+            self._isa = (position, _element(parts, 13))
+            self._groups = 0
+        elif seg_id == "GS":
+            self._close_group(position)
+            self._gs = (position, _element(parts, 6))
+            self._groups += 1
+            self._transactions = 0
+        elif seg_id == "ST":
+            if self._st is not None:
+                self._unclosed("SE", "transaction set", self._st, position)
+            self._st = (position, _element(parts, 2))
+            self._transactions += 1
+        elif seg_id == "SE":
+            if self._st is None:
+                self._error(position, seg_id, "UNEXPECTED_TRAILER", "SE without a matching ST")
+                return
+            start, control = self._st
+            self._st = None
+            # SE01 counts every segment from ST to SE inclusive
+            self._check_count(position, seg_id, "SE01", _element(parts, 1), position - start + 1, "segments", control)
+            self._check_control(position, seg_id, "ST02", control, "SE02", _element(parts, 2))
+        elif seg_id == "GE":
+            if self._gs is None:
+                self._error(position, seg_id, "UNEXPECTED_TRAILER", "GE without a matching GS")
+                return
+            _start, control = self._gs
+            self._gs = None
+            self._check_count(position, seg_id, "GE01", _element(parts, 1), self._transactions, "transaction sets", control)
+            self._check_control(position, seg_id, "GS06", control, "GE02", _element(parts, 2))
+        elif seg_id == "IEA":
+            if self._isa is None:
+                self._error(position, seg_id, "UNEXPECTED_TRAILER", "IEA without a matching ISA")
+                return
+            _start, control = self._isa
+            self._isa = None
+            self._check_count(position, seg_id, "IEA01", _element(parts, 1), self._groups, "functional groups", control)
+            self._check_control(position, seg_id, "ISA13", control, "IEA02", _element(parts, 2))
+
+    def close(self, position: int) -> None:
+        """Report envelopes still open at the end of the input (``position`` = segments read)."""
+        self._close_group(position)
+        if self._isa is not None:
+            self._unclosed("IEA", "interchange", self._isa, position)
+            self._isa = None
+
+    def _close_group(self, position: int) -> None:
+        if self._st is not None:
+            self._unclosed("SE", "transaction set", self._st, position)
+            self._st = None
+        if self._gs is not None:
+            self._unclosed("GE", "functional group", self._gs, position)
+            self._gs = None
+
+    def _check_count(self, position: int, seg_id: str, element: str, declared: str, actual: int, what: str,
+                     control: str) -> None:
+        value = _count(declared)
+        if value is None:
+            self._error(position, seg_id, "INVALID_CONTROL_COUNT", f"{element} '{declared}' is not a number", control)
+        elif value != actual:
+            self._error(position, seg_id, "CONTROL_COUNT_MISMATCH",
+                        f"{element} declares {value} {what}, found {actual}", control)
+
+    def _check_control(self, position: int, seg_id: str, header_element: str, header_value: str,
+                       trailer_element: str, trailer_value: str) -> None:
+        if header_value != trailer_value:
+            self._error(position, seg_id, "CONTROL_NUMBER_MISMATCH",
+                        f"{trailer_element} '{trailer_value}' does not match {header_element} '{header_value}'",
+                        header_value)
+
+    def _unclosed(self, trailer: str, what: str, opened: tuple, position: int) -> None:
+        start, control = opened
+        self._error(position, trailer, "MISSING_TRAILER",
+                    f"No {trailer} for the {what} opened at segment {start + 1}", control)
+
+    def _error(self, position: int, seg_id: str, code: str, message: str, control: str = "") -> None:
+        self.error_count += 1
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append(EnvelopeError(position, seg_id, code, message, control))
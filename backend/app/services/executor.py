@@ -0,0 +1,124 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+
+
+class ExecutorSaturated(Exception):
+    """Raised when no execution slot frees up within the queue timeout."""
+
+
+def _timed_call(fn: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[float, float, Any]:
+    # Runs in the worker; wall-clock time so it is comparable across processes
+    started = time.time()
+    result = fn(*args)
+    return started, time.time(), result
+
+
+class ParserExecutor:
+    """Runs CPU-bound parsing off the event loop on a thread or process pool.
+
+    At most ``workers + max_queue`` calls are admitted at once; further
+    callers wait up to ``queue_timeout`` seconds for a slot and then get
+    ExecutorSaturated, so overload turns into fast rejections instead of an
+    unbounded backlog. With a process pool, functions and arguments must be
+    picklable (module-level functions, bytes rather than open files).
+    """
+
+    def __init__(self, kind: str = "thread", workers: Optional[int] = None, max_queue: int = 32,
+                 queue_timeout: float = 5.0):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._pool: Optional[Executor] = None
+        self._pool_lock = threading.Lock()
+        # Semaphores bind to a loop on first use, so create it lazily
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.kind == "process"
+
+    def _get_pool(self) -> Executor:
+        with self._pool_lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="edi-parser")
+            return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers + self.max_queue)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise ExecutorSaturated(
+                f"Parser queue is full ({self.workers} workers, {self.max_queue} queued); retry later"
+            )
+
+        self._in_flight += 1
+        self._submitted += 1
+        enqueued = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started, finished, result = await loop.run_in_executor(self._get_pool(), _timed_call, fn, args)
+            wait = max(started - enqueued, 0.0)
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._run_total += finished - started
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        finished = self._completed or 1
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            # Calls beyond the worker count are necessarily waiting in the pool queue
+            "queue_depth": max(self._in_flight - self.workers, 0),
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._wait_total / finished * 1000, 2),
+            "max_wait_ms": round(self._wait_max * 1000, 2),
+            "avg_run_ms": round(self._run_total / finished * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+parser_executor = ParserExecutor(
+    kind=os.environ.get("EDI_EXECUTOR_KIND", "thread"),
+    workers=int(os.environ.get("EDI_EXECUTOR_WORKERS", "0")) or None,
+    max_queue=int(os.environ.get("EDI_EXECUTOR_MAX_QUEUE", "32")),
+    queue_timeout=float(os.environ.get("EDI_EXECUTOR_QUEUE_TIMEOUT", "5")),
+)
@@ -0,0 +1,215 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Loop kinds tracked by the store; the position in this tuple is the stored code
+LOOP_KINDS = ("", "N1", "IT1", "SLN")
+_N1, _IT1, _SLN = 1, 2, 3
+
+# Segments that may follow the loop header inside each 810 loop
+LOOP_MEMBERS = {
+    _N1: frozenset({"N2", "N3", "N4", "REF", "PER", "DMG"}),
+    _IT1: frozenset({
+        "CRC", "QTY", "CUR", "IT3", "TXI", "CTP", "PAM", "MEA", "PID", "PWK", "PKG", "PO4",
+        "ITD", "REF", "YNQ", "PER", "SDQ", "DTM", "CAD", "L7", "SR", "SAC", "SLN", "N1",
+    }),
+    _SLN: frozenset({"DTM", "REF", "PID", "SAC", "TC2", "TXI"}),
+}
+
+
+class FieldStore:
+    """Columnar, occurrence-indexed storage for element values.
+
+    Every element position (``IT102``, ``REF02``...) gets one column holding
+    the raw value of each occurrence of its segment, so repeating segments
+    keep all of their data. Per segment occurrence the store also keeps the
+    segment index in the interchange and the loop it belongs to (kind code
+    from LOOP_KINDS plus the loop occurrence, -1 outside loops).
+
+    ``element_counts`` keeps how many elements each occurrence had, so the
+    original segments can be rebuilt in document order (iter_segments) and
+    rendered later, e.g. as XML, without keeping the raw input around.
+
+    ``usage_counts`` holds, per segment, the most occurrences seen within
+    one scope: a loop iteration for loop members, the enclosing loop (or
+    transaction set) for loop headers and the transaction set otherwise.
+    That is the scope X12 max-use limits apply to.
+    """
+
+    __slots__ = ("columns", "segment_counts", "usage_counts", "positions", "loop_kinds", "loop_indexes",
+                 "element_counts", "_loop_stack", "_loop_counts", "_scope_counts", "_set_counts")
+
+    def __init__(self):
+        self.columns: Dict[str, List[str]] = {}
+        self.segment_counts: Dict[str, int] = {}
+        self.usage_counts: Dict[str, int] = {}
+        self.positions: Dict[str, array] = {}
+        self.loop_kinds: Dict[str, array] = {}
+        self.loop_indexes: Dict[str, array] = {}
+        self.element_counts: Dict[str, array] = {}
+        self._loop_stack: List[Tuple[int, int]] = []
+        self._loop_counts = [0] * len(LOOP_KINDS)
+        # Per-scope occurrence counters, parallel to _loop_stack, plus the transaction-level one
+        self._scope_counts: List[Dict[str, int]] = []
+        self._set_counts: Dict[str, int] = {}
+
+    def add_segment(self, seg_id: str, parts: List[str], position: int) -> None:
+        """Append one segment occurrence; ``parts`` includes the segment ID."""
+        occurrence = self.segment_counts.get(seg_id, 0)
+        self.segment_counts[seg_id] = occurrence + 1
+        if occurrence == 0:
+            self.positions[seg_id] = array('l')
+            self.loop_kinds[seg_id] = array('b')
+            self.loop_indexes[seg_id] = array('l')
+            self.element_counts[seg_id] = array('l')
+
+        if seg_id == "ST":
+            self._set_counts = {}
+        kind, loop_index = self._enter(seg_id)
+        self._count_usage(seg_id, opened=kind != 0 and LOOP_KINDS[kind] == seg_id)
+        self.positions[seg_id].append(position)
+        self.loop_kinds[seg_id].append(kind)
+        self.loop_indexes[seg_id].append(loop_index)
+        self.element_counts[seg_id].append(len(parts) - 1)
+
+        columns = self.columns
+        for idx in range(1, len(parts)):
+            tag = f"{seg_id}{idx:02d}"
+            column = columns.get(tag)
+            if column is None:
+                column = columns[tag] = []
+            if len(column) < occurrence:
+                # Earlier occurrences were shorter; pad so index == occurrence
+                column.extend([""] * (occurrence - len(column)))
+            column.append(parts[idx])
+
+    def _count_usage(self, seg_id: str, opened: bool) -> None:
+        scopes = self._scope_counts
+        # A loop header counts in the scope around the loop it just opened
+        depth = len(scopes) - 1 if opened else len(scopes)
+        scope = scopes[depth - 1] if depth > 0 else self._set_counts
+        count = scope.get(seg_id, 0) + 1
+        scope[seg_id] = count
+        if count > self.usage_counts.get(seg_id, 0):
+            self.usage_counts[seg_id] = count
+
+    def _enter(self, seg_id: str) -> Tuple[int, int]:
+        stack = self._loop_stack
+        if seg_id == "IT1":
+            self._close_loops(0)
+            return self._open(_IT1)
+        if seg_id == "N1":
+            # N1 nests inside a line item, otherwise it is a header loop
+            while stack and stack[-1][0] != _IT1:
+                self._close_loops(len(stack) - 1)
+            return self._open(_N1)
+        if seg_id == "SLN":
+            while stack and stack[-1][0] != _IT1:
+                self._close_loops(len(stack) - 1)
+            if stack:
+                return self._open(_SLN)
+            return 0, -1
+        while stack and seg_id not in LOOP_MEMBERS[stack[-1][0]]:
+            self._close_loops(len(stack) - 1)
+        return stack[-1] if stack else (0, -1)
+
+    def _open(self, kind: int) -> Tuple[int, int]:
+        loop = (kind, self._loop_counts[kind])
+        self._loop_counts[kind] += 1
+        self._loop_stack.append(loop)
+        self._scope_counts.append({})
+        return loop
+
+    def _close_loops(self, depth: int) -> None:
+        """Close every open loop deeper than ``depth``."""
+        del self._loop_stack[depth:]
+        del self._scope_counts[depth:]
+
+    def values(self, tag: str) -> Iterator[Tuple[int, str]]:
+        """Yield (occurrence, value) for every non-empty occurrence of ``tag``."""
+        for occurrence, value in enumerate(self.columns.get(tag, ())):
+            value = value.strip()
+            if value:
+                yield occurrence, value
+
+    def iter_segments(self) -> Iterator[Tuple[int, str, List[str]]]:
+        """Yield (position, segment ID, parts) in document order; ``parts`` includes the segment ID."""
+        order = sorted((position, seg_id, occurrence) for seg_id, positions in self.positions.items()
+                       for occurrence, position in enumerate(positions))
+        columns = self.columns
+        for position, seg_id, occurrence in order:
+            parts = [seg_id]
+            for idx in range(1, self.element_counts[seg_id][occurrence] + 1):
+                column = columns.get(f"{seg_id}{idx:02d}", ())
+                parts.append(column[occurrence] if occurrence < len(column) else "")
+            yield position, seg_id, parts
+
+    def subsets(self, bounds: Iterable[Tuple[int, Optional[int]]],
+                keep_segments: Iterable[str] = ()) -> List["FieldStore"]:
+        """One subset per (start, end) range, e.g. one per transaction set.
+
+        Positions are ascending per segment, so each range's occurrences are
+        one slice found by bisection, and the columns are grouped by segment
+        once for all ranges: a view costs about the size of its own range,
+        not of the whole interchange. ``usage_counts`` is not carried over:
+        it holds maxima over the whole store and cannot be split by range,
+        so views leave it empty.
+        """
+        keep = set(keep_segments)
+        segment_tags: Dict[str, List[str]] = {}
+        for tag in self.columns:
+            segment_tags.setdefault(tag[:-2], []).append(tag)
+        return [self._slice(start, end, keep, segment_tags) for start, end in bounds]
+
+    def _slice(self, start: int, end: Optional[int], keep: set, segment_tags: Dict[str, List[str]]) -> "FieldStore":
+        result = FieldStore()
+        for seg_id, positions in self.positions.items():
+            if seg_id in keep:
+                first, last = 0, len(positions)
+            else:
+                first = bisect_left(positions, start)
+                last = len(positions) if end is None else bisect_right(positions, end)
+            if first >= last:
+                continue
+            result.segment_counts[seg_id] = last - first
+            result.positions[seg_id] = positions[first:last]
+            result.loop_kinds[seg_id] = self.loop_kinds[seg_id][first:last]
+            result.loop_indexes[seg_id] = self.loop_indexes[seg_id][first:last]
+            result.element_counts[seg_id] = self.element_counts[seg_id][first:last]
+            for tag in segment_tags.get(seg_id, ()):
+                # Columns are padded up to their last value, so a slice keeps occurrences aligned
+                values = self.columns[tag][first:last]
+                if values:
+                    result.columns[tag] = values
+        return result
+
+    def approximate_size(self) -> int:
+        """Rough memory footprint in bytes, used for size-bounded caches."""
+        size = sum(8 * (len(p) + len(self.loop_indexes[seg]) + len(self.element_counts[seg])) + len(p) for seg, p in self.positions.items())
+        for column in self.columns.values():
+            size += 8 * len(column) + sum(len(value) for value in column)
+        return size
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "segment_counts": dict(self.segment_counts),
+            "usage_counts": dict(self.usage_counts),
+            "positions": {seg: list(p) for seg, p in self.positions.items()},
+            "loop_kinds": {seg: list(k) for seg, k in self.loop_kinds.items()},
+            "loop_indexes": {seg: list(i) for seg, i in self.loop_indexes.items()},
+            "element_counts": {seg: list(c) for seg, c in self.element_counts.items()},
+            "columns": self.columns,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "FieldStore":
+        store = cls()
+        store.segment_counts = dict(data.get("segment_counts") or {})
+        store.usage_counts = dict(data.get("usage_counts") or {})
+        store.positions = {seg: array('l', p) for seg, p in (data.get("positions") or {}).items()}
+        store.loop_kinds = {seg: array('b', k) for seg, k in (data.get("loop_kinds") or {}).items()}
+        store.loop_indexes = {seg: array('l', i) for seg, i in (data.get("loop_indexes") or {}).items()}
+        store.element_counts = {seg: array('l', c) for seg, c in data["element_counts"].items()}
+        store.columns = {tag: list(col) for tag, col in (data.get("columns") or {}).items()}
+        return store
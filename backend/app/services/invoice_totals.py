@@ -0,0 +1,182 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Dict, List, Optional
+
+
+CENT = Decimal("0.01")
+
+
+class TotalsError:
+    """One arithmetic mismatch in an invoice (a line, TDS or CTT)."""
+
+    __slots__ = ("position", "segment_id", "code", "message", "line", "control_number")
+
+    def __init__(self, position: int, segment_id: str, code: str, message: str, line: Optional[int] = None,
+                 control_number: str = ""):
+        self.position = position  # Segment index in the interchange (0-based)
+        self.segment_id = segment_id
+        self.code = code
+        self.message = message
+        self.line = line  # 1-based IT1 line number within the transaction set
+        self.control_number = control_number
+
+    def __str__(self):
+        line = f", line {self.line}" if self.line is not None else ""
+        return f"Segment {self.position + 1} ({self.segment_id}{line}): {self.message}"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "position": self.position,
+            "segment_id": self.segment_id,
+            "code": self.code,
+            "message": self.message,
+            "line": self.line,
+            "control_number": self.control_number,
+        }
+
+
+class InvoiceTotals:
+    """Running totals of one transaction set; a handful of Decimals, no per-line state."""
+
+    __slots__ = ("control_number", "lines", "skipped_lines", "line_total", "charges", "allowances", "tds01", "ctt01")
+
+    def __init__(self, control_number: str = ""):
+        self.control_number = control_number
+        self.lines = 0
+        self.skipped_lines = 0  # Lines whose amount could not be computed
+        self.line_total = Decimal(0)
+        self.charges = Decimal(0)
+        self.allowances = Decimal(0)
+        self.tds01: Optional[Decimal] = None
+        self.ctt01: Optional[int] = None
+
+    @property
+    def computed_total(self) -> Decimal:
+        return (self.line_total + self.charges - self.allowances).quantize(CENT, rounding=ROUND_HALF_UP)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "control_number": self.control_number,
+            "lines": self.lines,
+            "skipped_lines": self.skipped_lines,
+            "line_total": str(self.line_total),
+            "charges": str(self.charges),
+            "allowances": str(self.allowances),
+            "computed_total": str(self.computed_total),
+            "declared_total": str(self.tds01) if self.tds01 is not None else None,
+            "declared_lines": self.ctt01,
+        }
+
+
+def _element(parts: List[str], idx: int) -> str:
+    return parts[idx].strip() if len(parts) > idx else ""
+
+
+def _decimal(value: str) -> Optional[Decimal]:
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def _implied_cents(value: str) -> Optional[Decimal]:
+    """Read an N2 amount: two implied decimals, unless the sender wrote the point explicitly."""
+    number = _decimal(value)
+    if number is None or '.' in value:
+        return number
+    return number.scaleb(-2)
+
+
+class TotalsTracker:
+    """Reconciles IT1 extended amounts and SAC charges with TDS01, and CTT01 with the IT1 count.
+
+    Fed one segment at a time by the parser. Each line adds IT102 x IT104
+    to a Decimal accumulator; SAC05 (N2) adds charges (SAC01 = C) or
+    subtracts allowances (SAC01 = A). The checks run when SE closes the set,
+    or, for a set missing its SE, when the next ST starts or close() is called.
+    With ``max_errors`` / ``max_invoices`` only that many errors and invoice
+    totals are kept; ``error_count`` and ``invoice_count`` count them all.
+    """
+
+    def __init__(self, max_errors: Optional[int] = None, max_invoices: Optional[int] = None):
+        self.errors: List[TotalsError] = []
+        self.invoices: List[InvoiceTotals] = []
+        self.error_count = 0
+        self.invoice_count = 0
+        self.max_errors = max_errors
+        self.max_invoices = max_invoices
+        self._current: Optional[InvoiceTotals] = None
+        self._tds_position = self._ctt_position = 0
+
+    def feed(self, seg_id: str, parts: List[str], position: int) -> None:
+        if seg_id == "ST":
+            if self._current is not None:
+                # No SE closed the previous set; reconcile what it declared before moving on
+                self._reconcile(self._current)
+            self._current = InvoiceTotals(_element(parts, 2))
+            self.invoice_count += 1
+            if self.max_invoices is None or len(self.invoices) < self.max_invoices:
+                self.invoices.append(self._current)
+            return
+        current = self._current
+        if current is None:
+            return
+        if seg_id == "IT1":
+            current.lines += 1
+            quantity, price = _element(parts, 2), _element(parts, 4)
+            quantity_value, price_value = _decimal(quantity), _decimal(price)
+            if quantity_value is None or price_value is None:
+                current.skipped_lines += 1
+                self._error(position, seg_id, "INVALID_LINE_AMOUNT",
+                            f"Cannot compute the line amount from IT102 '{quantity}' x IT104 '{price}'", current.lines)
+            else:
+                current.line_total += quantity_value * price_value
+        elif seg_id == "SAC":
+            indicator, amount = _element(parts, 1), _element(parts, 5)
+            if not amount:
+                return
+            value = _implied_cents(amount)
+            if value is None:
+                self._error(position, seg_id, "INVALID_CHARGE_AMOUNT", f"SAC05 '{amount}' is not a number")
+            elif indicator == "C":
+                current.charges += value
+            elif indicator == "A":
+                current.allowances += value
+        elif seg_id == "TDS":
+            self._tds_position = position
+            amount = _element(parts, 1)
+            current.tds01 = _implied_cents(amount) if amount else None
+            if amount and current.tds01 is None:
+                self._error(position, seg_id, "INVALID_TOTAL_AMOUNT", f"TDS01 '{amount}' is not a number")
+        elif seg_id == "CTT":
+            self._ctt_position = position
+            count = _element(parts, 1)
+            current.ctt01 = int(count) if count.isdigit() else None
+            if count and current.ctt01 is None:
+                self._error(position, seg_id, "INVALID_LINE_COUNT", f"CTT01 '{count}' is not a number")
+        elif seg_id == "SE":
+            self._reconcile(current)
+            self._current = None
+
+    def close(self) -> None:
+        """Reconcile a transaction set left open at the end of the input."""
+        if self._current is not None:
+            self._reconcile(self._current)
+            self._current = None
+
+    def _reconcile(self, invoice: InvoiceTotals) -> None:
+        if invoice.tds01 is not None and invoice.tds01 != invoice.computed_total:
+            self._error(self._tds_position, "TDS", "TOTAL_MISMATCH",
+                        f"TDS01 declares {invoice.tds01}, lines and charges add up to {invoice.computed_total} "
+                        f"(lines {invoice.line_total} + charges {invoice.charges} - allowances {invoice.allowances})"
+                        + (f"; {invoice.skipped_lines} line(s) could not be computed" if invoice.skipped_lines else ""))
+        if invoice.ctt01 is not None and invoice.ctt01 != invoice.lines:
+            self._error(self._ctt_position, "CTT", "LINE_COUNT_MISMATCH",
+                        f"CTT01 declares {invoice.ctt01} line items, found {invoice.lines} IT1 segments")
+
+    def _error(self, position: int, seg_id: str, code: str, message: str, line: Optional[int] = None) -> None:
+        self.error_count += 1
+        if self.max_errors is not None and len(self.errors) >= self.max_errors:
+            return
+        control = self._current.control_number if self._current is not None else ""
+        self.errors.append(TotalsError(position, seg_id, code, message, line, control))
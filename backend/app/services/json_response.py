@@ -0,0 +1,60 @@
+from decimal import Decimal
+from typing import Any, Callable
+import json
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Optional; msgspec or the stdlib encoder is used instead
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _default(obj: Any) -> Any:
+    """Encode the few non-JSON types the API builds (sets, Decimals, models, result objects)."""
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+dumps: Callable[[Any], bytes]
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+elif msgspec is not None:
+    JSON_BACKEND = "msgspec"
+    dumps = msgspec.json.Encoder(enc_hook=_default).encode
+else:
+    JSON_BACKEND = "json"
+
+    def dumps(content: Any) -> bytes:
+        return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for payloads the server built itself.
+
+    Returning it from a route skips FastAPI's response-model validation and
+    ``jsonable_encoder`` pass; the content goes straight to orjson (or
+    msgspec, or the stdlib encoder when neither is installed). The route's
+    ``response_model`` still documents the shape in the OpenAPI schema, so
+    the content must already match it.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,185 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Callable, Deque, Iterator, List, Optional, Tuple
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LAParams, LTContainer, LTPage, LTText, LTTextBox, LTTextLine
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+
+# Pages handed to a worker per task; large enough to amortize re-opening the document
+PAGES_PER_TASK = int(os.environ.get("SPEC_PDF_PAGES_PER_TASK", "4"))
+# Worker processes for page extraction; 1 extracts in the calling process
+PDF_WORKERS = int(os.environ.get("SPEC_PDF_WORKERS", "0")) or min(os.cpu_count() or 1, 4)
+# Upper bound on pages laid out per document; 0 means no limit
+MAX_PDF_PAGES = int(os.environ.get("SPEC_PDF_MAX_PAGES", "0"))
+# Text lines whose vertical extents overlap by this share of the shorter line sit in one table row
+ROW_OVERLAP = 0.5
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared page-extraction pool, or None when extraction must stay in-process."""
+    global _pool
+    # Daemonic workers (e.g. the parser executor's processes) cannot start children
+    if PDF_WORKERS <= 1 or multiprocessing.current_process().daemon:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # Created on first use from a worker thread; forking a multithreaded process is unsafe
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+class PageLayout:
+    """Text of one laid-out PDF page: its lines, and the same text regrouped into table rows.
+
+    ``lines`` match what pdfminer's TextConverter writes for the page.
+    ``rows`` put side-by-side text boxes back together: lines whose
+    vertical extents overlap form one row, and each row lists its cells
+    left to right, so a table's columns (element, name, status, type,
+    min/max) come back as one list per table row.
+    """
+
+    __slots__ = ("lines", "rows")
+
+    def __init__(self, lines: List[str], rows: List[List[str]]):
+        self.lines = lines
+        self.rows = rows
+
+
+def _group_rows(boxes: List[Tuple[float, float, float, str]]) -> List[List[str]]:
+    """Cluster (top, bottom, left, text) line boxes into rows of cells, top to bottom."""
+    rows: List[List[str]] = []
+    row: List[Tuple[float, str]] = []
+    row_top = row_bottom = 0.0
+    for top, bottom, left, text in sorted(boxes, key=lambda box: (-box[0], box[2])):
+        overlap = min(top, row_top) - max(bottom, row_bottom)
+        if row and overlap >= ROW_OVERLAP * min(top - bottom, row_top - row_bottom):
+            row.append((left, text))
+            row_bottom = min(row_bottom, bottom)
+            continue
+        if row:
+            rows.append([cell for _left, cell in sorted(row)])
+        row, row_top, row_bottom = [(left, text)], top, bottom
+    if row:
+        rows.append([cell for _left, cell in sorted(row)])
+    return rows
+
+
+def _read_layout(ltpage: LTPage) -> PageLayout:
+    """Walk a page layout once, collecting its text and the position of every text line."""
+    parts: List[str] = []
+    boxes: List[Tuple[float, float, float, str]] = []
+
+    def render(item) -> None:
+        # Same traversal as TextConverter.receive_layout, so the text is unchanged
+        if isinstance(item, LTTextLine):
+            text = item.get_text()
+            parts.append(text)
+            cell = text.strip()
+            if cell:
+                boxes.append((item.y1, item.y0, item.x0, cell))
+        elif isinstance(item, LTContainer):
+            for child in item:
+                render(child)
+        elif isinstance(item, LTText):
+            parts.append(item.get_text())
+        if isinstance(item, LTTextBox):
+            parts.append("\n")
+
+    render(ltpage)
+    parts.append("\f")
+    return PageLayout("".join(parts).splitlines(), _group_rows(boxes))
+
+
+def _iter_pages(pdf_file: IO[bytes], first: int = 0, last: int = 0) -> Iterator[PageLayout]:
+    """Lay out pages ``first`` to ``last - 1`` (to the end when ``last`` is 0), yielding each page's text and table rows."""
+    # One parse of the document and one resource cache (fonts) for the whole range
+    resources = PDFResourceManager(caching=True)
+    device = PDFPageAggregator(resources, laparams=LAParams())
+    interpreter = PDFPageInterpreter(resources, device)
+    pagenos = set(range(first, last)) if first else None
+    try:
+        for page in PDFPage.get_pages(pdf_file, pagenos=pagenos, maxpages=last, caching=True):
+            interpreter.process_page(page)
+            yield _read_layout(device.get_result())
+    finally:
+        device.close()
+
+
+def extract_page_layouts(pdf_path: str, first: int, last: int) -> List[PageLayout]:
+    """Layouts of pages ``first`` to ``last - 1``, fewer past the end of the document.
+
+    Module-level so it can run in a worker process; the document is read
+    from ``pdf_path`` so only the path, not the PDF, is sent with each task.
+    """
+    with open(pdf_path, "rb") as pdf_file:
+        return list(_iter_pages(pdf_file, first, last))
+
+
+def iter_pdf_pages(pdf_bytes: bytes, stop: Optional[Callable[[], bool]] = None,
+                   max_pages: int = MAX_PDF_PAGES) -> Iterator[PageLayout]:
+    """Yield the layout (text lines and table rows) of each PDF page in order, laying pages out in parallel.
+
+    Page ranges are extracted on a process pool with a bounded number of
+    tasks in flight and yielded in page order as each range completes, so
+    the consumer sees the first pages while later ones are still being
+    laid out. The PDF is written to a temporary file once and workers read
+    it from there. The page count is not read up front: ranges are handed
+    out until one comes back short, which marks the end of the document.
+    ``stop`` is checked after every page; once it returns True (or
+    ``max_pages`` pages were read) no further pages are extracted and
+    queued work is cancelled. Closing the generator early does the same.
+    Without a pool the pages are laid out lazily in this process.
+    """
+    pool = _get_pool()
+    if pool is None:
+        for layout in _iter_pages(io.BytesIO(pdf_bytes), last=max_pages):
+            yield layout
+            if stop is not None and stop():
+                return
+        return
+
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as pdf_file:
+        pdf_file.write(pdf_bytes)
+    window = 2 * PDF_WORKERS
+    pending: Deque[Tuple[Future, int, int]] = deque()
+    next_page = 0
+    end = max_pages or None  # Page count, once known
+    try:
+        while True:
+            while (end is None or next_page < end) and len(pending) < window:
+                last = next_page + PAGES_PER_TASK if end is None else min(next_page + PAGES_PER_TASK, end)
+                pending.append((pool.submit(extract_page_layouts, pdf_path, next_page, last), next_page, last))
+                next_page = last
+            if not pending:
+                return
+            future, first, last = pending.popleft()
+            layouts = future.result()
+            if len(layouts) < last - first:
+                # The document ends in this range; later ranges are empty
+                end = first + len(layouts)
+                for later, _first, _last in pending:
+                    later.cancel()
+                pending.clear()
+            for layout in layouts:
+                yield layout
+                if stop is not None and stop():
+                    return
+    finally:
+        for future, _first, _last in pending:
+            future.cancel()
+        try:
+            os.unlink(pdf_path)
+        except OSError:
+            pass
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import os
+import secrets
+import threading
+import time
+
+
+class SessionStore:
+    """Bounded in-process store that hands out opaque handles for parsed results.
+
+    Entries expire ``ttl_seconds`` after they were stored and the least
+    recently used ones are evicted once the entry count or the approximate
+    total size exceeds its bound. Handles are random, so they cannot be
+    guessed or enumerated by other clients.
+    """
+
+    def __init__(self, ttl_seconds: float = 900, max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.expirations = 0
+        self.evictions = 0
+
+    def put(self, value: Any, size: int) -> str:
+        handle = secrets.token_urlsafe(16)
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            self._entries[handle] = (time.monotonic() + self.ttl_seconds, size, value)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _handle, (_expires, evicted_size, _value) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return handle
+
+    def get(self, handle: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return None
+            expires, size, value = entry
+            if expires <= time.monotonic():
+                del self._entries[handle]
+                self._bytes -= size
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(handle)
+            return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
+
+    def _purge_expired(self, now: float) -> None:
+        # Caller holds the lock; expiry order matches insertion order except for touched entries
+        for handle in [h for h, (expires, _size, _value) in self._entries.items() if expires <= now]:
+            _expires, size, _value = self._entries.pop(handle)
+            self._bytes -= size
+            self.expirations += 1
+
+
+edi_sessions = SessionStore(
+    ttl_seconds=float(os.environ.get("EDI_SESSION_TTL_SECONDS", "900")),
+    max_entries=int(os.environ.get("EDI_SESSION_MAX_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("EDI_SESSION_MAX_BYTES", str(256 * 1024 * 1024))),
+)
@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from .spec_parser import PARSER_VERSION, render_spec_xml
+from .spec_registry import SpecProfile, compile_profile
+
+
+class CachedSpec:
+    """Everything parse_document_spec produces for one document.
+
+    The XML is not stored; ``xml`` renders it from the fields on access,
+    since most lookups only need the requirements and status map. The
+    partner profile built from the document's element tables is compiled
+    on first use and kept with the entry, so neither the layout pass nor
+    the compile runs again for the same document.
+    """
+
+    __slots__ = ("doc_type", "requirements", "fields", "status_map", "filename", "scan", "definitions",
+                 "size", "_profile")
+
+    def __init__(self, doc_type: str, requirements: Dict[str, bool], fields: Set[str], status_map: Dict[str, str],
+                 filename: str = "", scan: Optional[Dict[str, Any]] = None,
+                 definitions: Optional[Dict[str, Dict[str, str]]] = None):
+        self.doc_type = doc_type
+        self.requirements = requirements
+        self.fields = set(fields)
+        self.status_map = status_map
+        self.filename = filename
+        self.scan = scan  # ScanStats.to_dict() of the scan that produced this entry
+        self.definitions = definitions or {}  # Field definitions read from table rows
+        self._profile: Optional[SpecProfile] = None
+        # Rough footprint used for the byte bound
+        self.size = len(filename) + 16 * (len(requirements) + len(self.fields) + len(status_map)) \
+            + 64 * len(self.definitions)
+
+    @property
+    def xml(self) -> str:
+        return render_spec_xml(self.doc_type, self.filename, self.requirements, self.fields)
+
+    def profile(self) -> Optional[SpecProfile]:
+        """Profile whose field rules come from the document's tables, or None if it had none."""
+        if not self.definitions:
+            return None
+        if self._profile is None:
+            # Table rows only override what they state; the rest stays the built-in definition
+            self._profile = compile_profile(f"spec:{self.filename or 'document'}",
+                                            {"name": self.filename, "fields": self.definitions})
+        return self._profile
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "parser_version": PARSER_VERSION,
+            "doc_type": self.doc_type,
+            "requirements": self.requirements,
+            "fields": sorted(self.fields),
+            "status_map": self.status_map,
+            "filename": self.filename,
+            "scan": self.scan,
+            "definitions": self.definitions,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CachedSpec":
+        """Rebuild an entry; raises ValueError for one written by another parser version."""
+        version = data.get("parser_version")
+        if version != PARSER_VERSION:
+            raise ValueError(f"Spec parsed by parser version {version}, current version is {PARSER_VERSION}")
+        return cls(data["doc_type"], data["requirements"], set(data["fields"]), data["status_map"], data.get("filename", ""),
+                   data.get("scan"), data.get("definitions"))
+
+
+def spec_id_for(file_bytes: bytes) -> str:
+    """Content address of a spec document (SHA-256 of its bytes)."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+class SpecCache:
+    """LRU cache of parsed specs keyed by content hash.
+
+    The in-memory tier is bounded by entry count and approximate size; an
+    optional directory adds a persistent tier that survives restarts and is
+    consulted on memory misses. Persisted entries record the PARSER_VERSION
+    that produced them; one from another version is a miss, so the document
+    is parsed again and the file rewritten.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024, persist_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        if self.persist_dir is not None:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, CachedSpec]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, spec_id: str) -> Optional[CachedSpec]:
+        with self._lock:
+            spec = self._entries.get(spec_id)
+            if spec is not None:
+                self._entries.move_to_end(spec_id)
+                self.hits += 1
+                return spec
+        spec = self._load(spec_id)
+        with self._lock:
+            if spec is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(spec_id, spec)
+        return spec
+
+    def put(self, spec_id: str, spec: CachedSpec) -> None:
+        with self._lock:
+            self._insert(spec_id, spec)
+        self._store(spec_id, spec)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "persistent": self.persist_dir is not None,
+            }
+
+    def _insert(self, spec_id: str, spec: CachedSpec) -> None:
+        # Caller holds the lock
+        previous = self._entries.pop(spec_id, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._entries[spec_id] = spec
+        self._bytes += spec.size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _evicted_id, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def _path(self, spec_id: str) -> Optional[Path]:
+        # Only hex digests are valid IDs; anything else could escape the directory
+        if self.persist_dir is None or len(spec_id) != 64 or not all(c in "0123456789abcdef" for c in spec_id):
+            return None
+        return self.persist_dir / f"{spec_id}.json"
+
+    def _load(self, spec_id: str) -> Optional[CachedSpec]:
+        path = self._path(spec_id)
+        if path is None or not path.exists():
+            return None
+        try:
+            with path.open("r", encoding="utf-8") as fh:
+                return CachedSpec.from_dict(json.load(fh))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store(self, spec_id: str, spec: CachedSpec) -> None:
+        path = self._path(spec_id)
+        if path is None:
+            return
+        try:
+            # Write then rename so readers never see a partial file
+            fd, tmp_name = tempfile.mkstemp(dir=str(self.persist_dir), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(spec.to_dict(), fh)
+            os.replace(tmp_name, path)
+        except OSError:
+            pass
+
+
+spec_cache = SpecCache(
+    max_entries=int(os.environ.get("SPEC_CACHE_MAX_ENTRIES", "64")),
+    max_bytes=int(os.environ.get("SPEC_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    persist_dir=os.environ.get("SPEC_CACHE_DIR") or None,
+)
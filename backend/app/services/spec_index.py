@@ -0,0 +1,157 @@
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional, Tuple
+
+from .element_types import ID_CODE_LISTS, TypeChecker, compile_type_checker
+from .spec_parser import EDI_810_FIELDS
+
+
+# Status bits; a field's ``status_bit`` is exactly one of these
+STATUS_MANDATORY = 1
+STATUS_OPTIONAL = 2
+STATUS_CONDITIONAL = 4
+STATUS_BITS = {"M": STATUS_MANDATORY, "O": STATUS_OPTIONAL, "X": STATUS_CONDITIONAL}
+
+# EDI 810 segments with their usage patterns, in transaction-set order
+EDI_810_SEGMENTS = {
+    "ISA": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
+    "GS": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
+    "ST": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
+    "BIG": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
+    "REF": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "12"},
+    "N1": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "1", "max_usage": "200"},
+    "N2": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "2"},
+    "N3": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "2"},
+    "N4": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1"},
+    "PER": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "3"},
+    "ITD": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "10"},
+    "DTM": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "10"},
+    "FOB": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1"},
+    "CUR": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1"},
+    "IT1": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "999999"},
+    "PID": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "200"},
+    "SAC": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "25"},
+    "TXI": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "10"},
+    "SLN": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1000"},
+    "TDS": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
+    "ISS": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1"},
+    "CTT": {"x12_requirement": "optional", "company_usage": "used", "min_usage": "0", "max_usage": "1"},
+    "SE": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
+    "GE": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"},
+    "IEA": {"x12_requirement": "mandatory", "company_usage": "must_use", "min_usage": "1", "max_usage": "1"}
+}
+
+# Interchange and group envelopes wrap every transaction set they contain
+ENVELOPE_SEGMENTS = frozenset({"ISA", "GS", "GE", "IEA"})
+
+
+def split_tag(tag: str) -> Tuple[str, int]:
+    """Split an element tag like ``IT102`` into (segment, position): ('IT1', 2)."""
+    # Tags are always the segment ID followed by a two-digit element position
+    if len(tag) > 2 and tag[-2:].isdigit():
+        return tag[:-2], int(tag[-2:])
+    return tag, 0
+
+
+def parse_length(length_spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse "min/max" (e.g. "1/22"); returns None if it cannot be parsed."""
+    try:
+        min_length, max_length = map(int, length_spec.split('/'))
+    except (ValueError, AttributeError):
+        return None
+    return min_length, max_length
+
+
+class FieldRule:
+    """Precompiled definition of one element."""
+
+    __slots__ = ("tag", "segment", "position", "name", "status", "status_bit", "usage", "cardinality",
+                 "type", "length", "min_length", "max_length", "codes", "check")
+
+    def __init__(self, tag: str, info: Mapping[str, Any]):
+        self.tag = tag
+        self.segment, self.position = split_tag(tag)
+        self.name = info.get("name", "Unknown Field")
+        self.status = (info.get("status") or "O").upper()
+        self.status_bit = STATUS_BITS.get(self.status, STATUS_OPTIONAL)
+        self.usage = info.get("usage", "Unknown usage")
+        # Kept as given (None when absent) so callers can apply their own defaults
+        self.cardinality = info.get("cardinality")
+        self.type = info.get("type")
+        self.length = info.get("length")
+        # Fields without a declared length are validated as "1/1", as before
+        bounds = parse_length(self.length or "1/1")
+        self.min_length, self.max_length = bounds if bounds else (None, None)
+        # ID elements may carry a code list; otherwise the built-in lists apply
+        codes = info.get("codes") or (ID_CODE_LISTS.get(tag) if self.type == "ID" else None)
+        self.codes: Optional[frozenset] = frozenset(codes) if codes else None
+        self.check: Optional[TypeChecker] = compile_type_checker(self.type, self.codes)
+
+
+class SegmentRule:
+    """Precompiled usage limits for one segment."""
+
+    __slots__ = ("tag", "x12_requirement", "company_usage", "min_usage", "max_usage", "min_count", "max_count")
+
+    def __init__(self, tag: str, info: Mapping[str, str]):
+        self.tag = tag
+        self.x12_requirement = info["x12_requirement"]
+        self.company_usage = info["company_usage"]
+        self.min_usage = info["min_usage"]
+        self.max_usage = info["max_usage"]
+        self.min_count = int(self.min_usage)
+        self.max_count = int(self.max_usage)
+
+
+class SpecIndex:
+    """Immutable, precompiled view of a field specification.
+
+    Built once from a field dictionary (EDI_810_FIELDS by default) so the
+    compare functions can do dict lookups instead of rescanning the spec
+    and re-parsing length strings on every request. Pickling (to hand the
+    index to a process executor) sends the source definitions, and the
+    index is rebuilt on the other side.
+    """
+
+    __slots__ = ("fields", "segments", "mandatory", "optional", "_field_defs", "_segment_defs")
+
+    def __init__(self, field_defs: Mapping[str, Mapping[str, Any]], segment_defs: Mapping[str, Mapping[str, str]]):
+        fields = {tag: FieldRule(tag, info) for tag, info in field_defs.items()}
+
+        self.fields: Mapping[str, FieldRule] = MappingProxyType(fields)
+        self.segments: Mapping[str, SegmentRule] = MappingProxyType(
+            {tag: SegmentRule(tag, info) for tag, info in segment_defs.items()}
+        )
+        self.mandatory: Tuple[str, ...] = tuple(t for t, r in fields.items() if r.status_bit == STATUS_MANDATORY)
+        self.optional: Tuple[str, ...] = tuple(t for t, r in fields.items() if r.status_bit == STATUS_OPTIONAL)
+        # Plain copies of the definitions; the compiled rules (checkers, proxies) cannot be pickled
+        self._field_defs = {tag: dict(info) for tag, info in field_defs.items()}
+        self._segment_defs = {tag: dict(info) for tag, info in segment_defs.items()}
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if hasattr(self, name):
+            raise AttributeError(f"SpecIndex is immutable; cannot reassign {name}")
+        object.__setattr__(self, name, value)
+
+    def __reduce__(self):
+        if self is DEFAULT_SPEC_INDEX:
+            # Unpickled as the receiving process's own module-level index
+            return "DEFAULT_SPEC_INDEX"
+        return SpecIndex, (self._field_defs, self._segment_defs)
+
+    def get(self, tag: str) -> Optional[FieldRule]:
+        return self.fields.get(tag)
+
+
+def build_spec_index(field_defs: Optional[Mapping[str, Mapping[str, Any]]] = None,
+                     segment_defs: Optional[Mapping[str, Mapping[str, str]]] = None) -> SpecIndex:
+    return SpecIndex(field_defs if field_defs is not None else EDI_810_FIELDS,
+                     segment_defs if segment_defs is not None else EDI_810_SEGMENTS)
+
+
+# Compiled once at import for the built-in EDI 810 specification
+DEFAULT_SPEC_INDEX = build_spec_index()
+
+
+def present_segments(present_fields: Iterable[str]) -> set:
+    """Segment IDs for a set of element tags, derived exactly rather than by prefix."""
+    return {split_tag(tag)[0] for tag in present_fields}
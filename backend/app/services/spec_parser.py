@@ -1,11 +1,13 @@
-from typing import Dict, Tuple, Set, List
-from pdfminer.high_level import extract_text
-from pdfminer.layout import LAParams
-from pdfminer.converter import TextConverter
-from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
-from pdfminer.pdfpage import PDFPage
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Set, List
 import re
 import io
+import os
+import time
+
+from .docx_blocks import iter_docx_blocks
+from .pdf_pages import iter_pdf_pages
+from .spec_tables import TableSpec
+from .xml_writer import escape_attribute, escape_text
 
 
 MANDATORY_HINTS = {"M", "Mandatory", "Required"}
@@ -172,6 +174,76 @@ EDI_810_FIELDS = {
 }
 
 
+# Every segment the spec can define fields for
+SPEC_SEGMENTS = frozenset(tag[:-2] for tag in EDI_810_FIELDS)
+
+def _alternation(words: Iterable[str]) -> str:
+    """Regex alternation of ``words`` factored by common prefix (BIG|C(?:TT|UR)|...)."""
+    branches: Dict[str, List[str]] = {}
+    for word in sorted(words):
+        branches.setdefault(word[0], []).append(word[1:])
+    parts = []
+    for first, rests in branches.items():
+        tails = [rest for rest in rests if rest]
+        if not tails:
+            parts.append(re.escape(first))
+            continue
+        inner = _alternation(tails)
+        grouped = f"(?:{inner})" if "|" in inner or len(tails) < len(rests) else inner
+        parts.append(re.escape(first) + grouped + ("?" if len(tails) < len(rests) else ""))
+    return "|".join(parts)
+
+
+# One scan per spec line finds both the element references and the status markers.
+# Element references are case-sensitive and limited to known segment IDs, so
+# IT101 reads as IT1 + 01; the IDs are factored into a prefix tree so each
+# position costs one character test, not one per segment. Status markers --
+# (M), " M ", " M,", " M:", "|M|", tab-delimited M and "Status M" -- match in
+# any case and consume only what precedes the letter, so adjacent markers such
+# as " O M " are all seen.
+SPEC_LINE_PATTERN = re.compile(
+    r"(?<![A-Za-z0-9_])(?P<seg>" + _alternation(SPEC_SEGMENTS) + r")(?P<num>\d{1,2})\b"
+    r"|\((?P<paren>[MOXmox])\)"
+    r"|\t(?P<tabbed>[MOXmox])(?=\t)"
+    r"|\|(?P<piped>[MOXmox])(?=\|)"
+    r"| (?:[Ss][Tt][Aa][Tt][Uu][Ss] (?P<labelled>[MOXmox])|(?P<spaced>[MOXmox])(?=[ ,:]))"
+)
+# Element reference as written (BIG02, or BIG2) -> field tag, for every known field
+_FIELD_REFERENCES = {f"{tag[:-2]}{number}": tag for tag in EDI_810_FIELDS
+                     for number in {tag[-2:], str(int(tag[-2:]))}}
+_STATUS_PRIORITY = "MOX"
+_TOKEN_STRIP = "|,;:- "
+
+
+def analyze_spec_line(line: str) -> Tuple[List[str], str]:
+    """Return the known field tags a spec line references and its status letter (M/O/X or "").
+
+    Explicit markers win in the order M > O > X; without one, a bare M/O/X
+    among the last three tokens is used.
+    """
+    tags: List[str] = []
+    statuses = ""
+    for seg, num, paren, tabbed, piped, labelled, spaced in SPEC_LINE_PATTERN.findall(line):
+        if seg:
+            tag = _FIELD_REFERENCES.get(seg + num)
+            if tag is not None:
+                tags.append(tag)
+        else:
+            statuses += paren or tabbed or piped or labelled or spaced
+    if not tags:
+        return tags, ""
+    statuses = statuses.upper()
+    for letter in _STATUS_PRIORITY:
+        if letter in statuses:
+            return tags, letter
+    # Fallback: single-letter at end of tokenized columns
+    for token in line.rsplit(None, 3)[-3:]:
+        token = token.strip(_TOKEN_STRIP).upper()
+        if token in ("M", "O", "X"):
+            return tags, token
+    return tags, ""
+
+
 def detect_file_type(file_bytes: bytes, filename: str = "") -> str:
     """Detect the file type based on content and filename."""
     # Check file signature (magic numbers)
@@ -204,157 +276,275 @@ def detect_file_type(file_bytes: bytes, filename: str = "") -> str:
             return 'unknown'
 
 
-def extract_text_from_document(file_bytes: bytes, filename: str = "") -> List[str]:
-    """Extract text from various document types line by line - optimized version."""
-    lines = []
-    file_type = detect_file_type(file_bytes, filename)
-    
-    # Limit file size for performance (max 5MB)
-    if len(file_bytes) > 5 * 1024 * 1024:
-        file_bytes = file_bytes[:5 * 1024 * 1024]
-    
-    try:
-        if file_type == 'pdf':
-            # Fast path: try raw text extraction first
-            try:
-                raw_text = file_bytes.decode(errors="ignore")
-                if "BIG01" in raw_text or "ISA01" in raw_text:  # Quick check for EDI content
-                    lines = raw_text.splitlines()
-                else:
-                    # Use pdfminer only if needed
-                    text = extract_text(io.BytesIO(file_bytes))
-                    if text:
-                        lines = text.splitlines()
-            except Exception:
-                # Fallback to pdfminer
-                text = extract_text(io.BytesIO(file_bytes))
-                if text:
-                    lines = text.splitlines()
-        
-        elif file_type == 'txt':
-            # Handle plain text files (fastest)
+# Version of the output of parse_document_spec; bump it whenever a document would parse
+# differently, so spec cache entries persisted by an older parser are re-parsed, not reused
+PARSER_VERSION = 1
+
+# Non-empty lines read from a document before the analyzer stops; 0 means the whole document
+MAX_SPEC_LINES = int(os.environ.get("SPEC_MAX_LINES", "0"))
+# Longer lines are prose or layout noise rather than element definitions
+MAX_SPEC_LINE_LENGTH = 500
+
+
+class ScanStats:
+    """How much of a spec document one scan covered and where the time went."""
+
+    __slots__ = ("doc_type", "pages", "lines", "matched_lines", "table_rows", "table_fields", "stopped_early",
+                 "fallback", "extract_seconds", "normalize_seconds", "match_seconds")
+
+    def __init__(self, doc_type: str = ""):
+        self.doc_type = doc_type
+        self.pages: Optional[int] = None  # Only paginated formats (PDF) count pages
+        self.lines = 0  # Non-empty lines handed to the matcher
+        self.matched_lines = 0  # Lines that defined at least one known field
+        self.table_rows = 0  # Table rows read from the layout (PDF) or the table markup (DOCX)
+        self.table_fields = 0  # Fields defined by one of those rows
+        self.stopped_early = False  # Every segment was found (or a budget ran out) before the end
+        self.fallback = False  # Nothing matched; the header-only default spec was used
+        self.extract_seconds = 0.0
+        self.normalize_seconds = 0.0
+        self.match_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "doc_type": self.doc_type,
+            "pages": self.pages,
+            "lines": self.lines,
+            "matched_lines": self.matched_lines,
+            "table_rows": self.table_rows,
+            "table_fields": self.table_fields,
+            "stopped_early": self.stopped_early,
+            "fallback": self.fallback,
+            "timings_ms": {
+                "extract": round(self.extract_seconds * 1000, 2),
+                "normalize": round(self.normalize_seconds * 1000, 2),
+                "match": round(self.match_seconds * 1000, 2),
+            },
+        }
+
+
+def _iter_text_lines(file_bytes: bytes, strict: bool = False) -> Iterator[str]:
+    """Decode a document one line at a time instead of copying it into one string.
+
+    With ``strict`` each line is UTF-8 or else Latin-1; otherwise invalid
+    UTF-8 bytes are dropped. UTF-8 never uses the newline byte inside a
+    multi-byte character, so splitting on it first is safe.
+    """
+    for raw in io.BytesIO(file_bytes):
+        if strict:
             try:
-                text = file_bytes.decode('utf-8')
+                text = raw.decode('utf-8')
             except UnicodeDecodeError:
-                text = file_bytes.decode('latin-1', errors="ignore")
-            lines = text.splitlines()
-        
-        elif file_type == 'docx':
-            # Simplified DOCX handling
-            try:
-                import zipfile
-                import xml.etree.ElementTree as ET
-                
-                with zipfile.ZipFile(io.BytesIO(file_bytes)) as docx_zip:
-                    doc_xml = docx_zip.read('word/document.xml')
-                    # Simple text extraction without full parsing
-                    text_content = doc_xml.decode(errors="ignore")
-                    # Extract text between tags
-                    import re
-                    text_matches = re.findall(r'<w:t[^>]*>([^<]+)</w:t>', text_content)
-                    lines = [match.strip() for match in text_matches if match.strip()]
-            except Exception:
-                # Fallback to raw text
-                text = file_bytes.decode(errors="ignore")
-                lines = text.splitlines()
-        
+                text = raw.decode('latin-1')
         else:
-            # Default: raw text extraction
-            text = file_bytes.decode(errors="ignore")
-            lines = text.splitlines()
-            
-    except Exception:
-        # Final fallback
+            text = raw.decode(errors="ignore")
+        yield from text.splitlines()
+
+
+def extract_lines(file_bytes: bytes, file_type: str, stop: Optional[Callable[[], bool]] = None,
+                  stats: Optional[ScanStats] = None,
+                  on_row: Optional[Callable[[Sequence[str]], object]] = None) -> Iterator[str]:
+    """Extract stage: raw text lines of a document, produced as they are read.
+
+    PDFs are laid out page by page in parallel (see iter_pdf_pages); ``stop``
+    is checked at page boundaries so extraction ends as soon as the caller
+    has what it needs. Each page's table rows (cells left to right) go to
+    ``on_row`` before its lines are yielded. DOCX is streamed paragraph by
+    paragraph (see iter_docx_blocks); each table row goes to ``on_row`` and
+    is then yielded as one tab-separated line. Other formats are decoded
+    line by line.
+    """
+    if file_type == 'pdf':
+        # Fast path: uncompressed PDFs carrying the element IDs can be read raw
+        if b"BIG01" in file_bytes or b"ISA01" in file_bytes:
+            yield from _iter_text_lines(file_bytes)
+            return
+        if stats is not None:
+            stats.pages = 0
         try:
-            text = file_bytes.decode(errors="ignore")
-            lines = text.splitlines()
+            for page in iter_pdf_pages(file_bytes, stop):
+                if stats is not None:
+                    stats.pages += 1
+                if on_row is not None:
+                    for cells in page.rows:
+                        on_row(cells)
+                yield from page.lines
         except Exception:
-            lines = []
-    
-    # Limit number of lines for performance
-    return [line.strip() for line in lines[:1000] if line.strip()]
+            if stats is not None and stats.pages:
+                # Keep what was extracted rather than mixing in raw PDF syntax
+                return
+            yield from _iter_text_lines(file_bytes)
 
+    elif file_type == 'txt':
+        # Handle plain text files (fastest)
+        yield from _iter_text_lines(file_bytes, strict=True)
 
-def parse_document_spec_to_xml(file_bytes: bytes, filename: str = "") -> Tuple[str, Dict[str, bool], Set[str], Dict[str, str]]:
+    elif file_type == 'docx':
+        produced = False
+        try:
+            for block in iter_docx_blocks(file_bytes):
+                produced = True
+                if isinstance(block, tuple):
+                    if on_row is not None:
+                        on_row(block)
+                    yield "\t".join(block)
+                else:
+                    yield block
+        except Exception:
+            if produced:
+                return
+            # Not a readable DOCX; fall back to raw text
+            yield from _iter_text_lines(file_bytes)
+
+    else:
+        # Default: raw text extraction
+        yield from _iter_text_lines(file_bytes)
+
+
+def normalize_lines(lines: Iterable[str], stats: Optional[ScanStats] = None) -> Iterator[str]:
+    """Normalize stage: stripped, non-empty lines of a sensible length."""
+    scanned = 0
+    try:
+        for line in lines:
+            line = line.strip()
+            if not line or len(line) > MAX_SPEC_LINE_LENGTH:
+                continue
+            scanned += 1
+            yield line
+            if scanned == MAX_SPEC_LINES:
+                if stats is not None:
+                    stats.stopped_early = True
+                return
+    finally:
+        if stats is not None:
+            stats.lines += scanned
+
+
+def _timed(iterable: Iterable[str], timings: Dict[str, float], stage: str) -> Iterator[str]:
+    """Pass items through, adding the time spent producing them (upstream included) to ``timings[stage]``."""
+    iterator = iter(iterable)
+    clock = time.perf_counter
+    spent = 0.0
+    try:
+        while True:
+            started = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                spent += clock() - started
+            yield item
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + spent
+
+
+def iter_document_lines(file_bytes: bytes, filename: str = "", stop: Optional[Callable[[], bool]] = None,
+                        stats: Optional[ScanStats] = None) -> Iterator[str]:
+    """Yield the normalized text lines of a whole document as they are extracted."""
+    file_type = detect_file_type(file_bytes, filename)
+    return normalize_lines(extract_lines(file_bytes, file_type, stop, stats), stats)
+
+
+def extract_text_from_document(file_bytes: bytes, filename: str = "") -> List[str]:
+    """Extract text from various document types line by line - optimized version."""
+    return list(iter_document_lines(file_bytes, filename))
+
+
+def parse_document_spec(file_bytes: bytes, filename: str = "") -> Tuple[str, Dict[str, bool], Set[str], Dict[str, str], Dict[str, Dict[str, str]], ScanStats]:
     """Extract field list from any document type using high-level line-by-line parsing.
 
     This function parses documents (PDF, DOC, DOCX, TXT) line by line to identify 
-    EDI 810 fields and their mandatory/optional status.
+    EDI 810 fields and their mandatory/optional status. The document is
+    streamed through extract -> normalize -> match generators, so the whole
+    of it is covered while only the current page or line is held in
+    memory. No XML is built; pass the result to render_spec_xml() when it
+    is needed.
+
+    PDF and DOCX element tables are also read row by row (see
+    spec_tables); a field defined by a table row takes its status from the
+    row's status column rather than from the line heuristics, and the row's
+    name, type and min/max length are returned as its definition.
 
     Returns:
-        xml: XML representation of the parsed fields
+        doc_type: detected document type
         requirements: map of field tag -> is_required
         all_fields: set of field tags found
+        status_map: map of field tag -> status letter (M/O/X)
+        definitions: map of field tag -> name/status/type/length read from table rows
+        stats: pages and lines scanned and the time spent per stage
     """
+    doc_type = detect_file_type(file_bytes, filename)
+    stats = ScanStats(doc_type)
     requirements: Dict[str, bool] = {}
     status_map: Dict[str, str] = {}
     found_fields: Set[str] = set()
+    tables = TableSpec(_FIELD_REFERENCES)
     
-    # Extract text line by line from any document type
-    lines = extract_text_from_document(file_bytes, filename)
-    
-    def _infer_status_from_line(line_upper: str) -> str:
-        """Infer status letter (M/O/X) from a line of spec text (case-insensitive)."""
-        # Try common patterns like ' M ', '(M)', 'Status: M', '|M|', etc.
-        # Priority: M > O > X when multiple are present (rare)
-        if any(p in line_upper for p in ["(M)", " M ", " STATUS M", "\tM\t", "|M|", " M,", " M:"]):
-            return "M"
-        if any(p in line_upper for p in ["(O)", " O ", " STATUS O", "\tO\t", "|O|", " O,", " O:"]):
-            return "O"
-        if any(p in line_upper for p in ["(X)", " X ", " STATUS X", "\tX\t", "|X|", " X,", " X:"]):
-            return "X"
-        # Fallback: single-letter at end of tokenized columns
-        tokens = [t.strip("|,;:- ") for t in line_upper.split()]
-        for t in tokens[-3:]:
-            if t in {"M", "O", "X"}:
-                return t
-        return ""
+    # Segments seen so far; reading can stop once every 810 segment has turned up
+    found_segments: Set[str] = set()
 
+    def record_field(tag: str, status_letter: str) -> None:
+        found_fields.add(tag)
+        found_segments.add(tag[:-2])
+        # Determine requirement using spec line if available, else fallback to predefined
+        if status_letter:
+            # Treat X (not used) as optional for comparison purposes
+            requirements[tag] = (status_letter == 'M')
+            status_map[tag] = status_letter
+        else:
+            # Use predefined field status
+            predefined = EDI_810_FIELDS[tag]["status"]
+            requirements[tag] = predefined == "M"
+            # Map to M/O from predefined spec
+            status_map[tag] = 'M' if predefined.upper() == 'M' else 'O'
+    
     def analyze_line(line: str):
-        """Analyze a single line for EDI field patterns - optimized."""
-        # Skip very long lines to avoid performance issues
-        if len(line) > 500:
+        """Record the fields a line defines, with its status or the predefined one."""
+        tags, status_letter = analyze_spec_line(line)
+        if not tags:
             return
-            
-        line_upper = line.upper()
-        
-        # Quick check if line contains EDI patterns (expanded)
-        if not any(seg in line_upper for seg in [
-            'ISA','GS','ST','BIG','REF','N1','N2','N3','N4','PER','ITD','DTM','FOB','CUR',
-            'IT1','PID','SAC','TXI','SLN','TDS','ISS','CTT','SE','GE','IEA']):
-            return
-        
-        # Look for EDI field patterns (optimized regex)
-        field_matches = re.findall(r"\b([A-Z]{2,4})(\d{1,2})\b", line)
-        
-        for seg, num in field_matches:
-            tag = f"{seg}{int(num):02d}"
-            
-            # Only process known EDI fields to avoid unnecessary processing
-            if tag not in EDI_810_FIELDS:
-                continue
-                
-            found_fields.add(tag)
-            # Determine requirement using spec line if available, else fallback to predefined
-            status_letter = _infer_status_from_line(line_upper)
-            if status_letter:
-                # Treat X (not used) as optional for comparison purposes
-                requirements[tag] = (status_letter == 'M')
-                status_map[tag] = status_letter
-            else:
-                # Use predefined field status for better performance
-                requirements[tag] = EDI_810_FIELDS[tag]["status"] == "M"
-                # Map to M/O from predefined spec
-                predefined = EDI_810_FIELDS[tag]["status"]
-                status_map[tag] = 'M' if predefined.upper() == 'M' else 'O'
-
-    # Process each line
-    for line in lines:
-        if line:
-            analyze_line(line)
+        stats.matched_lines += 1
+        for tag in tags:
+            # A table row's status column is more reliable than the line heuristics
+            if tag not in tables.fields:
+                record_field(tag, status_letter)
+
+    def analyze_row(cells: Sequence[str]):
+        """Record the field a table row defines, with the row's status."""
+        tag = tables.add_row(cells)
+        if tag is not None:
+            record_field(tag, tables.fields[tag].get("status", ""))
+
+    fields_before_page = 0
+
+    def nothing_left_to_find() -> bool:
+        """Called after each page: stop once every field is known, or once every segment
+        has been seen and a further page added nothing (its element table is complete)."""
+        nonlocal fields_before_page
+        done = len(found_fields) == len(EDI_810_FIELDS) or (
+            found_segments >= SPEC_SEGMENTS and len(found_fields) == fields_before_page)
+        fields_before_page = len(found_fields)
+        stats.stopped_early = done
+        return done
+
+    # Lines are matched as they are extracted; each stage's time excludes the stages before it
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    extracted = _timed(extract_lines(file_bytes, doc_type, nothing_left_to_find, stats, analyze_row),
+                       timings, "extract")
+    for line in _timed(normalize_lines(extracted, stats), timings, "normalize"):
+        analyze_line(line)
+    total = time.perf_counter() - started
+    stats.extract_seconds = timings.get("extract", 0.0)
+    stats.normalize_seconds = timings.get("normalize", 0.0) - stats.extract_seconds
+    stats.match_seconds = total - timings.get("normalize", 0.0)
+    stats.table_rows = tables.rows
+    stats.table_fields = len(tables.fields)
     
     # If no fields found, use a minimal predefined header structure for resilience
     if not found_fields:
+        stats.fallback = True
         header_fields = [
             "ISA01","ISA02","ISA03","ISA04","ISA05","ISA06","ISA07","ISA08",
             "ISA09","ISA10","ISA11","ISA12","ISA13","ISA14","ISA15","ISA16",
@@ -368,12 +558,13 @@ def parse_document_spec_to_xml(file_bytes: bytes, filename: str = "") -> Tuple[s
                 requirements[field] = EDI_810_FIELDS[field]["status"] == "M"
                 status_map[field] = 'M' if EDI_810_FIELDS[field]["status"].upper() == 'M' else 'O'
     
-    # Detect document type for XML metadata
-    doc_type = detect_file_type(file_bytes, filename)
-    
-    # Build XML representation
-    xml_parts = [f"<Document type=\"{doc_type}\">"]
-    xml_parts.append(f"  <SourceFile>{filename or 'Unknown'}</SourceFile>")
+    return doc_type, requirements, found_fields, status_map, tables.fields, stats
+
+
+def render_spec_xml(doc_type: str, filename: str, requirements: Dict[str, bool], found_fields: Set[str]) -> str:
+    """Build the XML representation of a parsed spec."""
+    xml_parts = [f"<Document type=\"{escape_attribute(doc_type)}\">"]
+    xml_parts.append(f"  <SourceFile>{escape_text(filename or 'Unknown')}</SourceFile>")
     xml_parts.append("  <ParsedFields>")
     
     for tag in sorted(found_fields):
@@ -382,16 +573,28 @@ def parse_document_spec_to_xml(file_bytes: bytes, filename: str = "") -> Tuple[s
         
         xml_parts.append(f"    <Field>")
         xml_parts.append(f"      <Tag>{tag}</Tag>")
-        xml_parts.append(f"      <Name>{field_info['name']}</Name>")
+        xml_parts.append(f"      <Name>{escape_text(field_info['name'])}</Name>")
         xml_parts.append(f"      <Status>{status}</Status>")
-        xml_parts.append(f"      <Usage>{field_info['usage']}</Usage>")
+        xml_parts.append(f"      <Usage>{escape_text(field_info['usage'])}</Usage>")
         xml_parts.append(f"      <Required>{'true' if requirements.get(tag, False) else 'false'}</Required>")
         xml_parts.append(f"    </Field>")
     
     xml_parts.append("  </ParsedFields>")
     xml_parts.append("</Document>")
+    return "\n".join(xml_parts)
+
+
+def parse_document_spec_to_xml(file_bytes: bytes, filename: str = "") -> Tuple[str, Dict[str, bool], Set[str], Dict[str, str]]:
+    """Parse a spec document and render its XML in one call.
 
-    return "\n".join(xml_parts), requirements, found_fields, status_map
+    Returns:
+        xml: XML representation of the parsed fields
+        requirements: map of field tag -> is_required
+        all_fields: set of field tags found
+        status_map: map of field tag -> status letter (M/O/X)
+    """
+    doc_type, requirements, found_fields, status_map, _definitions, _stats = parse_document_spec(file_bytes, filename)
+    return render_spec_xml(doc_type, filename, requirements, found_fields), requirements, found_fields, status_map
 
 
 # Keep the old function for backward compatibility
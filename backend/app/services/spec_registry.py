@@ -0,0 +1,188 @@
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+import json
+import os
+import threading
+import time
+
+from .spec_index import DEFAULT_SPEC_INDEX, EDI_810_SEGMENTS, SpecIndex, build_spec_index
+from .spec_parser import EDI_810_FIELDS
+
+try:
+    import yaml
+except ImportError:  # YAML profiles are optional; JSON always works
+    yaml = None
+
+DEFAULT_PROFILE_ID = "default"
+PROFILE_SUFFIXES = (".json", ".yaml", ".yml")
+
+
+class ProfileError(Exception):
+    """Raised when a partner profile file cannot be read or compiled."""
+
+
+class SpecProfile:
+    """One compiled partner profile."""
+
+    __slots__ = ("profile_id", "name", "index", "path", "mtime", "loaded_at")
+
+    def __init__(self, profile_id: str, name: str, index: SpecIndex, path: Optional[Path] = None, mtime: float = 0.0):
+        self.profile_id = profile_id
+        self.name = name
+        self.index = index
+        self.path = path
+        self.mtime = mtime
+        self.loaded_at = time.time()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "profile_id": self.profile_id,
+            "name": self.name,
+            "fields": len(self.index.fields),
+            "mandatory_fields": len(self.index.mandatory),
+            "segments": len(self.index.segments),
+            "source": self.path.name if self.path is not None else None,
+            "loaded_at": self.loaded_at,
+        }
+
+
+def _merge(base: Mapping[str, Mapping[str, Any]], overrides: Mapping[str, Any], removed: List[str]) -> Dict[str, Dict[str, Any]]:
+    merged = {tag: dict(info) for tag, info in base.items()}
+    for tag, info in (overrides or {}).items():
+        if not isinstance(info, Mapping):
+            raise ProfileError(f"Definition of {tag} must be a mapping")
+        # Partial entries tweak the base definition; new tags are added as given
+        merged.setdefault(tag, {}).update(info)
+    for tag in removed or ():
+        merged.pop(tag, None)
+    return merged
+
+
+def compile_profile(profile_id: str, data: Mapping[str, Any], path: Optional[Path] = None,
+                    mtime: float = 0.0) -> SpecProfile:
+    """Compile a profile document into a SpecProfile.
+
+    A profile tweaks the built-in EDI 810 definitions::
+
+        name: Acme Retail
+        fields:
+          BIG02: {length: "1/10"}
+          REF02: {status: M}
+        segments:
+          REF: {min_usage: "1"}
+        remove_fields: [PID05]
+
+    ``fields`` and ``segments`` entries are merged over the built-in
+    definitions, so only the differences need to be listed.
+    """
+    if not isinstance(data, Mapping):
+        raise ProfileError(f"Profile {profile_id} must be a mapping")
+    fields = _merge(EDI_810_FIELDS, data.get("fields") or {}, data.get("remove_fields") or [])
+    segments = _merge(EDI_810_SEGMENTS, data.get("segments") or {}, data.get("remove_segments") or [])
+    try:
+        index = build_spec_index(fields, segments)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ProfileError(f"Profile {profile_id} is invalid: {e}")
+    return SpecProfile(profile_id, str(data.get("name") or profile_id), index, path, mtime)
+
+
+def load_profile_file(path: Path) -> SpecProfile:
+    mtime = path.stat().st_mtime
+    try:
+        with path.open("r", encoding="utf-8") as fh:
+            if path.suffix == ".json":
+                data = json.load(fh)
+            elif yaml is not None:
+                data = yaml.safe_load(fh)
+            else:
+                raise ProfileError(f"PyYAML is not installed; cannot load {path.name}")
+    except (OSError, ValueError) as e:
+        raise ProfileError(f"Cannot read {path.name}: {e}")
+    return compile_profile(path.stem, data, path, mtime)
+
+
+class SpecRegistry:
+    """Partner profiles loaded from a directory, compiled once and hot-reloaded.
+
+    Each ``<profile_id>.json`` / ``.yaml`` file becomes one profile. The
+    directory is rescanned at most every ``reload_interval`` seconds; only
+    files whose mtime changed are recompiled, and the new profile table is
+    swapped in as a whole, so requests already holding a SpecIndex keep
+    using it undisturbed. A file that fails to compile keeps its previous
+    version and the error is reported by ``stats``.
+    """
+
+    def __init__(self, directory: Optional[str] = None, reload_interval: float = 2.0):
+        self.directory = Path(directory) if directory else None
+        self.reload_interval = reload_interval
+        self._default = SpecProfile(DEFAULT_PROFILE_ID, "Built-in EDI 810", DEFAULT_SPEC_INDEX)
+        self._profiles: Dict[str, SpecProfile] = {DEFAULT_PROFILE_ID: self._default}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self.reloads = 0
+        self.refresh(force=True)
+
+    def get(self, profile_id: Optional[str] = None) -> Optional[SpecProfile]:
+        self.refresh()
+        return self._profiles.get(profile_id or DEFAULT_PROFILE_ID)
+
+    def profiles(self) -> List[SpecProfile]:
+        self.refresh()
+        return sorted(self._profiles.values(), key=lambda p: p.profile_id)
+
+    def refresh(self, force: bool = False) -> None:
+        """Rescan the directory if the reload interval has passed (or ``force``)."""
+        if self.directory is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+        # Only one thread rescans; the others keep serving the current table
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            self._checked_at = now
+            self._rescan()
+        finally:
+            self._lock.release()
+
+    def _rescan(self) -> None:
+        current = self._profiles
+        profiles = {DEFAULT_PROFILE_ID: self._default}
+        errors: Dict[str, str] = {}
+        changed = False
+        paths = sorted(p for p in self.directory.glob("*") if p.suffix in PROFILE_SUFFIXES) \
+            if self.directory.is_dir() else []
+        for path in paths:
+            previous = current.get(path.stem)
+            try:
+                if previous is not None and previous.path == path and previous.mtime == path.stat().st_mtime:
+                    profiles[path.stem] = previous
+                    continue
+                profiles[path.stem] = load_profile_file(path)
+                changed = True
+            except (OSError, ProfileError) as e:
+                errors[path.name] = str(e)
+                if previous is not None:
+                    profiles[path.stem] = previous
+        changed = changed or profiles.keys() != current.keys()
+        if changed:
+            # Single reference assignment: readers see the old table or the new one, never a mix
+            self._profiles = profiles
+            self.reloads += 1
+        self._errors = errors
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory) if self.directory is not None else None,
+            "profiles": len(self._profiles),
+            "reloads": self.reloads,
+            "errors": dict(self._errors),
+        }
+
+
+spec_registry = SpecRegistry(
+    directory=os.environ.get("SPEC_PROFILE_DIR") or None,
+    reload_interval=float(os.environ.get("SPEC_PROFILE_RELOAD_INTERVAL", "2")),
+)
@@ -0,0 +1,125 @@
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+import re
+
+from .element_types import TYPE_CHECKERS
+
+
+# Words a status column may hold -> status letter (X is conditional)
+STATUS_WORDS = {
+    "M": "M", "MAND": "M", "MANDATORY": "M", "REQ": "M", "REQUIRED": "M",
+    "O": "O", "OPT": "O", "OPTIONAL": "O",
+    "X": "X", "C": "X", "COND": "X", "CONDITIONAL": "X",
+}
+# Type column values; B (binary) has no value checker but is a valid type
+DATA_TYPES = frozenset(TYPE_CHECKERS) | {"B"}
+# Min/max written as one token: 1/22 or 1-22
+_LENGTH = re.compile(r"(\d{1,5})[/-](\d{1,5})")
+_CELL_STRIP = "|,;:()*. "
+
+
+def _read_length(tokens: Sequence[str], start: int) -> Optional[str]:
+    """Min/max length at ``tokens[start:]`` as "min/max", from one "1/22" token or two number columns."""
+    if start >= len(tokens):
+        return None
+    match = _LENGTH.fullmatch(tokens[start].strip(_CELL_STRIP))
+    if match is not None:
+        min_length, max_length = match.groups()
+    elif start + 1 < len(tokens) and tokens[start].isdigit() and tokens[start + 1].strip(_CELL_STRIP).isdigit():
+        min_length, max_length = tokens[start], tokens[start + 1].strip(_CELL_STRIP)
+    else:
+        return None
+    if int(min_length) > int(max_length):
+        return None
+    return f"{int(min_length)}/{int(max_length)}"
+
+
+def parse_table_row(cells: Sequence[str], references: Mapping[str, str]) -> Optional[Tuple[str, Dict[str, str]]]:
+    """Read one element table row (Ref, Id, Name, Req, Type, Min/Max) into (tag, definition).
+
+    ``references`` maps element references as written (BIG02, BIG2) to
+    field tags. The row is anchored on its first reference, then on a data
+    type directly followed by a min/max length; the status is the status
+    word nearest before the type, the name whatever lies between. Rows
+    without a recognisable status or type and length (headings, prose
+    mentioning an element) give None. The definition holds only the keys
+    the row supplied: ``name``, ``status``, ``type`` and ``length``.
+    """
+    tokens = [token for cell in cells for token in cell.split()]
+    for start, token in enumerate(tokens):
+        tag = references.get(token.strip(_CELL_STRIP))
+        if tag is not None:
+            break
+    else:
+        return None
+
+    definition: Dict[str, str] = {}
+    end = len(tokens)
+    for position in range(start + 1, len(tokens)):
+        data_type = tokens[position].strip(_CELL_STRIP).upper()
+        if data_type in DATA_TYPES:
+            length = _read_length(tokens, position + 1)
+            if length is not None:
+                definition["type"] = data_type
+                definition["length"] = length
+                end = position
+                break
+
+    # With a type column the status sits just before it (possibly behind a repeat count);
+    # without one only a cell holding nothing but a status word is trusted
+    status_at = None
+    if "type" in definition:
+        for position in range(end - 1, start, -1):
+            word = tokens[position].strip(_CELL_STRIP).upper()
+            if word in STATUS_WORDS:
+                status_at = position
+                break
+            if not word.isdigit() or position < end - 1:
+                break
+        if status_at is not None:
+            definition["status"] = STATUS_WORDS[tokens[status_at].strip(_CELL_STRIP).upper()]
+    else:
+        for cell in cells:
+            status = STATUS_WORDS.get(cell.strip(_CELL_STRIP).upper())
+            if status is not None:
+                definition["status"] = status
+                break
+        if not definition:
+            return None
+        return tag, definition
+
+    name_tokens = tokens[start + 1:status_at if status_at is not None else end]
+    if name_tokens and name_tokens[0].isdigit():
+        name_tokens = name_tokens[1:]  # Data element number column
+    if name_tokens:
+        definition["name"] = " ".join(name_tokens)
+    return tag, definition
+
+
+class TableSpec:
+    """Field definitions collected from the element tables of one spec document.
+
+    Rows are fed one at a time with ``add_row``; a field's first row wins,
+    later rows only fill in keys it did not give (an element repeated in
+    another loop does not override the first definition).
+    """
+
+    __slots__ = ("references", "fields", "rows", "matched_rows")
+
+    def __init__(self, references: Mapping[str, str]):
+        self.references = references
+        self.fields: Dict[str, Dict[str, str]] = {}
+        self.rows = 0
+        self.matched_rows = 0
+
+    def add_row(self, cells: Sequence[str]) -> Optional[str]:
+        """Record one table row; returns the field tag it defined, or None."""
+        self.rows += 1
+        parsed = parse_table_row(cells, self.references)
+        if parsed is None:
+            return None
+        self.matched_rows += 1
+        tag, definition = parsed
+        known = self.fields.setdefault(tag, {})
+        for key, value in definition.items():
+            known.setdefault(key, value)
+        return tag
@@ -0,0 +1,149 @@
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+import heapq
+
+from .field_store import FieldStore
+from .spec_index import ENVELOPE_SEGMENTS
+
+
+# EDI 810 transaction-set structure: per loop, its header segment (None for the
+# transaction set itself), its segments in the order they may appear, and the
+# nested loops. A loop's ID is its header segment ID.
+STRUCTURE_810: Dict[str, Tuple[Optional[str], Tuple[str, ...], Tuple[str, ...]]] = {
+    "ST": (None, (
+        "ST", "BIG", "NTE", "CUR", "REF", "YNQ", "PER", "N1", "ITD", "DTM", "FOB", "MEA", "PWK", "PKG", "L7",
+        "BAL", "INC", "PAM", "IT1", "TDS", "TXI", "CAD", "AMT", "SAC", "ISS", "CTT", "SE",
+    ), ("N1", "IT1", "SAC", "ISS")),
+    "N1": ("N1", ("N1", "N2", "N3", "N4", "REF", "PER", "DMG"), ()),
+    "IT1": ("IT1", (
+        "IT1", "CRC", "QTY", "CUR", "IT3", "TXI", "CTP", "PAM", "MEA", "PID", "PWK", "PKG", "PO4", "ITD",
+        "REF", "YNQ", "PER", "SDQ", "DTM", "CAD", "L7", "SR", "SAC", "SLN", "N1",
+    ), ("SAC", "SLN", "N1")),
+    "SLN": ("SLN", ("SLN", "DTM", "REF", "PID", "SAC", "TC2", "TXI"), ()),
+    "SAC": ("SAC", ("SAC", "TXI"), ()),
+    "ISS": ("ISS", ("ISS", "PID"), ()),
+}
+
+
+class StructureError:
+    """One segment that does not fit the transaction-set structure."""
+
+    __slots__ = ("position", "segment_id", "code", "message")
+
+    def __init__(self, position: int, segment_id: str, code: str, message: str):
+        self.position = position  # Segment index in the interchange (0-based)
+        self.segment_id = segment_id
+        self.code = code
+        self.message = message
+
+    def __str__(self):
+        return f"Segment {self.position + 1} ({self.segment_id}): {self.message}"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"position": self.position, "segment_id": self.segment_id, "code": self.code, "message": self.message}
+
+
+class _Loop:
+    __slots__ = ("loop_id", "order", "children")
+
+    def __init__(self, loop_id: str, header: Optional[str], segments: Tuple[str, ...], children: Tuple[str, ...]):
+        self.loop_id = loop_id
+        # A loop's own header is not a member: a repeat of it starts a new iteration one level up
+        self.order = {seg: i for i, seg in enumerate(segments) if seg != header}
+        self.children = frozenset(children)
+
+
+class StructureTable:
+    """Precompiled lookup tables for one transaction-set structure."""
+
+    def __init__(self, structure: Mapping[str, Tuple[Optional[str], Tuple[str, ...], Tuple[str, ...]]] = STRUCTURE_810,
+                 root: str = "ST"):
+        self.loops = {loop_id: _Loop(loop_id, *definition) for loop_id, definition in structure.items()}
+        self.root = self.loops[root]
+        # Loops each non-header segment belongs to, for explaining rejected segments
+        self.member_of: Dict[str, List[str]] = {}
+        for loop_id, (header, segments, _children) in structure.items():
+            for seg in segments:
+                if seg != header and seg not in self.loops:
+                    self.member_of.setdefault(seg, []).append(loop_id)
+
+
+DEFAULT_STRUCTURE = StructureTable()
+
+
+class StructureValidator:
+    """Linear-time state machine over segment IDs.
+
+    The state is a stack of (loop, last position) pairs, at most a few
+    deep, so each segment costs O(1): it is accepted at the innermost open
+    loop that allows it at or after the current position (opening a nested
+    loop for a loop header, closing deeper loops otherwise). A segment no
+    open loop accepts is reported and otherwise ignored.
+    """
+
+    def __init__(self, table: StructureTable = DEFAULT_STRUCTURE):
+        self.table = table
+        self.errors: List[StructureError] = []
+        self._stack: List[List] = []  # [loop, position] pairs; empty outside a transaction set
+
+    def feed(self, seg_id: str, position: int) -> None:
+        if seg_id == self.table.root.loop_id:
+            # A new transaction set; an unterminated previous one is an envelope concern
+            self._stack = [[self.table.root, 0]]
+            return
+        stack = self._stack
+        if not stack:
+            if seg_id not in ENVELOPE_SEGMENTS:
+                self._error(position, seg_id, "SEGMENT_OUTSIDE_TRANSACTION", "Segment outside an ST/SE transaction set")
+            return
+
+        for depth in range(len(stack) - 1, -1, -1):
+            loop, current = stack[depth]
+            order = loop.order.get(seg_id)
+            if order is None or order < current:
+                continue
+            del stack[depth + 1:]
+            stack[depth][1] = order
+            if seg_id in loop.children:
+                stack.append([self.table.loops[seg_id], 0])
+            if seg_id == "SE" and depth == 0:
+                self._stack = []
+            return
+        self._reject(seg_id, position)
+
+    def _reject(self, seg_id: str, position: int) -> None:
+        open_loops = [loop for loop, _current in self._stack]
+        if seg_id in ENVELOPE_SEGMENTS:
+            self._error(position, seg_id, "ENVELOPE_INSIDE_TRANSACTION", "Envelope segment inside a transaction set")
+        elif any(seg_id in loop.order for loop in open_loops):
+            self._error(position, seg_id, "SEGMENT_OUT_OF_ORDER",
+                        f"Out of order in the {self._describe(open_loops[-1])}")
+        elif seg_id in self.table.member_of:
+            loops = self.table.member_of[seg_id]
+            names = loops[0] if len(loops) == 1 else f"{', '.join(loops[:-1])} or {loops[-1]}"
+            self._error(position, seg_id, "MISSING_LOOP_HEADER", f"Only allowed inside the {names} loop")
+        else:
+            self._error(position, seg_id, "UNEXPECTED_SEGMENT", "Not part of the 810 transaction set")
+
+    @staticmethod
+    def _describe(loop: _Loop) -> str:
+        return "transaction set" if loop.loop_id == "ST" else f"{loop.loop_id} loop"
+
+    def _error(self, position: int, seg_id: str, code: str, message: str) -> None:
+        self.errors.append(StructureError(position, seg_id, code, message))
+
+
+def segment_sequence(field_store: FieldStore) -> Iterator[Tuple[int, str]]:
+    """Rebuild (position, segment ID) in document order from the store's per-segment positions."""
+    # Each segment's positions are ascending, so a k-way merge orders them in O(n log segments);
+    # a subset of a large interchange costs its own size, not the span of its positions
+    return heapq.merge(*(zip(positions, repeat(seg_id)) for seg_id, positions in field_store.positions.items()))
+
+
+def validate_structure(segments: Iterable[Tuple[int, str]], table: StructureTable = DEFAULT_STRUCTURE) -> List[StructureError]:
+    """Validate (position, segment ID) pairs in document order; returns the structure errors."""
+    validator = StructureValidator(table)
+    feed = validator.feed
+    for position, seg_id in segments:
+        feed(seg_id, position)
+    return validator.errors
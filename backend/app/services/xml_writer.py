@@ -0,0 +1,80 @@
+from typing import Callable, List, Mapping, Optional
+
+
+# Text nodes only need &, < and > escaped; the table handles all three in one pass
+_TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_ATTR_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+# Element tags are the same for every segment, so build them once
+_MAX_CACHED_ELEMENTS = 100
+_ELEMENT_OPEN = [f"\n    <Element_{idx:02d}>" for idx in range(_MAX_CACHED_ELEMENTS)]
+_ELEMENT_CLOSE = [f"</Element_{idx:02d}>" for idx in range(_MAX_CACHED_ELEMENTS)]
+
+DEFAULT_FLUSH_SIZE = 64 * 1024
+
+
+def escape_text(value: str) -> str:
+    """Escape a value for use as XML text content."""
+    # Nearly all EDI values are plain; the membership tests skip translate() for them
+    if "&" in value or "<" in value or ">" in value:
+        return value.translate(_TEXT_ESCAPES)
+    return value
+
+
+def escape_attribute(value: str) -> str:
+    """Escape a value for use inside a double-quoted XML attribute."""
+    return value.translate(_ATTR_ESCAPES)
+
+
+class XmlSegmentWriter:
+    """Streams the EDI-as-XML document to ``write`` one segment at a time.
+
+    Rendered text is buffered and handed to ``write`` in chunks of about
+    ``flush_size`` characters, so the sink can be a list's append, an open
+    file or a response stream. The output matches the document the parser
+    used to build in memory.
+    """
+
+    def __init__(self, write: Callable[[str], object], segment_names: Mapping[str, str],
+                 flush_size: int = DEFAULT_FLUSH_SIZE):
+        self._write: Optional[Callable[[str], object]] = write
+        self._segment_names = segment_names
+        self._flush_size = flush_size
+        self._buffer: List[str] = ["<EDI_810>\n  <TransactionType>810 - Invoice</TransactionType>"]
+        self._buffered = 0
+
+    def segment(self, seg_id: str, parts: List[str]) -> None:
+        """Render one segment; ``parts`` includes the segment ID."""
+        name = self._segment_names.get(seg_id)
+        if name is None:
+            # Unknown IDs become the tag name only when they are valid XML names
+            name = seg_id if seg_id.isalnum() and not seg_id[0].isdigit() else "Unknown_Segment"
+        attr = seg_id if seg_id.isalnum() else escape_attribute(seg_id)
+        out = [f"\n  <{name} segment_id=\"{attr}\">"]
+        append = out.append
+        for idx in range(1, len(parts)):
+            value = escape_text(parts[idx])
+            if idx < _MAX_CACHED_ELEMENTS:
+                append(f"{_ELEMENT_OPEN[idx]}{value}{_ELEMENT_CLOSE[idx]}")
+            else:
+                append(f"\n    <Element_{idx:02d}>{value}</Element_{idx:02d}>")
+        append(f"\n  </{name}>")
+        text = "".join(out)
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self._flush_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer and self._write is not None:
+            self._write("".join(self._buffer))
+        self._buffer = []
+        self._buffered = 0
+
+    def close(self) -> None:
+        """Write the closing tag and detach from the sink; safe to call more than once."""
+        if self._write is None:
+            return
+        self._buffer.append("\n</EDI_810>")
+        self.flush()
+        self._write = None
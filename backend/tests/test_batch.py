@@ -0,0 +1,75 @@
+import io
+import json
+import zipfile
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.services.batch import expand_batch_files
+
+
+ISA = "ISA*00*          *00*          *ZZ*SENDERID       *ZZ*RECEIVERID     *240101*1253*U*00401*000000001*0*P*>~"
+EDI = (ISA + "GS*IN*SENDER*RECEIVER*20240101*1253*1*X*004010~ST*810*0001~BIG*20240101*INV001~TDS*100~"
+       "SE*4*0001~GE*1*1~IEA*1*000000001~").encode("utf-8")
+
+
+def archive(**members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, data in members.items():
+            zip_file.writestr(name, data)
+    return buffer.getvalue()
+
+
+def expand(*files, **limits):
+    return [(name, len(data), error) for name, data, error in expand_batch_files(files, **limits)]
+
+
+def test_plain_files_and_archive_members():
+    files = [("a.edi", EDI), ("b.zip", io.BytesIO(archive(**{"c.edi": EDI, "d.edi": b"x"})))]
+    assert expand(*files) == [("a.edi", len(EDI), None), ("b.zip/c.edi", len(EDI), None), ("b.zip/d.edi", 1, None)]
+
+
+def test_unreadable_archive_is_one_error_entry():
+    ((name, size, error),) = expand(("bad.zip", b"PK\x03\x04 not really a zip"))
+    assert (name, size) == ("bad.zip", 0)
+    assert error.startswith("Cannot read zip archive")
+
+
+def test_members_over_the_size_limits_are_not_extracted():
+    data = archive(**{"small.edi": b"x" * 10, "large.edi": b"x" * 1000, "more.edi": b"x" * 60, "last.edi": b"x" * 40})
+    entries = expand(("batch.zip", data), max_member_bytes=100, max_archive_bytes=100)
+    assert [(name, size) for name, size, _error in entries] == [
+        ("batch.zip/small.edi", 10), ("batch.zip/large.edi", 0), ("batch.zip/more.edi", 60), ("batch.zip/last.edi", 0)]
+    assert "over the 100 byte limit per file" in entries[1][2]
+    assert "expands beyond the 100 byte limit" in entries[3][2]
+
+
+def read_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_streams_one_line_per_file():
+    client = TestClient(main.app)
+    files = [("files", ("a.edi", EDI)), ("files", ("b.zip", archive(**{"c.edi": EDI}))), ("files", ("bad.zip", b"PK"))]
+    response = client.post("/api/validate/batch", files=files, data={"profile_id": "default"})
+    assert response.status_code == 200
+    *results, summary = read_lines(response)
+    assert sorted((r["filename"], r["is_810"]) for r in results) == [
+        ("a.edi", True), ("b.zip/c.edi", True), ("bad.zip", False)]
+    assert summary == {"summary": {"files": 3, "valid_810": 2, "errors": 1}}
+
+
+def test_a_failing_document_does_not_end_the_batch(monkeypatch):
+    def broken(filename, *args):
+        if filename == "a.edi":
+            raise RuntimeError("worker died")
+        return {"filename": filename, "is_810": True}
+
+    monkeypatch.setattr(main, "validate_edi_file", broken)
+    client = TestClient(main.app)
+    files = [("files", ("a.edi", EDI)), ("files", ("b.edi", EDI))]
+    *results, summary = read_lines(client.post("/api/validate/batch", files=files, data={"profile_id": "default"}))
+    assert sorted((r["filename"], r.get("error")) for r in results) == [
+        ("a.edi", "Error processing EDI file: worker died"), ("b.edi", None)]
+    assert summary["summary"]["errors"] == 1
@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+from app.services.edi_parser import SegmentTokenizer, iter_segments, parse_edi_to_xml
+
+
+ISA = "ISA*00*          *00*          *ZZ*SENDERID       *ZZ*RECEIVERID     *240101*1253*U*00401*000000001*0*P*>~"
+DOCUMENT = ISA + "\n" + "\n".join([
+    "GS*IN*SENDER*RECEIVER*20240101*1253*1*X*004010~",
+    "ST*810*0001~",
+    "BIG*20240101*INV001~",
+    "N1*ST*CAFÉ ÜBER~",
+    "SE*4*0001~",
+    "GE*1*1~",
+    "IEA*1*000000001~",
+]) + "\n"
+SEGMENTS = [
+    ISA[:-1].split("*"),
+    ["GS", "IN", "SENDER", "RECEIVER", "20240101", "1253", "1", "X", "004010"],
+    ["ST", "810", "0001"],
+    ["BIG", "20240101", "INV001"],
+    ["N1", "ST", "CAFÉ ÜBER"],
+    ["SE", "4", "0001"],
+    ["GE", "1", "1"],
+    ["IEA", "1", "000000001"],
+]
+
+
+def test_isa_is_fixed_width():
+    assert len(ISA) == 106
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 105, 106, 107, 4096])
+def test_chunk_boundaries_do_not_change_segments(chunk_size):
+    assert list(iter_segments(DOCUMENT, chunk_size)) == SEGMENTS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5])
+def test_multibyte_characters_split_across_binary_chunks(chunk_size):
+    assert list(iter_segments(io.BytesIO(DOCUMENT.encode("utf-8")), chunk_size)) == SEGMENTS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 4096])
+def test_separators_come_from_the_isa_header(chunk_size):
+    document = DOCUMENT.replace("*", "|").replace("~", "^")
+    assert list(iter_segments(document, chunk_size)) == SEGMENTS
+
+
+def test_nothing_is_emitted_before_the_isa_header_is_complete():
+    tokenizer = SegmentTokenizer()
+    assert tokenizer.feed(DOCUMENT[:105]) == []
+    assert tokenizer.segment_sep is None
+    segments = tokenizer.feed(DOCUMENT[105:]) + tokenizer.close()
+    assert (tokenizer.element_sep, tokenizer.segment_sep) == ("*", "~")
+    assert segments == SEGMENTS
+
+
+def test_final_segment_without_terminator_is_flushed():
+    tokenizer = SegmentTokenizer()
+    segments = tokenizer.feed(DOCUMENT.rstrip("~\n")) + tokenizer.close()
+    assert segments == SEGMENTS
+
+
+def test_input_without_isa_uses_default_separators():
+    assert list(iter_segments("ST*810*0001~BIG*20240101*INV001~", 4)) == [
+        ["ST", "810", "0001"], ["BIG", "20240101", "INV001"]]
+
+
+def test_single_pass_parse_collects_fields():
+    xml, present_fields, is_810, field_values = parse_edi_to_xml(io.StringIO(DOCUMENT), chunk_size=3)
+    assert is_810
+    assert {"BIG01", "BIG02", "N102", "SE01"} <= present_fields
+    assert field_values["N102"] == "CAFÉ ÜBER"
+    assert "CAFÉ ÜBER" in xml
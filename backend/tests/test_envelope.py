@@ -0,0 +1,90 @@
+import pytest
+
+from app.services.edi_parser import parse_edi_document, validate_edi_810
+from app.services.envelope import EnvelopeTracker
+
+
+ISA = "ISA*00*          *00*          *ZZ*SENDERID       *ZZ*RECEIVERID     *240101*1253*U*00401*000000001*0*P*>"
+
+def interchange(*transaction_sets, ge="GE*{sets}*1", iea="IEA*1*000000001"):
+    segments = [ISA, "GS*IN*SENDER*RECEIVER*20240101*1253*1*X*004010"]
+    for transaction_set in transaction_sets:
+        segments.extend(transaction_set)
+    segments.append(ge.format(sets=len(transaction_sets)))
+    segments.append(iea)
+    return segments
+
+
+def invoice(control="0001", se=None):
+    body = [f"ST*810*{control}", "BIG*20240101*INV001", "TDS*100"]
+    return body + [se or f"SE*{len(body) + 1}*{control}"]
+
+
+def track(segments):
+    tracker = EnvelopeTracker()
+    for position, segment in enumerate(segments):
+        parts = segment.split("*")
+        tracker.feed(parts[0], parts, position)
+    tracker.close(len(segments))
+    return tracker
+
+
+def check(segments):
+    return [(e.position, e.segment_id, e.code, e.control_number) for e in track(segments).errors]
+
+
+def test_consistent_envelopes():
+    assert check(interchange(invoice("0001"), invoice("0002"))) == []
+
+
+def test_se01_counts_every_segment_from_st_to_se():
+    segments = interchange(invoice(se="SE*5*0001"))
+    assert check(segments) == [(5, "SE", "CONTROL_COUNT_MISMATCH", "0001")]
+    assert track(segments).errors[0].message == "SE01 declares 5 segments, found 4"
+
+
+def test_se02_must_match_st02():
+    assert check(interchange(invoice(se="SE*4*0009"))) == [(5, "SE", "CONTROL_NUMBER_MISMATCH", "0001")]
+
+
+@pytest.mark.parametrize("ge, iea, expected", [
+    ("GE*3*1", "IEA*1*000000001", [(10, "GE", "CONTROL_COUNT_MISMATCH", "1")]),
+    ("GE*2*7", "IEA*1*000000001", [(10, "GE", "CONTROL_NUMBER_MISMATCH", "1")]),
+    ("GE*2*1", "IEA*2*000000001", [(11, "IEA", "CONTROL_COUNT_MISMATCH", "000000001")]),
+    ("GE*2*1", "IEA*1*000000002", [(11, "IEA", "CONTROL_NUMBER_MISMATCH", "000000001")]),
+    ("GE*two*1", "IEA*1*000000001", [(10, "GE", "INVALID_CONTROL_COUNT", "1")]),
+])
+def test_group_and_interchange_tallies(ge, iea, expected):
+    assert check(interchange(invoice("0001"), invoice("0002"), ge=ge, iea=iea)) == expected
+
+
+def test_st_without_se_is_reported_where_the_next_set_starts():
+    segments = interchange(invoice("0001")[:-1], invoice("0002"))
+    assert check(segments) == [(5, "SE", "MISSING_TRAILER", "0001")]
+
+
+def test_envelopes_left_open_at_the_end_of_the_input():
+    segments = interchange(invoice("0001"))[:-2] + ["ST*810*0002"]
+    assert check(segments) == [
+        (7, "SE", "MISSING_TRAILER", "0002"),
+        (7, "GE", "MISSING_TRAILER", "1"),
+        (7, "IEA", "MISSING_TRAILER", "000000001"),
+    ]
+
+
+def test_trailer_without_header():
+    assert check(["SE*1*0001", "GE*0*1", "IEA*0*1"]) == [
+        (0, "SE", "UNEXPECTED_TRAILER", ""), (1, "GE", "UNEXPECTED_TRAILER", ""), (2, "IEA", "UNEXPECTED_TRAILER", "")]
+
+
+def test_parser_reports_envelope_errors_for_an_810():
+    document = "~".join(interchange(invoice(se="SE*9*0001"))) + "~"
+    parser = parse_edi_document(document, build_xml=False)
+    assert parser.finish()[2]
+    assert [(e.segment_id, e.code) for e in parser.envelope_errors] == [("SE", "CONTROL_COUNT_MISMATCH")]
+
+
+def test_envelope_errors_do_not_change_the_document_type():
+    document = "~".join(interchange(invoice(se="SE*9*0001"), ge="GE*5*1")) + "~"
+    assert validate_edi_810(document) == (True, "")
+    assert validate_edi_810(document.replace("ST*810", "ST*850"))[0] is False
@@ -0,0 +1,107 @@
+from app.services.field_store import LOOP_KINDS, FieldStore
+
+
+def build(segments, start=0):
+    store = FieldStore()
+    for position, segment in enumerate(segments, start):
+        parts = segment.split("*")
+        store.add_segment(parts[0], parts, position)
+    return store
+
+
+INVOICE = [
+    "ST*810*0001",
+    "BIG*20240101*INV001",
+    "REF*DP*038",
+    "REF*IA",
+    "N1*ST*ACME",
+    "N3*1 MAIN ST",
+    "N1*RE*SUPPLIER",
+    "N4*SPRINGFIELD*IL",
+    "IT1*1*10*EA*2.50",
+    "PID*F****WIDGET",
+    "SLN*1**I",
+    "IT1*2*4*EA*10",
+    "N1*ST*STORE 2",
+    "TDS*6500",
+    "CTT*2",
+    "SE*15*0001",
+]
+
+
+def loops(store, seg_id):
+    return [(LOOP_KINDS[kind], index) for kind, index in zip(store.loop_kinds[seg_id], store.loop_indexes[seg_id])]
+
+
+def test_every_occurrence_is_kept():
+    store = build(INVOICE)
+    assert store.segment_counts["REF"] == 2
+    assert store.columns["REF01"] == ["DP", "IA"]
+    assert list(store.values("REF02")) == [(0, "038")]
+    assert list(store.values("IT102")) == [(0, "10"), (1, "4")]
+    assert list(store.positions["IT1"]) == [8, 11]
+
+
+def test_columns_are_padded_to_the_occurrence():
+    store = build(["REF*DP", "REF*IA*VEND1"])
+    assert store.columns["REF02"] == ["", "VEND1"]
+    assert list(store.values("REF02")) == [(1, "VEND1")]
+
+
+def test_loop_membership():
+    store = build(INVOICE)
+    assert loops(store, "N1") == [("N1", 0), ("N1", 1), ("N1", 2)]
+    assert loops(store, "N3") == [("N1", 0)]
+    assert loops(store, "N4") == [("N1", 1)]
+    assert loops(store, "IT1") == [("IT1", 0), ("IT1", 1)]
+    assert loops(store, "PID") == [("IT1", 0)]
+    assert loops(store, "SLN") == [("SLN", 0)]
+    assert loops(store, "REF") == [("", -1), ("", -1)]
+    assert loops(store, "TDS") == [("", -1)]
+
+
+def test_subsets_keep_one_transaction_set_and_the_envelope():
+    second = [segment.replace("0001", "0002").replace("INV001", "INV002") for segment in INVOICE[:4]] + ["SE*5*0002"]
+    store = build(["ISA*00", "GS*IN"] + INVOICE + second)
+    start = 2 + len(INVOICE)
+    subset = store.subsets([(start, start + len(second) - 1)], ["ISA", "GS"])[0]
+    assert subset.segment_counts == {"ISA": 1, "GS": 1, "ST": 1, "BIG": 1, "REF": 2, "SE": 1}
+    assert subset.columns["BIG02"] == ["INV002"]
+    assert subset.columns["REF01"] == ["DP", "IA"]
+    assert list(subset.positions["REF"]) == [start + 2, start + 3]
+    assert list(subset.values("REF02")) == [(0, "038")]
+    assert subset.usage_counts == {}
+
+
+def test_dict_round_trip():
+    store = build(INVOICE)
+    assert FieldStore.from_dict(store.to_dict()).to_dict() == store.to_dict()
+
+
+def test_usage_counts_per_scope():
+    store = build([
+        "ST*810*0001",
+        "REF*DP*038",
+        "REF*IA*VEND1",
+        "N1*ST*ACME",
+        "REF*11*A",
+        "REF*11*B",
+        "REF*11*C",
+        "N1*RE*SUPPLIER",
+        "IT1*1*10*EA*2.50",
+        "N1*ST*STORE 2",
+        "SE*10*0001",
+    ])
+    # REF repeats three times within one N1 iteration, twice at the header level
+    assert store.segment_counts["REF"] == 5
+    assert store.usage_counts["REF"] == 3
+    # Loop headers count in the scope around their loop: two N1 loops in the header, one in the IT1 loop
+    assert store.segment_counts["N1"] == 3
+    assert store.usage_counts["N1"] == 2
+
+
+def test_usage_counts_restart_with_each_transaction_set():
+    store = build(["ST*810*0001", "IT1*1", "IT1*2", "SE*4*0001", "ST*810*0002", "IT1*1", "SE*3*0002"])
+    assert store.segment_counts["IT1"] == 3
+    assert store.usage_counts["IT1"] == 2
+    assert store.usage_counts["ST"] == 1
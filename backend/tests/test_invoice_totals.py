@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from app.services.invoice_totals import TotalsTracker
+
+
+def track(*segments):
+    tracker = TotalsTracker()
+    for position, segment in enumerate(segments):
+        parts = segment.split("*")
+        tracker.feed(parts[0], parts, position)
+    tracker.close()
+    return tracker
+
+
+def codes(tracker):
+    return [(e.position, e.segment_id, e.code, e.line, e.control_number) for e in tracker.errors]
+
+
+LINES = ["IT1*1*10*EA*2.50", "IT1*2*4*EA*10", "SAC*C*D240***500", "SAC*A*C310***100"]
+
+
+def test_lines_and_charges_add_up_to_tds():
+    # 10 x 2.50 + 4 x 10 + 5.00 charge - 1.00 allowance; TDS01 and SAC05 have two implied decimals
+    tracker = track("ST*810*0001", *LINES, "TDS*6900", "CTT*2", "SE*8*0001")
+    assert codes(tracker) == []
+    (invoice,) = tracker.invoices
+    assert invoice.computed_total == Decimal("69.00")
+    assert invoice.to_dict()["declared_total"] == "69.00"
+    assert invoice.lines == 2
+
+
+def test_explicit_decimal_point_is_not_scaled():
+    assert codes(track("ST*810*0001", *LINES, "TDS*69.00", "CTT*2", "SE*8*0001")) == []
+
+
+def test_total_mismatch():
+    tracker = track("ST*810*0001", *LINES, "TDS*7000", "CTT*2", "SE*8*0001")
+    assert codes(tracker) == [(5, "TDS", "TOTAL_MISMATCH", None, "0001")]
+    assert tracker.errors[0].message.startswith("TDS01 declares 70.00, lines and charges add up to 69.00")
+
+
+def test_line_count_mismatch():
+    tracker = track("ST*810*0001", *LINES, "TDS*6900", "CTT*3", "SE*8*0001")
+    assert codes(tracker) == [(6, "CTT", "LINE_COUNT_MISMATCH", None, "0001")]
+
+
+def test_uncomputable_line_is_reported_and_skipped():
+    tracker = track("ST*810*0001", "IT1*1*10*EA*2.50", "IT1*2*four*EA*10", "TDS*2500", "CTT*2", "SE*6*0001")
+    assert codes(tracker) == [(2, "IT1", "INVALID_LINE_AMOUNT", 2, "0001")]
+    assert tracker.invoices[0].skipped_lines == 1
+
+
+def test_invalid_amounts():
+    tracker = track("ST*810*0001", "IT1*1*1*EA*1", "SAC*C*D240***x", "TDS*abc", "CTT*one", "SE*6*0001")
+    assert [e.code for e in tracker.errors] == ["INVALID_CHARGE_AMOUNT", "INVALID_TOTAL_AMOUNT", "INVALID_LINE_COUNT"]
+
+
+def test_each_transaction_set_is_reconciled_on_its_own():
+    tracker = track("ST*810*0001", "IT1*1*1*EA*5", "TDS*500", "CTT*1", "SE*5*0001",
+                    "ST*810*0002", "IT1*1*2*EA*5", "TDS*500", "CTT*1", "SE*5*0002")
+    assert codes(tracker) == [(7, "TDS", "TOTAL_MISMATCH", None, "0002")]
+    assert [invoice.computed_total for invoice in tracker.invoices] == [Decimal("5.00"), Decimal("10.00")]
+
+
+def test_set_without_se_is_reconciled_when_the_next_one_starts():
+    tracker = track("ST*810*0001", "IT1*1*1*EA*5", "TDS*900", "CTT*2",
+                    "ST*810*0002", "IT1*1*1*EA*5", "TDS*500", "CTT*1", "SE*5*0002")
+    assert codes(tracker) == [(2, "TDS", "TOTAL_MISMATCH", None, "0001"), (3, "CTT", "LINE_COUNT_MISMATCH", None, "0001")]
+
+
+def test_set_left_open_at_the_end_is_reconciled_on_close():
+    tracker = track("ST*810*0001", "IT1*1*1*EA*5", "TDS*900")
+    assert codes(tracker) == [(2, "TDS", "TOTAL_MISMATCH", None, "0001")]
@@ -0,0 +1,37 @@
+import json
+
+from app.services.spec_cache import CachedSpec, SpecCache, spec_id_for
+from app.services.spec_parser import PARSER_VERSION
+
+
+def make_spec():
+    return CachedSpec("txt", {"BIG02": True, "REF03": False}, {"BIG02", "REF03"}, {"BIG02": "M", "REF03": "O"},
+                      "spec.txt", definitions={"REF03": {"status": "O", "length": "1/80"}})
+
+
+def test_entries_survive_a_restart(tmp_path):
+    spec_id = spec_id_for(b"spec document")
+    SpecCache(persist_dir=str(tmp_path)).put(spec_id, make_spec())
+    cache = SpecCache(persist_dir=str(tmp_path))
+    loaded = cache.get(spec_id)
+    assert loaded.to_dict() == make_spec().to_dict()
+    assert (cache.disk_hits, cache.misses) == (1, 0)
+
+
+def test_entries_from_another_parser_version_are_misses(tmp_path):
+    spec_id = spec_id_for(b"spec document")
+    SpecCache(persist_dir=str(tmp_path)).put(spec_id, make_spec())
+    path = tmp_path / f"{spec_id}.json"
+    for version in (PARSER_VERSION - 1, None):
+        data = json.loads(path.read_text())
+        data["parser_version"] = version
+        path.write_text(json.dumps(data))
+        cache = SpecCache(persist_dir=str(tmp_path))
+        assert cache.get(spec_id) is None
+        assert cache.misses == 1
+
+
+def test_ids_outside_the_digest_alphabet_never_touch_the_disk(tmp_path):
+    cache = SpecCache(persist_dir=str(tmp_path))
+    cache.put("../escape", make_spec())
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,56 @@
+import pytest
+
+from app.services.spec_parser import analyze_spec_line
+
+
+@pytest.mark.parametrize("line, tags", [
+    # Segment IDs ending in a digit: the element number follows the whole ID
+    ("N101 Entity Identifier Code M ID 2/3", ["N101"]),
+    ("N401 City Name O AN 2/30", ["N401"]),
+    ("IT101 Assigned Identification", ["IT101"]),
+    ("IT102 Quantity Invoiced (O)", ["IT102"]),
+    # A loop name without an element number is not a reference
+    ("N1 loop: N102 Name, N103 qualifier | M |", ["N102", "N103"]),
+    ("N1010 M", []),
+])
+def test_segment_ids_with_digits(line, tags):
+    assert analyze_spec_line(line)[0] == tags
+
+
+def test_short_reference_is_normalized():
+    assert analyze_spec_line("BIG2 Invoice Number M") == (["BIG02"], "M")
+
+
+@pytest.mark.parametrize("line", [
+    "big02 lowercase M",  # references are case-sensitive
+    "XBIG02 M",  # only whole references
+    "BIG99 Unknown M",  # unknown element
+    "This line mentions nothing",
+])
+def test_lines_without_known_references(line):
+    assert analyze_spec_line(line) == ([], "")
+
+
+@pytest.mark.parametrize("line, status", [
+    ("BIG02 Invoice Number (M)", "M"),
+    ("REF01\tM\tID", "M"),
+    ("CUR02 |O| currency", "O"),
+    ("Status X applies to TXI01", "X"),
+    ("BIG02 x", "X"),
+    ("BIG04 Purchase order O, see note", "O"),
+])
+def test_status_markers(line, status):
+    assert analyze_spec_line(line)[1] == status
+
+
+def test_mandatory_marker_wins_over_others():
+    assert analyze_spec_line("SE01 (O) and (M)") == (["SE01"], "M")
+    assert analyze_spec_line("BIG04 o, M:") == (["BIG04"], "M")
+
+
+def test_bare_status_among_last_tokens():
+    assert analyze_spec_line("PID05 Description of item O") == (["PID05"], "O")
+
+
+def test_no_status():
+    assert analyze_spec_line("IT101 Assigned Identification") == (["IT101"], "")
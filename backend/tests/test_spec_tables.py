@@ -0,0 +1,89 @@
+import pytest
+
+from app.services.spec_parser import _FIELD_REFERENCES
+from app.services.spec_tables import TableSpec, parse_table_row
+
+
+def parse(*cells):
+    return parse_table_row(cells, _FIELD_REFERENCES)
+
+
+def test_row_with_one_min_max_token():
+    assert parse("BIG02", "76", "Invoice Number", "M", "AN", "1/22") == (
+        "BIG02", {"type": "AN", "length": "1/22", "status": "M", "name": "Invoice Number"})
+
+
+def test_row_as_a_single_text_box():
+    assert parse("BIG04  Purchase Order Number  O  AN 1/10") == (
+        "BIG04", {"type": "AN", "length": "1/10", "status": "O", "name": "Purchase Order Number"})
+
+
+def test_dashed_min_max_token():
+    assert parse("N101", "98", "Entity Identifier Code", "M", "ID", "2-3")[1]["length"] == "2/3"
+
+
+def test_separate_min_and_max_columns():
+    assert parse("BIG02", "76", "Invoice Number", "M", "AN", "1", "22") == (
+        "BIG02", {"type": "AN", "length": "1/22", "status": "M", "name": "Invoice Number"})
+
+
+def test_repeat_count_between_status_and_type():
+    tag, definition = parse("BIG02", "76", "Invoice Number", "Mandatory", "1", "AN", "1", "22")
+    assert tag == "BIG02"
+    assert definition["status"] == "M"
+    assert definition["length"] == "1/22"
+    assert definition["name"] == "Invoice Number"
+
+
+@pytest.mark.parametrize("word, status", [
+    ("M", "M"), ("Required", "M"), ("O", "O"), ("Optional", "O"), ("X", "X"), ("C", "X"), ("Conditional", "X"),
+])
+def test_status_words(word, status):
+    assert parse("IT102", "358", "Quantity Invoiced", word, "R", "1/10")[1]["status"] == status
+
+
+def test_short_reference_and_element_number_column():
+    tag, definition = parse("BIG2", "76", "Invoice Number", "M", "AN", "1/22")
+    assert tag == "BIG02"
+    assert definition["name"] == "Invoice Number"
+
+
+def test_row_without_type_column_takes_a_status_cell():
+    assert parse("REF03", "Description", "Optional") == ("REF03", {"status": "O"})
+
+
+def test_row_without_type_column_or_status_is_ignored():
+    assert parse("REF03", "Description") is None
+
+
+def test_status_word_inside_a_name_is_not_a_status_cell():
+    # Without a type column only a cell holding nothing but the status word counts
+    assert parse("REF03", "Description or other X reference") is None
+
+
+def test_minimum_above_maximum_is_not_a_length():
+    # No type/length anchor, so only the status cell is read
+    assert parse("BIG02", "Invoice Number", "M", "AN", "22/1") == ("BIG02", {"status": "M"})
+
+
+@pytest.mark.parametrize("cells", [
+    ("Ref", "Id", "Element Name", "Req", "Type", "Min/Max"),
+    ("BIG02 is required when the invoice is a credit memo",),
+    ("Notes:", "Use BIG02 to send the invoice number, max 22 characters"),
+    ("This segment is used to transmit the invoice date and number.",),
+])
+def test_headings_and_prose_are_ignored(cells):
+    assert parse(*cells) is None
+
+
+def test_unknown_element_is_ignored():
+    assert parse("BIG99", "Unknown", "M", "AN", "1/10") is None
+
+
+def test_table_spec_first_row_wins_and_later_rows_fill_gaps():
+    tables = TableSpec(_FIELD_REFERENCES)
+    assert tables.add_row(["REF03", "Description", "Optional"]) == "REF03"
+    assert tables.add_row(["REF03", "352", "Description", "M", "AN", "1/80"]) == "REF03"
+    assert tables.add_row(["Ref", "Id", "Element Name"]) is None
+    assert tables.fields == {"REF03": {"status": "O", "type": "AN", "length": "1/80", "name": "Description"}}
+    assert (tables.rows, tables.matched_rows) == (3, 2)
@@ -0,0 +1,46 @@
+from app.services.edi_parser import StreamingEDIParser, parse_edi_document
+
+
+ISA = "ISA*00*          *00*          *ZZ*SENDERID       *ZZ*RECEIVERID     *240101*1253*U*00401*000000001*0*P*>~"
+
+
+def interchange(count, tds="500", se01="5"):
+    segments = [ISA, "GS*IN*SENDER*RECEIVER*20240101*1253*1*X*004010~"]
+    for i in range(1, count + 1):
+        segments += [f"ST*810*{i:04d}~", f"BIG*20240101*INV{i}~", "IT1*1*1*EA*5~", f"TDS*{tds}~", f"SE*{se01}*{i:04d}~"]
+    segments += [f"GE*{count}*1~", "IEA*1*000000001~"]
+    return "\n".join(segments).encode("utf-8")
+
+
+def stream(data, chunk_size=7, **kwargs):
+    stream_parser = StreamingEDIParser(**kwargs)
+    for start in range(0, len(data), chunk_size):
+        stream_parser.feed(data[start:start + chunk_size])
+    return stream_parser, stream_parser.close()
+
+
+def test_streamed_chunks_match_a_full_parse():
+    data = interchange(3)
+    stream_parser, parsed = stream(data)
+    full = parse_edi_document(data, build_xml=False)
+    assert parsed.finish()[1:] == full.finish()[1:]
+    assert [t.to_dict() for t in stream_parser.transactions] == [t.to_dict() for t in full.transactions]
+    assert stream_parser.transaction_count == 3
+    assert stream_parser.bytes_received == len(data)
+
+
+def test_details_are_capped_but_everything_is_counted():
+    # Every set's TDS01 is off, and SE01 is one short
+    stream_parser, parsed = stream(interchange(25, tds="600", se01="4"), chunk_size=64, detail_limit=4)
+    assert stream_parser.transaction_count == 25
+    assert [t.control_number for t in stream_parser.transactions] == ["0001", "0002", "0003", "0004"]
+    assert parsed.completed == []
+    assert (len(parsed.totals.invoices), parsed.totals.invoice_count) == (4, 25)
+    assert (len(parsed.totals_errors), parsed.totals.error_count) == (4, 25)
+    assert (len(parsed.envelope_errors), parsed.envelope.error_count) == (4, 25)
+
+
+def test_rejected_document_stops_the_stream():
+    stream_parser = StreamingEDIParser()
+    assert not stream_parser.feed(interchange(1).replace(b"ST*810", b"ST*850"))
+    assert "850" in stream_parser.close().validation_error()
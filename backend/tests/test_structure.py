@@ -0,0 +1,57 @@
+import pytest
+
+from app.services.field_store import FieldStore
+from app.services.structure import segment_sequence, validate_structure
+
+
+def errors(*seg_ids):
+    return [(e.position, e.segment_id, e.code) for e in validate_structure(enumerate(seg_ids))]
+
+
+def test_valid_invoice_with_nested_loops():
+    assert errors("ST", "BIG", "REF", "N1", "N3", "N4", "N1", "N4", "DTM", "IT1", "PID", "SAC", "TXI", "SLN", "PID",
+                  "N1", "N3", "IT1", "PID", "TDS", "SAC", "TXI", "CTT", "SE") == []
+
+
+def test_repeated_loop_header_starts_a_new_iteration():
+    assert errors("ST", "BIG", "IT1", "PID", "IT1", "PID", "IT1", "CTT", "SE") == []
+
+
+def test_envelope_around_transaction_sets():
+    assert errors("ISA", "GS", "ST", "BIG", "SE", "ST", "BIG", "SE", "GE", "IEA") == []
+
+
+def test_segment_out_of_order():
+    assert errors("ST", "BIG", "TDS", "BIG", "SE") == [(3, "BIG", "SEGMENT_OUT_OF_ORDER")]
+
+
+def test_loop_closed_by_a_later_segment_cannot_resume():
+    assert errors("ST", "BIG", "IT1", "N1", "N3", "IT1", "TDS", "N1", "SE") == [(7, "N1", "SEGMENT_OUT_OF_ORDER")]
+
+
+@pytest.mark.parametrize("seg_id", ["PID", "IT3"])
+def test_loop_member_without_its_header(seg_id):
+    assert errors("ST", "BIG", seg_id, "TDS", "SE") == [(2, seg_id, "MISSING_LOOP_HEADER")]
+
+
+def test_missing_header_message_names_every_loop():
+    (error,) = validate_structure(enumerate(["ST", "BIG", "PID", "SE"]))
+    assert error.message == "Only allowed inside the IT1, SLN or ISS loop"
+    assert str(error) == "Segment 3 (PID): Only allowed inside the IT1, SLN or ISS loop"
+
+
+def test_unknown_segment():
+    assert errors("ST", "BIG", "ZZZ", "SE") == [(2, "ZZZ", "UNEXPECTED_SEGMENT")]
+
+
+def test_segments_outside_and_envelopes_inside_a_transaction_set():
+    assert errors("ISA", "GS", "BIG", "ST", "GS", "SE") == [
+        (2, "BIG", "SEGMENT_OUTSIDE_TRANSACTION"), (4, "GS", "ENVELOPE_INSIDE_TRANSACTION")]
+
+
+def test_segment_sequence_restores_document_order():
+    seg_ids = ["ISA", "GS", "ST", "BIG", "REF", "N1", "REF", "IT1", "PID", "IT1", "SE", "GE", "IEA"]
+    store = FieldStore()
+    for position, seg_id in enumerate(seg_ids):
+        store.add_segment(seg_id, [seg_id, "X"], position)
+    assert list(segment_sequence(store)) == list(enumerate(seg_ids))
@@ -115,19 +115,17 @@ document.getElementById('btnProcess')?.addEventListener('click', async () => {
     loading.classList.remove('hidden');
     
     const [specXml, ediXml] = await Promise.all([
-      uploadAndParse('/api/parse/spec', spec),
-      uploadAndParse('/api/parse/edi', edi)
+      // Only the handles and the XML shown in the XML tab are needed here
+      uploadAndParse('/api/parse/spec?include=xml', spec),
+      uploadAndParse('/api/parse/edi?include=xml', edi)
     ]);
     const compareRes = await fetch('/api/compare', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
+      // The server keeps both parses; only the handles travel back
       body: JSON.stringify({
-        edi_xml: ediXml.xml,
-        spec_xml: specXml.xml,
-        edi_fields: ediXml.fields || [],
-        spec_requirements: specXml.requirements || {},
-        edi_field_values: ediXml.field_values || {},
-        spec_status_map: specXml.status_map || {}
+        edi_id: ediXml.edi_id,
+        spec_id: specXml.spec_id
       })
     });
     if (!compareRes.ok) {
@@ -296,6 +294,8 @@ function createSegmentTable(segments) {
     const statusBadge = segment.status.includes('Present') 
       ? `<span style="color:#22c55e;font-weight:bold;">${segment.status}</span>`
       : `<span style="color:#ef4444;font-weight:bold;">${segment.status}</span>`;
+    const usageErrorIndicator = segment.usage_error ?
+      `<br><span style="color:#dc2626;font-size:11px;">⚠ ${segment.usage_error}</span>` : '';
     
     return `<tr class="${rowClass}">
       <td><strong>${segment.segment_tag}</strong></td>
@@ -304,7 +304,7 @@ function createSegmentTable(segments) {
       <td>${segment.min_usage}</td>
       <td>${segment.max_usage}</td>
       <td>${segment.present_in_edi}</td>
-      <td>${statusBadge}</td>
+      <td>${statusBadge}${usageErrorIndicator}</td>
     </tr>`;
   }).join('');
   